@@ -15,3 +15,17 @@ class Booking(admin.ModelAdmin):
         "guests",
     )
     list_filter = ("kind",)
+
+    list_select_related = (
+        "user",
+        "room",
+        "experience",
+    )
+
+    autocomplete_fields = (
+        "user",
+        "room",
+        "experience",
+    )
+
+    show_full_result_count = False
@@ -0,0 +1,65 @@
+# Generated by Django 4.2.2 on 2026-10-19 11:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from common.sharding import ShardsOnly
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "experiences",
+            "0003_alter_experience_category_alter_experience_host_and_more",
+        ),
+        ("rooms", "0005_alter_room_amenities_alter_room_category_and_more"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("bookings", "0002_alter_booking_experience_alter_booking_room_and_more"),
+    ]
+
+    # Only shards drop the constraints: they do not hold the tables the
+    # foreign keys point at. See common.sharding.ShardsOnly.
+    operations = [
+        ShardsOnly(
+            migrations.AlterField(
+                model_name="booking",
+                name="experience",
+                field=models.ForeignKey(
+                    blank=True,
+                    db_constraint=False,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    related_name="bookings",
+                    to="experiences.experience",
+                ),
+            )
+        ),
+        ShardsOnly(
+            migrations.AlterField(
+                model_name="booking",
+                name="room",
+                field=models.ForeignKey(
+                    blank=True,
+                    db_constraint=False,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    related_name="bookings",
+                    to="rooms.room",
+                ),
+            )
+        ),
+        ShardsOnly(
+            migrations.AlterField(
+                model_name="booking",
+                name="user",
+                field=models.ForeignKey(
+                    db_constraint=False,
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name="bookings",
+                    to=settings.AUTH_USER_MODEL,
+                ),
+            )
+        ),
+    ]
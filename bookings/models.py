@@ -1,5 +1,19 @@
 from django.db import models
 from common.models import CommonModel
+from common.sharding import ShardedManager
+
+
+class BookingManager(ShardedManager):
+    def for_room(self, room):
+        return self.for_key(room.pk).filter(room=room)
+
+    def for_experience(self, experience):
+        return self.for_key(experience.pk).filter(experience=experience)
+
+    def for_user(self, user, limit=None):
+        """A user's bookings from every shard, newest first"""
+        # pks are only ordered within a shard, so sort by creation time.
+        return self.across_shards(order_by="-created_at", limit=limit, user_id=user.pk)
 
 
 class Booking(CommonModel):
@@ -11,7 +25,10 @@ class Booking(CommonModel):
 
     kind = models.CharField(max_length=15, choices=BookingKindChoices.choices)
     user = models.ForeignKey(
-        "users.User", on_delete=models.CASCADE, related_name="bookings"
+        "users.User",
+        on_delete=models.CASCADE,
+        related_name="bookings",
+        db_constraint=False,
     )
     room = models.ForeignKey(
         "rooms.Room",
@@ -19,6 +36,7 @@ class Booking(CommonModel):
         null=True,
         blank=True,
         related_name="bookings",
+        db_constraint=False,
     )
     experience = models.ForeignKey(
         "experiences.Experience",
@@ -26,11 +44,14 @@ class Booking(CommonModel):
         null=True,
         blank=True,
         related_name="bookings",
+        db_constraint=False,
     )
     check_in = models.DateField(null=True, blank=True)
     check_out = models.DateField(null=True, blank=True)
     experience_time = models.DateTimeField(null=True, blank=True)
     guests = models.PositiveIntegerField()
 
+    objects = BookingManager()
+
     def __str__(self):
         return f"{self.kind.title()} booking for: {self.user}"
@@ -28,10 +28,14 @@ class CreateRoomBookinSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError(
                 "Check in should be smaller than check out."
             )
-        if Booking.objects.filter(
-            check_in__lte=data["check_out"],
-            check_out__gte=data["check_in"],
-        ).exists():
+        if (
+            Booking.objects.for_room(self.context["room"])
+            .filter(
+                check_in__lte=data["check_out"],
+                check_out__gte=data["check_in"],
+            )
+            .exists()
+        ):
             raise serializers.ValidationError(
                 "Those (or some) of those dates are already taken."
             )
@@ -48,3 +52,18 @@ class PublicBookingSerializer(serializers.ModelSerializer):
             "experience_time",
             "guests",
         )
+
+
+class MyBookingSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Booking
+        fields = (
+            "pk",
+            "kind",
+            "room",
+            "experience",
+            "check_in",
+            "check_out",
+            "experience_time",
+            "guests",
+        )
@@ -1,3 +1,57 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from bookings.models import Booking
+from rooms.models import Room
+from users.models import User
+
+
+class TestBookings(APITestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    def setUp(self):
+        self.host = User.objects.create(username="host")
+        self.guest = User.objects.create(username="guest")
+        self.rooms = [
+            Room.objects.create(
+                name=f"Room {n}",
+                price=1,
+                rooms=1,
+                toilets=1,
+                description="",
+                address="",
+                owner=self.host,
+            )
+            for n in range(2)
+        ]
+        self.client.force_authenticate(self.guest)
+
+    def book(self, room):
+        today = timezone.localtime(timezone.now()).date()
+        return self.client.post(
+            f"/api/v1/rooms/{room.pk}/bookings",
+            {
+                "check_in": today + timedelta(days=1),
+                "check_out": today + timedelta(days=3),
+                "guests": 1,
+            },
+        )
+
+    def test_dates_are_checked_per_room(self):
+        first, second = self.rooms
+        self.assertIn("pk", self.book(first).json())
+        self.assertIn("non_field_errors", self.book(first).json())
+        self.assertIn("pk", self.book(second).json())
+
+    def test_my_bookings(self):
+        for room in self.rooms:
+            self.book(room)
+        response = self.client.get("/api/v1/bookings/me")
+        self.assertEqual(
+            [booking["room"] for booking in response.json()],
+            [room.pk for room in reversed(self.rooms)],
+        )
+        self.assertEqual(Booking.objects.for_user(self.host), [])
@@ -0,0 +1,6 @@
+from django.urls import path
+from bookings.views import MyBookings
+
+urlpatterns = [
+    path("me", MyBookings.as_view()),
+]
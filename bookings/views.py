@@ -1,3 +1,40 @@
-from django.shortcuts import render
+from django.conf import settings
+from common.docs import openapi, swagger_auto_schema
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
-# Create your views here.
+from bookings.models import Booking
+from bookings.serializers import MyBookingSerializer
+
+
+class MyBookings(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="Bookings of the logged-in user, newest first",
+        manual_parameters=[
+            openapi.Parameter(
+                "page",
+                openapi.IN_QUERY,
+                type=openapi.TYPE_INTEGER,
+                required=False,
+                default=1,
+            )
+        ],
+        responses={200: MyBookingSerializer(many=True)},
+    )
+    def get(self, request):
+        try:
+            page = request.query_params.get("page", 1)
+            page = int(page)
+        except ValueError:
+            page = 1
+        page_size = settings.PAGE_SIZE
+        start = (page - 1) * page_size
+        end = start + page_size
+        # Bookings live on their room's shard, so every shard is asked for
+        # its first `end` rows and the results merged.
+        bookings = Booking.objects.for_user(request.user, limit=end)[start:]
+        serializer = MyBookingSerializer(bookings, many=True)
+        return Response(serializer.data)
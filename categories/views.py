@@ -1,7 +1,7 @@
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.decorators import action
 
-from drf_yasg.utils import swagger_auto_schema
+from common.docs import swagger_auto_schema
 
 from categories.models import Category
 from categories.serializers import CategorySerializer
@@ -1,3 +1,39 @@
+from django.conf import settings
 from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.shortcuts import redirect, render
+from django.views.decorators.http import require_http_methods
 
-# Register your models here.
+from common import slowlog
+from common.streaming import stream_json, values_batches
+
+# Admin pages live here rather than in views.py, so workers without the
+# admin site (DEPLOYMENT_ROLE=api) never import django.contrib.admin.
+
+@staff_member_required
+@require_http_methods(["GET", "POST"])
+def slow_queries(request):
+    if request.method == "POST":
+        slowlog.clear()
+        return redirect(request.path)
+    return render(
+        request,
+        "admin/slow_queries.html",
+        {
+            **admin.site.each_context(request),
+            "title": "Slow queries",
+            "entries": slowlog.entries(),
+            "threshold": settings.SLOW_QUERY_THRESHOLD_MS,
+        },
+    )
+
+
+@admin.action(description="Export selected %(verbose_name_plural)s as JSON")
+def export_json(model_admin, request, queryset):
+    """Stream the selected rows' columns without loading them all at once"""
+    meta = queryset.model._meta
+    columns = [field.attname for field in meta.concrete_fields]
+    return stream_json(
+        values_batches(queryset.values(*columns)),
+        filename=f"{meta.model_name}.json",
+    )
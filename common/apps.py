@@ -1,6 +1,33 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CommonConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "common"
+
+    def ready(self):
+        if settings.SESSION_BATCH_LAST_LOGIN:
+            from django.contrib.auth.signals import user_logged_in
+            from common.sessions import record_last_login
+
+            user_logged_in.disconnect(dispatch_uid="update_last_login")
+            user_logged_in.connect(record_last_login, dispatch_uid="update_last_login")
+        if settings.SLOW_QUERY_THRESHOLD_MS:
+            from django.db.backends.signals import connection_created
+            from common.slowlog import install
+
+            connection_created.connect(install, dispatch_uid="slow_query_log")
+        if settings.TRACING_ENABLED:
+            from common.tracing import instrument
+
+            instrument()
+        if settings.SQLITE_PRAGMAS:
+            from django.db.backends.signals import connection_created
+            from common.db.pragmas import apply_pragmas
+
+            connection_created.connect(apply_pragmas, dispatch_uid="sqlite_pragmas")
+        if settings.SHARD_DATABASES:
+            from common.sharding import connect_signals
+
+            connect_signals()
@@ -0,0 +1,464 @@
+"""Endpoint benchmarks and regression comparison
+
+Each scenario is requested `iterations` times after a warm-up, either
+in-process through the Django test client or over HTTP against a threaded
+WSGI server on localhost. Results are plain JSON so they can be committed as
+a baseline and compared later with benchmark_compare.
+"""
+
+import http.client
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import override_settings
+
+from common.metrics import QueryCounter
+from common.seeding import BENCH_PASSWORD
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+QUERIES_HEADER = "X-Bench-Queries"
+
+# (name, method, path, needs a logged-in user)
+SCENARIOS = [
+    ("room_list", "GET", "/api/v1/rooms/", False),
+    ("room_detail", "GET", "/api/v1/rooms/{room}", False),
+    ("room_reviews", "GET", "/api/v1/rooms/{room}/reviews?page=2", False),
+    ("room_bookings", "GET", "/api/v1/rooms/{room}/bookings", False),
+    ("wishlists", "GET", "/api/v1/wishlists/", True),
+    ("categories", "GET", "/api/v1/categories/", False),
+    ("login", "POST", "/api/v1/users/log-in", False),
+    ("review_create", "POST", "/api/v1/rooms/{room}/reviews", True),
+]
+
+# Metrics where a larger number is worse, with the relative change that
+# counts as a regression. Query counts regress on any increase.
+REGRESSION_METRICS = {
+    "p50_ms": None,
+    "p95_ms": None,
+    "p99_ms": None,
+    "queries": 0,
+    "errors": 0,
+}
+
+# Metrics shown by benchmark_compare --report
+REPORT_METRICS = ("p50_ms", "p95_ms", "throughput_rps", "errors")
+
+
+def process_peak_rss_kb():
+    """High-water mark of the whole process so far, not of one scenario.
+
+    ru_maxrss never goes down, so a scenario only moves it by using more
+    memory than everything before it.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere.
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def summarize(latencies, queries, elapsed, errors=0):
+    """p50/p95/p99 in milliseconds, requests per second and median queries"""
+    if len(latencies) > 1:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+    else:
+        cuts = list(latencies) * 99
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "p50_ms": round(cuts[49] * 1000, 3),
+        "p95_ms": round(cuts[94] * 1000, 3),
+        "p99_ms": round(cuts[98] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "queries": statistics.median(queries),
+        "process_peak_rss_kb": process_peak_rss_kb(),
+    }
+
+
+def pick_fixtures():
+    """The busiest room and a user with a wishlist to log in as"""
+    from rooms.models import Room
+    from users.models import User
+    from wishlists.models import Wishlist
+
+    room = (
+        Room.objects.annotate(review_count=Count("reviews"))
+        .order_by("-review_count", "pk")
+        .first()
+    )
+    wishlist = Wishlist.objects.order_by("pk").first()
+    user = wishlist.user if wishlist else User.objects.order_by("pk").first()
+    if room is None or user is None:
+        raise LookupError("No rooms or users to benchmark; run seed_benchmark first")
+    return {"room": room.pk, "user": user}
+
+
+class InProcessClient:
+    """Requests through the test client; queries are counted in this thread"""
+
+    name = "client"
+
+    def __init__(self, token):
+        self.client = Client()
+        self.headers = {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    @contextmanager
+    def running(self):
+        yield self
+
+    def request(self, method, path, body, authenticated):
+        headers = self.headers if authenticated else {}
+        counter = QueryCounter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            if method == "GET":
+                response = self.client.get(path, **headers)
+            else:
+                response = self.client.post(
+                    path, body, content_type="application/json", **headers
+                )
+        return response.status_code, counter.count
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class CountingApplication:
+    """WSGI wrapper that reports each request's query count in a header.
+
+    The server handles requests on its own threads, whose connections the
+    benchmark thread cannot wrap, so the count travels with the response.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    def __call__(self, environ, start_response):
+        counter = QueryCounter()
+        response = {}
+
+        def capture(status, headers, exc_info=None):
+            response["status"], response["headers"] = status, headers
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            result = self.application(environ, capture)
+            try:
+                body = b"".join(result)
+            finally:
+                if hasattr(result, "close"):
+                    result.close()
+        start_response(
+            response["status"],
+            response["headers"] + [(QUERIES_HEADER, str(counter.count))],
+        )
+        return [body]
+
+
+class ServerClient:
+    """Requests over HTTP against a threaded WSGI server on localhost"""
+
+    name = "server"
+
+    def __init__(self, token):
+        self.headers = {"Authorization": f"Bearer {token}"}
+
+    @contextmanager
+    def running(self):
+        server = ThreadedWSGIServer(("127.0.0.1", 0), QuietHandler)
+        server.set_app(CountingApplication(get_wsgi_application()))
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.port = server.server_address[1]
+        try:
+            yield self
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def request(self, method, path, body, authenticated):
+        headers = dict(self.headers) if authenticated else {}
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        connection = http.client.HTTPConnection("127.0.0.1", self.port)
+        try:
+            connection.request(method, path, body, headers)
+            response = connection.getresponse()
+            response.read()
+            return response.status, int(response.getheader(QUERIES_HEADER, 0))
+        finally:
+            connection.close()
+
+
+SUITES = {
+    InProcessClient.name: InProcessClient,
+    ServerClient.name: ServerClient,
+}
+
+
+def run_scenario(client, method, path, body, authenticated, iterations, concurrency):
+    def timed(_):
+        start = time.perf_counter()
+        status, queries = client.request(method, path, body, authenticated)
+        # Client errors mean the scenario is broken; server errors (such as
+        # "database is locked" under concurrent writes) are counted.
+        if 400 <= status < 500:
+            raise RuntimeError(f"{method} {path} returned {status}")
+        return time.perf_counter() - start, queries, status >= 500
+
+    started = time.perf_counter()
+    if concurrency > 1:
+        with ThreadPoolExecutor(concurrency) as pool:
+            samples = list(pool.map(timed, range(iterations)))
+    else:
+        samples = [timed(n) for n in range(iterations)]
+    elapsed = time.perf_counter() - started
+    latencies, queries, errors = zip(*samples)
+    return summarize(latencies, queries, elapsed, sum(errors))
+
+
+def request_body(name, user):
+    if name == "login":
+        return {"username": user.username, "password": BENCH_PASSWORD}
+    if name == "review_create":
+        return {"payload": "Benchmark review", "rating": 5}
+    return None
+
+
+def run(suites, iterations=200, warmup=20, concurrency=1, scenarios=None, log=None):
+    """Run the scenarios against each suite and return the results document"""
+    from users.authentication import make_token
+
+    log = log or (lambda message: None)
+    fixtures = pick_fixtures()
+    user = fixtures["user"]
+    results = {}
+    with override_settings(
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver", "127.0.0.1"]
+    ):
+        for suite in suites:
+            with SUITES[suite](make_token(user)).running() as client:
+                for name, method, path, authenticated in SCENARIOS:
+                    if scenarios and name not in scenarios:
+                        continue
+                    path = path.format(room=fixtures["room"])
+                    body = request_body(name, user)
+                    # The in-process client shares this thread's connection.
+                    workers = concurrency if suite == ServerClient.name else 1
+                    for n in range(warmup):
+                        client.request(method, path, body, authenticated)
+                    key = f"{suite}:{name}"
+                    results[key] = run_scenario(
+                        client, method, path, body, authenticated, iterations, workers
+                    )
+                    log(f"{key}: {results[key]}")
+    return {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connections["default"].vendor,
+            "database_profile": settings.DATABASE_PROFILE,
+            "iterations": iterations,
+            "warmup": warmup,
+            "concurrency": concurrency,
+            "room": fixtures["room"],
+            "user": user.username,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=10.0):
+    """Return (key, metric, before, after, change %) for each regression.
+
+    Latency percentiles regress when they grow by more than `threshold`
+    percent; query counts regress on any increase.
+    """
+    regressions = []
+    for key, metric, old, new, change in changes(baseline, current, REGRESSION_METRICS):
+        allowed = REGRESSION_METRICS[metric]
+        if change > (threshold if allowed is None else allowed):
+            regressions.append((key, metric, old, new, change))
+    return regressions
+
+
+def changes(baseline, current, metrics=REPORT_METRICS):
+    """(key, metric, before, after, change %) for results in both documents"""
+    for key, after in current["results"].items():
+        before = baseline["results"].get(key)
+        if before is None:
+            continue
+        for metric in metrics:
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else (100.0 if new else 0.0)
+            yield key, metric, old, new, round(change, 1)
+
+
+def serializer_cases(rows, user):
+    """(name, ModelSerializer, its queryset, ValuesSerializer, its queryset)"""
+    from reviews.models import Review
+    from reviews.serializers import ReviewSerializer, ReviewValuesSerializer
+    from rooms.models import Amenity, Room
+    from rooms.serializers import (
+        AmenitySerializer,
+        AmenityValuesSerializer,
+        RoomListSerializer,
+        RoomListValuesSerializer,
+    )
+    from wishlists.models import Wishlist
+    from wishlists.serializers import WishlistSerializer, WishlistValuesSerializer
+    from wishlists.views import with_rooms
+
+    rooms = Room.objects.order_by("pk")[:rows]
+    reviews = Review.objects.order_by("pk")[:rows]
+    amenities = Amenity.objects.order_by("pk")[:rows]
+    wishlists = Wishlist.objects.filter(user=user)
+    return [
+        (
+            "rooms",
+            RoomListSerializer,
+            Room.objects.with_rating().prefetch_related("photos").order_by("pk")[:rows],
+            RoomListValuesSerializer,
+            rooms,
+        ),
+        (
+            "reviews",
+            ReviewSerializer,
+            reviews.select_related("user"),
+            ReviewValuesSerializer,
+            reviews,
+        ),
+        ("amenities", AmenitySerializer, amenities, AmenityValuesSerializer, amenities),
+        (
+            "wishlists",
+            WishlistSerializer,
+            with_rooms(wishlists),
+            WishlistValuesSerializer,
+            wishlists,
+        ),
+    ]
+
+
+def cpu_ms(function, repeat):
+    """Best CPU time of `repeat` calls, in milliseconds"""
+    best = None
+    for n in range(repeat):
+        start = time.process_time()
+        function()
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best * 1000, 3)
+
+
+def compare_serializers(rows=1000, repeat=5, log=None):
+    """CPU time of each ModelSerializer against its ValuesSerializer.
+
+    Both serialize the same page of `rows` rows, queries included, and
+    their rendered JSON must be identical.
+    """
+    from django.test import RequestFactory
+    from rest_framework.renderers import JSONRenderer
+
+    log = log or (lambda message: None)
+    request = RequestFactory().get("/")
+    request.user = pick_fixtures()["user"]
+    context = {"request": request}
+    renderer = JSONRenderer()
+    results = {}
+    for name, model_serializer, models, values_serializer, values in serializer_cases(
+        rows, request.user
+    ):
+
+        def drf():
+            # .all() so every run queries instead of reusing the result cache
+            return model_serializer(models.all(), many=True, context=context).data
+
+        def compiled():
+            return values_serializer(values, context).data
+
+        drf_ms, values_ms = cpu_ms(drf, repeat), cpu_ms(compiled, repeat)
+        results[name] = {
+            "rows": len(compiled()),
+            "drf_ms": drf_ms,
+            "values_ms": values_ms,
+            "speedup": round(drf_ms / values_ms, 2) if values_ms else None,
+            "identical": renderer.render(drf()) == renderer.render(compiled()),
+        }
+        log(f"{name}: {results[name]}")
+    return results
+
+
+def compare_renderers(rows=1000, repeat=5, log=None):
+    """CPU time of DRF's JSONRenderer against the faster renderers.
+
+    The payloads are the serialized pages from serializer_cases. JSON
+    output must be identical; MessagePack is only timed when installed.
+    """
+    from django.test import RequestFactory
+    from rest_framework.renderers import JSONRenderer
+
+    from common.renderers import FastJSONRenderer, MessagePackRenderer, orjson
+
+    log = log or (lambda message: None)
+    request = RequestFactory().get("/")
+    request.user = pick_fixtures()["user"]
+    renderers = {"json": JSONRenderer(), "fast_json": FastJSONRenderer()}
+    if settings.MSGPACK_ENABLED:
+        renderers["msgpack"] = MessagePackRenderer()
+    results = {}
+    for name, _, _, values_serializer, values in serializer_cases(rows, request.user):
+        data = values_serializer(values, {"request": request}).data
+        result = {"rows": len(data), "orjson": orjson is not None}
+        rendered = {}
+        for key, renderer in renderers.items():
+            result[f"{key}_ms"] = cpu_ms(lambda: renderer.render(data), repeat)
+            rendered[key] = renderer.render(data)
+            result[f"{key}_bytes"] = len(rendered[key])
+        fast_ms = result["fast_json_ms"]
+        result["speedup"] = round(result["json_ms"] / fast_ms, 2) if fast_ms else None
+        result["identical"] = rendered["json"] == rendered["fast_json"]
+        results[name] = result
+        log(f"{name}: {result}")
+    return results
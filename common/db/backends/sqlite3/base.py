@@ -0,0 +1,60 @@
+"""SQLite backend for concurrent writers
+
+Django opens transactions with a plain (deferred) BEGIN, so a transaction
+that reads before it writes has to upgrade its lock mid-way. SQLite fails
+that upgrade with "database is locked" at once instead of waiting on
+busy_timeout, because waiting could deadlock. Starting write transactions
+with BEGIN IMMEDIATE takes the write lock up front, where busy_timeout
+applies, and the begin is retried with backoff when even that times out.
+
+OPTIONS:
+
+- transaction_mode: "IMMEDIATE" (default), "DEFERRED" or "EXCLUSIVE"
+- begin_retries: extra attempts at BEGIN when the database is busy
+"""
+
+import logging
+import random
+import time
+
+from django.db import OperationalError
+from django.db.backends.sqlite3 import base
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_MODES = ("DEFERRED", "IMMEDIATE", "EXCLUSIVE")
+
+
+def is_busy(error):
+    message = str(error)
+    return "database is locked" in message or "database is busy" in message
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def __init__(self, settings_dict, alias="default"):
+        super().__init__(settings_dict, alias)
+        options = self.settings_dict["OPTIONS"]
+        self.transaction_mode = options.get("transaction_mode", "IMMEDIATE").upper()
+        if self.transaction_mode not in TRANSACTION_MODES:
+            raise ValueError(f"Unknown SQLite transaction_mode {self.transaction_mode}")
+        self.begin_retries = options.get("begin_retries", 5)
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        params.pop("transaction_mode", None)
+        params.pop("begin_retries", None)
+        return params
+
+    def _start_transaction_under_autocommit(self):
+        for attempt in range(self.begin_retries + 1):
+            try:
+                self.cursor().execute(f"BEGIN {self.transaction_mode}")
+                return
+            except OperationalError as error:
+                if not is_busy(error) or attempt == self.begin_retries:
+                    raise
+                delay = min(0.05 * 2**attempt, 1.0) * random.uniform(0.5, 1.5)
+                logger.debug(
+                    "%s is busy, retrying BEGIN in %.0f ms", self.alias, delay * 1000
+                )
+                time.sleep(delay)
@@ -0,0 +1,15 @@
+from django.conf import settings
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """connection_created receiver that applies SQLITE_PRAGMAS.
+
+    Replicas are left alone: sync_replicas overwrites them page by page
+    from the primary.
+    """
+    if connection.vendor != "sqlite" or connection.alias in settings.REPLICA_DATABASES:
+        return
+    # On the driver connection, so the pragmas skip the execute wrappers
+    # and do not show up in query counts.
+    for name, value in settings.SQLITE_PRAGMAS.items():
+        connection.connection.execute(f"PRAGMA {name} = {value}")
@@ -0,0 +1,27 @@
+"""drf_yasg's swagger_auto_schema and openapi, when the docs are served
+
+View modules import both from here. With DOCS_ENABLED they are drf_yasg's
+own; on api-only workers the decorator leaves views untouched and openapi
+objects are inert placeholders, so drf_yasg is never imported.
+"""
+
+from django.conf import settings
+
+if settings.DOCS_ENABLED:
+    from drf_yasg import openapi
+    from drf_yasg.utils import swagger_auto_schema
+else:
+
+    class _Inert:
+        """Stands in for any openapi constant, class or instance"""
+
+        def __getattr__(self, name):
+            return self
+
+        def __call__(self, *args, **kwargs):
+            return self
+
+    openapi = _Inert()
+
+    def swagger_auto_schema(*args, **kwargs):
+        return lambda view: view
@@ -0,0 +1,50 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.benchmarks import SCENARIOS, SUITES, run
+
+
+class Command(BaseCommand):
+    help = "Benchmark the main API routes and write the results as JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--suite",
+            action="append",
+            choices=SUITES,
+            help="Where to send requests; repeat for several (default: all)",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            choices=[name for name, *_ in SCENARIOS],
+            help="Only run these scenarios (default: all)",
+        )
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=20)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Concurrent requests against the server suite",
+        )
+        parser.add_argument("--output", default="benchmark.json")
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1:
+            raise CommandError("--iterations must be at least 1")
+        try:
+            document = run(
+                options["suite"] or list(SUITES),
+                iterations=options["iterations"],
+                warmup=options["warmup"],
+                concurrency=options["concurrency"],
+                scenarios=options["scenario"],
+                log=self.stdout.write,
+            )
+        except (LookupError, RuntimeError) as error:
+            raise CommandError(error)
+        with open(options["output"], "w") as output:
+            json.dump(document, output, indent=2)
+        self.stdout.write(f"Wrote {options['output']}")
@@ -0,0 +1,39 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.benchmarks import changes, compare
+
+
+class Command(BaseCommand):
+    help = "Compare benchmark results against a baseline and fail on regressions"
+
+    def add_arguments(self, parser):
+        parser.add_argument("baseline")
+        parser.add_argument("current")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=10.0,
+            help="Percent a latency percentile may grow before it is flagged",
+        )
+        parser.add_argument(
+            "--report",
+            action="store_true",
+            help="Also print latency, throughput and errors side by side",
+        )
+
+    def handle(self, *args, **options):
+        documents = []
+        for path in (options["baseline"], options["current"]):
+            with open(path) as results:
+                documents.append(json.load(results))
+        if options["report"]:
+            for key, metric, before, after, change in changes(*documents):
+                self.stdout.write(f"{key} {metric}: {before} -> {after} ({change:+}%)")
+        regressions = compare(*documents, threshold=options["threshold"])
+        for key, metric, before, after, change in regressions:
+            self.stdout.write(f"{key} {metric}: {before} -> {after} (+{change}%)")
+        if regressions:
+            raise CommandError(f"{len(regressions)} regressions")
+        self.stdout.write("No regressions")
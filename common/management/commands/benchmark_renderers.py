@@ -0,0 +1,31 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.benchmarks import compare_renderers
+
+
+class Command(BaseCommand):
+    help = "Compare rendering CPU time of DRF's JSONRenderer and the fast renderers"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", help="Also write the results as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            results = compare_renderers(options["rows"], options["repeat"])
+        except LookupError as error:
+            raise CommandError(error)
+        for name, result in results.items():
+            timings = " ".join(
+                f"{key}={value}" for key, value in result.items() if key != "rows"
+            )
+            self.stdout.write(f"{name:<10} rows={result['rows']} {timings}")
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+        if not all(result["identical"] for result in results.values()):
+            raise CommandError("FastJSONRenderer does not match JSONRenderer")
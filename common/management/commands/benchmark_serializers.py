@@ -0,0 +1,32 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.benchmarks import compare_serializers
+
+
+class Command(BaseCommand):
+    help = "Compare list serialization CPU time of ModelSerializers and the values path"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument("--output", help="Also write the results as JSON")
+
+    def handle(self, *args, **options):
+        try:
+            results = compare_serializers(options["rows"], options["repeat"])
+        except LookupError as error:
+            raise CommandError(error)
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<10} rows={result['rows']} drf={result['drf_ms']}ms "
+                f"values={result['values_ms']}ms speedup={result['speedup']}x "
+                f"identical={result['identical']}"
+            )
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+        if not all(result["identical"] for result in results.values()):
+            raise CommandError("The values path does not match the ModelSerializers")
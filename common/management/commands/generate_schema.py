@@ -0,0 +1,23 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from common.schema import CONTENT_TYPES, generate, schema_path
+
+
+class Command(BaseCommand):
+    help = "Write the OpenAPI schema to OPENAPI_SCHEMA_DIR for the server to serve"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-dir",
+            help="Write the schema files here instead of OPENAPI_SCHEMA_DIR",
+        )
+
+    def handle(self, *args, **options):
+        for format in CONTENT_TYPES:
+            path = schema_path(format, options["output_dir"])
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as output:
+                output.write(generate(format))
+            self.stdout.write(f"Wrote {path}")
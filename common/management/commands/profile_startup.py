@@ -0,0 +1,56 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from common.startup import measure
+
+ROLES = ("all", "api")
+
+
+class Command(BaseCommand):
+    help = "Measure worker boot time, memory and import cost per package"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--role",
+            action="append",
+            choices=ROLES,
+            help="DEPLOYMENT_ROLE to boot with; repeat to compare (default: all)",
+        )
+        parser.add_argument(
+            "--path",
+            default="/api/v1/categories/",
+            help="First request served after boot",
+        )
+        parser.add_argument("--top", type=int, default=15)
+        parser.add_argument("--output", help="Also write the results as JSON")
+
+    def handle(self, *args, **options):
+        results = []
+        for role in options["role"] or ["all"]:
+            try:
+                result = measure(role, options["path"], options["top"])
+            except RuntimeError as error:
+                raise CommandError(f"Worker failed to start: {error}")
+            results.append(result)
+            self.report(result)
+        if options["output"]:
+            with open(options["output"], "w") as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(f"Wrote {options['output']}")
+
+    def report(self, result):
+        self.stdout.write(
+            f"role={result['role']} ready={result['ready_ms']}ms "
+            f"first_request={result['first_request_ms']}ms "
+            f"({result['status']}) imports={result['import_ms']}ms "
+            f"modules={result['modules']} "
+            f"rss={result.get('rss_kb')}KB peak_rss={result.get('peak_rss_kb')}KB "
+            f"allocated={result['allocated_kb']}KB"
+        )
+        self.stdout.write("  import ms by package:")
+        for name, ms in result["import_ms_by_package"].items():
+            self.stdout.write(f"    {name:<24} {ms:>8}")
+        self.stdout.write("  allocated KB by package:")
+        for name, kb in result["allocated_kb_by_package"].items():
+            self.stdout.write(f"    {name:<24} {kb:>8}")
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from common.profiling import make_profile_token
+
+
+class Command(BaseCommand):
+    help = "Print an X-Profile-Token header value for profiling requests"
+
+    def handle(self, *args, **options):
+        self.stdout.write(make_profile_token())
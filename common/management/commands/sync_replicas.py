@@ -0,0 +1,92 @@
+import sqlite3
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+class Command(BaseCommand):
+    help = "Copy the primary SQLite database onto each replica file"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=0,
+            help="Keep copying every N seconds instead of running once",
+        )
+        parser.add_argument(
+            "--pages",
+            type=int,
+            default=1024,
+            help="Pages copied per step; the primary takes writes between steps",
+        )
+        parser.add_argument(
+            "--max-restarts",
+            type=int,
+            default=3,
+            help="Restarts allowed before the copy is redone in a single step",
+        )
+
+    def handle(self, *args, **options):
+        # The production profile uses its own SQLite backend, so go by vendor.
+        if connections["default"].vendor != "sqlite":
+            raise CommandError("sync_replicas only copies SQLite databases")
+        if not settings.REPLICA_DATABASES:
+            raise CommandError("No replicas configured; set DATABASE_REPLICAS")
+        while True:
+            started = time.monotonic()
+            for alias in settings.REPLICA_DATABASES:
+                self.copy(
+                    settings.DATABASES[alias]["NAME"],
+                    options["pages"],
+                    options["max_restarts"],
+                )
+            self.stdout.write(
+                f"Synced {len(settings.REPLICA_DATABASES)} replicas in "
+                f"{time.monotonic() - started:.2f}s"
+            )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def copy(self, name, pages, max_restarts):
+        # The backup API takes a consistent snapshot of the primary and
+        # writes it under the replica's own lock, so open readers never see
+        # a half-copied file. A write to the primary between two steps
+        # makes SQLite start the copy over; on a busy primary that could go
+        # on forever, so after max_restarts the copy is done in one step,
+        # which holds a read transaction on the primary until it finishes.
+        source = sqlite3.connect(settings.DATABASES["default"]["NAME"])
+        target = sqlite3.connect(name)
+        try:
+            try:
+                source.backup(target, pages=pages, progress=RestartLimit(max_restarts))
+            except BackupRestarted:
+                self.stderr.write(f"{name}: primary kept changing, copying in one step")
+                source.backup(target)
+        finally:
+            target.close()
+            source.close()
+
+
+class BackupRestarted(Exception):
+    pass
+
+
+class RestartLimit:
+    """Backup progress callback that gives up after too many restarts"""
+
+    def __init__(self, max_restarts):
+        self.max_restarts = max_restarts
+        self.restarts = 0
+        self.remaining = None
+
+    def __call__(self, status, remaining, total):
+        # A restart starts over from the first page, so more is left to copy.
+        if self.remaining is not None and remaining > self.remaining:
+            self.restarts += 1
+            if self.restarts > self.max_restarts:
+                raise BackupRestarted
+        self.remaining = remaining
@@ -0,0 +1,70 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Receive OTLP/JSON traces on /v1/traces and append them to a file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=4318)
+        parser.add_argument("--output", default="traces.jsonl")
+
+    def handle(self, *args, **options):
+        command = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                if self.path != "/v1/traces":
+                    self.send_error(404)
+                    return
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                try:
+                    document = json.loads(body)
+                except ValueError:
+                    self.send_error(400)
+                    return
+                with open(options["output"], "a") as output:
+                    output.write(json.dumps(document, separators=(",", ":")) + "\n")
+                command.summarize(document)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((options["host"], options["port"]), Handler)
+        self.stdout.write(
+            f"Collecting traces on http://{options['host']}:{options['port']}"
+            f"/v1/traces into {options['output']}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+    def summarize(self, document):
+        """Print each span indented under its parent with its duration"""
+        for resource in document.get("resourceSpans", []):
+            for scope in resource.get("scopeSpans", []):
+                spans = scope.get("spans", [])
+                ids = {span["spanId"] for span in spans}
+                children = {}
+                for span in spans:
+                    parent = span.get("parentSpanId")
+                    children.setdefault(parent if parent in ids else None, []).append(
+                        span
+                    )
+                self.print_tree(children, None, 0)
+
+    def print_tree(self, children, parent, depth):
+        for span in children.get(parent, []):
+            ms = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+            self.stdout.write(f"{'  ' * depth}{span['name']} {ms:.2f}ms")
+            self.print_tree(children, span["spanId"], depth + 1)
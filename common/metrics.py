@@ -0,0 +1,144 @@
+import threading
+import time
+from bisect import bisect_left
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+# Anything else is labelled "other", so clients cannot mint new series
+HTTP_METHODS = frozenset(
+    ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT")
+)
+
+
+class QueryCounter:
+    """connection.execute_wrapper that counts and times queries"""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+class Histogram:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+        cumulative += self.counts[-1]
+        yield f'{name}_bucket{{{labels},le="+Inf"}} {cumulative}'
+        yield f"{name}_sum{{{labels}}} {self.sum}"
+        yield f"{name}_count{{{labels}}} {cumulative}"
+
+
+class EndpointStats:
+    __slots__ = ("latency", "queries", "db_seconds", "response_bytes")
+
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_BUCKETS)
+        self.db_seconds = 0.0
+        self.response_bytes = 0
+
+    def copy(self):
+        copy = EndpointStats()
+        copy.latency.counts = list(self.latency.counts)
+        copy.latency.sum = self.latency.sum
+        copy.queries.counts = list(self.queries.counts)
+        copy.queries.sum = self.queries.sum
+        copy.db_seconds = self.db_seconds
+        copy.response_bytes = self.response_bytes
+        return copy
+
+
+class Registry:
+    """Per-process request metrics keyed by (route, method)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+
+    def observe(self, route, method, latency, queries, db_seconds, response_bytes):
+        with self.lock:
+            stats = self.stats(route, method)
+            stats.latency.observe(latency)
+            stats.queries.observe(queries)
+            stats.db_seconds += db_seconds
+            stats.response_bytes += response_bytes
+
+    def add_response_bytes(self, route, method, response_bytes):
+        """Count a streamed body once it has been sent"""
+        with self.lock:
+            self.stats(route, method).response_bytes += response_bytes
+
+    def stats(self, route, method):
+        key = (route, method if method in HTTP_METHODS else "other")
+        stats = self.endpoints.get(key)
+        if stats is None:
+            stats = self.endpoints[key] = EndpointStats()
+        return stats
+
+    def render(self):
+        """Prometheus text exposition format"""
+        with self.lock:
+            snapshot = [
+                (_labels(*key), stats.copy())
+                for key, stats in sorted(self.endpoints.items())
+            ]
+        lines = [
+            "# HELP http_request_duration_seconds Request latency.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for labels, stats in snapshot:
+            lines.extend(stats.latency.lines("http_request_duration_seconds", labels))
+        lines += [
+            "# HELP http_request_db_queries Database queries per request.",
+            "# TYPE http_request_db_queries histogram",
+        ]
+        for labels, stats in snapshot:
+            lines.extend(stats.queries.lines("http_request_db_queries", labels))
+        lines += [
+            "# HELP http_request_db_seconds_total Time spent in database queries.",
+            "# TYPE http_request_db_seconds_total counter",
+        ]
+        for labels, stats in snapshot:
+            lines.append(
+                f"http_request_db_seconds_total{{{labels}}} {stats.db_seconds}"
+            )
+        lines += [
+            "# HELP http_response_bytes_total Response body bytes sent.",
+            "# TYPE http_response_bytes_total counter",
+        ]
+        for labels, stats in snapshot:
+            lines.append(
+                f"http_response_bytes_total{{{labels}}} {stats.response_bytes}"
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _labels(route, method):
+    route = route.replace("\\", "\\\\").replace('"', '\\"')
+    return f'route="{route}",method="{method}"'
+
+
+registry = Registry()
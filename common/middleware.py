@@ -0,0 +1,194 @@
+import hashlib
+import time
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from common.metrics import QueryCounter, registry
+from common.profiling import MODES, check_profile_token, profile_request
+from common.routers import replica_reads
+from common.tracing import end_trace, start_trace
+from common.sessions import flush_last_logins
+
+SESSION_REFRESHED_KEY = "_refreshed_at"
+
+PRIMARY_PIN_COOKIE = "pin_primary"
+
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class SessionRefreshMiddleware(SessionMiddleware):
+    """Rolls the session expiry forward at most once per refresh interval.
+
+    Between refreshes an unchanged session is neither saved nor re-sent, so
+    authenticated reads cost a cache hit instead of a sessions table write.
+    """
+
+    def process_response(self, request, response):
+        session = getattr(request, "session", None)
+        if session is not None and session.accessed and not session.is_empty():
+            now = int(time.time())
+            refreshed_at = session.get(SESSION_REFRESHED_KEY, 0)
+            if now - refreshed_at >= settings.SESSION_REFRESH_INTERVAL:
+                session[SESSION_REFRESHED_KEY] = now
+        flush_last_logins()
+        return super().process_response(request, response)
+
+
+class MetricsMiddleware:
+    """Records latency, query count, DB time and response size per route"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.aliases = list(settings.DATABASES)
+
+    def __call__(self, request):
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in self.aliases:
+                stack.enter_context(connections[alias].execute_wrapper(counter))
+            response = self.get_response(request)
+        latency = time.perf_counter() - start
+        match = request.resolver_match
+        route = match.route if match else "unmatched"
+        if not response.streaming:
+            size = len(response.content)
+        elif getattr(response, "file_to_stream", None) is not None:
+            # Wrapping a FileResponse would turn off wsgi.file_wrapper, so
+            # take its size from the headers instead.
+            size = int(response.get("Content-Length", 0))
+        else:
+            # The body is produced while it is sent; count it as it goes.
+            size = 0
+            response.streaming_content = self.counted(
+                response.streaming_content, route, request.method
+            )
+        registry.observe(
+            route,
+            request.method,
+            latency,
+            counter.count,
+            counter.seconds,
+            size,
+        )
+        return response
+
+    @staticmethod
+    def counted(chunks, route, method):
+        sent = 0
+        try:
+            for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            registry.add_response_bytes(route, method, sent)
+
+
+class ProfilerMiddleware:
+    """Profiles requests that ask for it with ?profile=<mode> or X-Profile.
+
+    Only staff sessions and requests carrying a valid X-Profile-Token may
+    turn it on. With PROFILER_ENABLED off the middleware is not installed.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = request.headers.get("X-Profile") or request.GET.get("profile")
+        if mode not in MODES or not self.allowed(request):
+            return self.get_response(request)
+        return profile_request(self.get_response, request, mode)
+
+    def allowed(self, request):
+        token = request.headers.get("X-Profile-Token")
+        if token:
+            return check_profile_token(token)
+        return request.user.is_staff
+
+
+class TracingMiddleware:
+    """Opens the root span for sampled requests when TRACING_ENABLED is on"""
+
+    def __init__(self, get_response):
+        if not settings.TRACING_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        root = start_trace(request.method, request.headers.get("traceparent"))
+        if root is None:
+            return self.get_response(request)
+        root.attributes.update(
+            {"http.method": request.method, "http.target": request.get_full_path()}
+        )
+        try:
+            response = self.get_response(request)
+        except BaseException as error:
+            root.error = repr(error)
+            raise
+        finally:
+            match = request.resolver_match
+            if match:
+                root.name = f"{request.method} {match.route}"
+                root.attributes["http.route"] = match.route
+            end_trace(root)
+        root.attributes["http.status_code"] = response.status_code
+        response["X-Trace-Id"] = root.trace.trace_id
+        return response
+
+
+class ReplicaMiddleware:
+    """Reads from replicas unless the client wrote in the last few seconds.
+
+    A successful unsafe request pins the client to the primary for
+    REPLICA_PIN_SECONDS: browsers through a cookie, token clients through a
+    cache entry keyed by their Authorization header. That way a new booking
+    or wishlist change is visible on the very next read.
+    """
+
+    def __init__(self, get_response):
+        if not settings.REPLICA_DATABASES:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS and not self.pinned(request):
+            with replica_reads():
+                return self.get_response(request)
+        response = self.get_response(request)
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            self.pin(request, response)
+        return response
+
+    def pin_key(self, request):
+        authorization = request.headers.get("Authorization")
+        if authorization:
+            digest = hashlib.sha256(authorization.encode()).hexdigest()
+            return f"replicas:pin:{digest}"
+        return None
+
+    def pinned(self, request):
+        if PRIMARY_PIN_COOKIE in request.COOKIES:
+            return True
+        key = self.pin_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def pin(self, request, response):
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE,
+            "1",
+            max_age=settings.REPLICA_PIN_SECONDS,
+            httponly=True,
+            samesite="Lax",
+        )
+        key = self.pin_key(request)
+        if key is not None:
+            cache.set(key, 1, settings.REPLICA_PIN_SECONDS)
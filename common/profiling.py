@@ -0,0 +1,187 @@
+"""On-demand request profiling
+
+A profiled request writes two artifacts to PROFILER_DIR, named by a
+random id returned in the X-Profile-Id header:
+
+- <id>.json: timing, per-query timings and the top tracemalloc deltas
+- <id>.pstats (cProfile) or <id>.folded (sampling, collapsed stacks that
+  flamegraph.pl or speedscope can read)
+"""
+
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+PROFILE_SALT = "common.profiling"
+
+MODES = ("cprofile", "sample")
+
+ARTIFACT_NAME = re.compile(r"^[0-9a-f]{32}\.(json|pstats|folded)$")
+
+# tracemalloc is process-wide, so concurrent profiled requests share it: the
+# first one in starts it and the last one out stops it.
+_tracing_lock = threading.Lock()
+_tracing_requests = 0
+_started_tracing = False
+
+
+def make_profile_token():
+    """A header value that turns on profiling without a staff session"""
+    return signing.dumps("profile", salt=PROFILE_SALT)
+
+
+def check_profile_token(token):
+    try:
+        signing.loads(token, salt=PROFILE_SALT, max_age=settings.PROFILER_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return False
+    return True
+
+
+def artifact_path(name):
+    """Path of an artifact in PROFILER_DIR, or None for any other name"""
+    if not ARTIFACT_NAME.match(name):
+        return None
+    return os.path.join(settings.PROFILER_DIR, name)
+
+
+def start_tracing():
+    """Start tracemalloc for a profiled request unless it is already on"""
+    global _tracing_requests, _started_tracing
+    with _tracing_lock:
+        if _tracing_requests == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_requests += 1
+
+
+def stop_tracing():
+    """Stop tracemalloc if this module started it and no request still needs it"""
+    global _tracing_requests, _started_tracing
+    with _tracing_lock:
+        _tracing_requests -= 1
+        if _tracing_requests == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+class QueryTimer:
+    """execute_wrapper that keeps the SQL and duration of every query"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries.append(
+                {"sql": sql, "ms": round((time.perf_counter() - start) * 1000, 3)}
+            )
+
+
+class Sampler(threading.Thread):
+    """Samples another thread's stack every `interval` seconds"""
+
+    def __init__(self, thread_id, interval):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(
+                    f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})"
+                )
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+
+
+def profile_request(get_response, request, mode):
+    """Run get_response(request) under the profiler and write its artifacts"""
+    profile_id = uuid.uuid4().hex
+    os.makedirs(settings.PROFILER_DIR, exist_ok=True)
+    timer = QueryTimer()
+    start_tracing()
+    before = tracemalloc.take_snapshot()
+    if mode == "sample":
+        profiler = Sampler(threading.get_ident(), settings.PROFILER_SAMPLE_INTERVAL)
+        profiler.start()
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    start = time.perf_counter()
+    try:
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timer))
+            response = get_response(request)
+    finally:
+        duration = time.perf_counter() - start
+        if mode == "sample":
+            profiler.stop()
+        else:
+            profiler.disable()
+        after = tracemalloc.take_snapshot()
+        stop_tracing()
+
+    if mode == "sample":
+        profile_name = f"{profile_id}.folded"
+        with open(artifact_path(profile_name), "w") as output:
+            output.write(profiler.collapsed())
+    else:
+        profile_name = f"{profile_id}.pstats"
+        profiler.dump_stats(artifact_path(profile_name))
+    allocations = [
+        {
+            "location": str(diff.traceback[0]),
+            "size_diff": diff.size_diff,
+            "count_diff": diff.count_diff,
+        }
+        for diff in after.compare_to(before, "lineno")[
+            : settings.PROFILER_TOP_ALLOCATIONS
+        ]
+    ]
+    summary = {
+        "id": profile_id,
+        "method": request.method,
+        "path": request.get_full_path(),
+        "status": response.status_code,
+        "mode": mode,
+        "ms": round(duration * 1000, 3),
+        "db_ms": round(sum(query["ms"] for query in timer.queries), 3),
+        "profile": profile_name,
+        "queries": timer.queries,
+        "allocations": allocations,
+    }
+    with open(artifact_path(f"{profile_id}.json"), "w") as output:
+        json.dump(summary, output, indent=2)
+    response["X-Profile-Id"] = profile_id
+    return response
@@ -0,0 +1,63 @@
+"""Faster response renderers
+
+FastJSONRenderer encodes with orjson when it is installed and falls back to
+DRF's JSONRenderer otherwise, or whenever orjson cannot encode the data.
+Both produce the same bytes: compact, UTF-8, with \\u2028 and \\u2029
+escaped. Types orjson does not know (Decimal, lazy translations, dates and
+times, which orjson would format differently) go through DRF's
+JSONEncoder.default. The differences are the spelling of floats with an
+exponent (1e-05 against 1e-5), which parse to the same number, and NaN,
+which orjson writes as null where strict json refuses it.
+
+MessagePackRenderer answers Accept: application/msgpack; it is only
+listed in DEFAULT_RENDERER_CLASSES when msgpack is installed.
+"""
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+encode_default = JSONEncoder().default
+
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b""
+        try:
+            rendered = orjson.dumps(
+                data,
+                default=encode_default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # Integers over 64 bits and the like; json raises what it must.
+            return super().render(data, accepted_media_type, renderer_context)
+        return rendered.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        import msgpack
+
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=encode_default)
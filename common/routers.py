@@ -0,0 +1,92 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+from common.sharding import is_sharded, parent_key, shard_for, shard_key
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def replica_reads():
+    """Let the ReplicaRouter send reads in this context to a replica"""
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    """Sends reads of REPLICA_APPS models to a replica inside replica_reads().
+
+    ReplicaMiddleware only opens that context for safe requests from clients
+    that have not written recently; everything else, and every write, goes
+    to the primary. Replicas are copies of the primary kept up to date by
+    sync_replicas, so they are never migrated themselves.
+    """
+
+    def db_for_read(self, model, **hints):
+        if (
+            _replica_reads.get()
+            and settings.REPLICA_DATABASES
+            and model._meta.app_label in settings.REPLICA_APPS
+        ):
+            return random.choice(settings.REPLICA_DATABASES)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *settings.REPLICA_DATABASES}
+        if {obj1._state.db, obj2._state.db} <= databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.REPLICA_DATABASES:
+            return False
+        return None
+
+
+class ShardRouter:
+    """Routes SHARDED_MODELS rows to the shard that holds their key.
+
+    The key comes from the instance being saved or read, or from the parent
+    a related manager hangs off (room.bookings, chat.messages). Queries
+    without either hint fall through to the next router, so shard-aware
+    code goes through ShardedManager.for_key() or across_shards().
+    """
+
+    def route(self, model, hints):
+        if not is_sharded(model):
+            return None
+        instance = hints.get("instance")
+        if instance is None:
+            return None
+        if isinstance(instance, model):
+            key = shard_key(instance)
+            if key is None and instance._state.db in settings.SHARD_DATABASES:
+                return instance._state.db
+            return shard_for(key)
+        key = parent_key(model, instance)
+        return None if key is None else shard_for(key)
+
+    def db_for_write(self, model, **hints):
+        return self.route(model, hints)
+
+    def db_for_read(self, model, **hints):
+        return self.route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if is_sharded(type(obj1)) or is_sharded(type(obj2)):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in settings.SHARD_DATABASES:
+            return f"{app_label}.{model_name}" in settings.SHARDED_MODELS
+        return None
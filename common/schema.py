@@ -0,0 +1,88 @@
+"""OpenAPI schema served from memory
+
+The schema only changes with the code, so it is generated once per
+process: read from OPENAPI_SCHEMA_DIR when generate_schema wrote it at
+build time, otherwise built on the first request. drf_yasg is imported
+only when a schema or docs page is actually needed.
+"""
+
+import hashlib
+import os
+import threading
+from collections import namedtuple
+
+from django.conf import settings
+
+INFO = {
+    "title": "airbnb",
+    "default_version": "v1",
+    "description": "API description",
+}
+
+CONTENT_TYPES = {
+    "json": "application/json",
+    "yaml": "application/yaml",
+}
+
+Document = namedtuple("Document", ["body", "etag"])
+
+_documents = {}
+_lock = threading.Lock()
+
+
+def schema_path(format, directory=None):
+    return os.path.join(directory or settings.OPENAPI_SCHEMA_DIR, f"swagger.{format}")
+
+
+def generate(format):
+    """The public schema for every API route, encoded as `format`"""
+    from drf_yasg import openapi
+    from drf_yasg.codecs import OpenAPICodecJson, OpenAPICodecYaml
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    generator = OpenAPISchemaGenerator(openapi.Info(**INFO))
+    schema = generator.get_schema(request=None, public=True)
+    codec = OpenAPICodecYaml if format == "yaml" else OpenAPICodecJson
+    return codec(validators=[]).encode(schema)
+
+
+def get_document(format):
+    document = _documents.get(format)
+    if document is None:
+        with _lock:
+            document = _documents.get(format)
+            if document is None:
+                path = schema_path(format)
+                if os.path.exists(path):
+                    with open(path, "rb") as schema:
+                        body = schema.read()
+                else:
+                    body = generate(format)
+                document = Document(body, hashlib.sha256(body).hexdigest()[:32])
+                _documents[format] = document
+    return document
+
+
+def clear():
+    with _lock:
+        _documents.clear()
+
+
+def ui_view(renderer):
+    """Swagger UI or ReDoc page that imports drf_yasg on its first request.
+
+    The pages load the schema from SPEC_URL, i.e. the cached document.
+    """
+    view = None
+
+    def docs(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            from drf_yasg import openapi
+            from drf_yasg.views import get_schema_view
+
+            schema_view = get_schema_view(openapi.Info(**INFO), public=True)
+            view = schema_view.with_ui(renderer, cache_timeout=0)
+        return view(request, *args, **kwargs)
+
+    return docs
@@ -0,0 +1,556 @@
+"""Deterministic benchmark dataset generator
+
+Rows are built in Python with explicit primary keys and written in chunked
+transactions, so the same seed and anchor date always produce the same
+database. Popularity follows a Zipf distribution: a handful of hosts own
+many listings and a handful of rooms collect most reviews, bookings and
+wishlist entries. Check-in dates are weighted by month and weekday.
+"""
+
+import itertools
+import random
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta
+from operator import attrgetter
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from bookings.models import Booking
+from common.sharding import model_databases, rebalance
+from categories.models import Category
+from direct_messages.models import ChattingRoom, Message
+from experiences.models import Experience, Perk
+from medias.models import Photo, Video
+from reviews.models import Review
+from rooms.models import Amenity, Room
+from users.models import User
+from wishlists.models import Wishlist
+
+# Every generated user can log in with this password.
+BENCH_PASSWORD = "bench-password"
+
+BENCH_ADMIN = "bench-admin"
+
+PROFILES = {
+    "small": {
+        "users": 1_000,
+        "rooms": 2_000,
+        "experiences": 200,
+        "reviews": 20_000,
+        "bookings": 10_000,
+    },
+    "medium": {
+        "users": 10_000,
+        "rooms": 100_000,
+        "experiences": 10_000,
+        "reviews": 1_000_000,
+        "bookings": 500_000,
+    },
+    "large": {
+        "users": 100_000,
+        "rooms": 1_000_000,
+        "experiences": 100_000,
+        "reviews": 10_000_000,
+        "bookings": 5_000_000,
+    },
+}
+
+ROOM_CATEGORIES = ["Beach", "Cabins", "Countryside", "Design", "Lakefront", "Tiny"]
+EXPERIENCE_CATEGORIES = ["Food", "Nature", "Art", "Sports", "Tours"]
+AMENITIES = [
+    "Wifi",
+    "Kitchen",
+    "Washer",
+    "Dryer",
+    "Air conditioning",
+    "Heating",
+    "Dedicated workspace",
+    "TV",
+    "Hair dryer",
+    "Iron",
+    "Pool",
+    "Hot tub",
+    "Free parking",
+    "EV charger",
+    "Crib",
+    "Gym",
+    "BBQ grill",
+    "Breakfast",
+    "Indoor fireplace",
+    "Smoking allowed",
+    "Beachfront",
+    "Waterfront",
+    "Ski-in/ski-out",
+    "Smoke alarm",
+    "Carbon monoxide alarm",
+]
+PERKS = ["Drinks", "Snacks", "Equipment", "Transportation", "Tickets", "Photos"]
+CITIES = [
+    ("한국", "서울"),
+    ("한국", "부산"),
+    ("한국", "제주"),
+    ("한국", "강릉"),
+    ("Japan", "Tokyo"),
+    ("Japan", "Osaka"),
+    ("USA", "New York"),
+    ("France", "Paris"),
+]
+WORDS = (
+    "clean cozy quiet bright spacious friendly helpful view location host "
+    "comfortable modern lovely stay again recommend station beach walk noisy"
+).split()
+RATING_WEIGHTS = [2, 3, 8, 27, 60]
+MONTH_WEIGHTS = [5, 4, 5, 6, 7, 9, 14, 16, 8, 7, 5, 12]
+PREPARED_TYPES = {"DateField", "DateTimeField", "TimeField", "JSONField"}
+
+
+def weighted(population, weight):
+    """Return (population, cum_weights) for random.choices"""
+    total = 0.0
+    cum_weights = []
+    for rank, value in enumerate(population, 1):
+        total += weight(rank, value)
+        cum_weights.append(total)
+    return population, cum_weights
+
+
+def zipf(population, s=1.0):
+    """Weight the n-th element by 1 / n**s"""
+    return weighted(population, lambda rank, value: 1 / rank**s)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(itertools.islice(iterator, size)):
+        yield chunk
+
+
+@contextmanager
+def relaxed_pragmas():
+    """Trade durability for load speed on SQLite, restoring it afterwards"""
+    # journal_mode cannot change inside a transaction, e.g. under TestCase.
+    if connection.vendor != "sqlite" or connection.in_atomic_block:
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA synchronous")
+        synchronous = cursor.fetchone()[0]
+        cursor.execute("PRAGMA journal_mode")
+        journal_mode = cursor.fetchone()[0]
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA journal_mode = MEMORY")
+        cursor.execute("PRAGMA temp_store = MEMORY")
+        cursor.execute("PRAGMA cache_size = -262144")
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA journal_mode = {journal_mode}")
+            cursor.execute(f"PRAGMA synchronous = {synchronous}")
+
+
+class Seeder:
+    """Generates a benchmark dataset; see PROFILES for the row counts"""
+
+    def __init__(self, seed=0, anchor=None, chunk_size=5_000, log=None, **counts):
+        self.random = random.Random(seed)
+        self.anchor = anchor or timezone.localdate()
+        self.chunk_size = chunk_size
+        self.log = log or (lambda message: None)
+        self.counts = counts
+        self.next_ids = {}
+
+    def run(self):
+        with relaxed_pragmas():
+            self.seed_lookups()
+            self.seed_users()
+            self.seed_rooms()
+            self.seed_experiences()
+            self.seed_reviews()
+            self.seed_bookings()
+            self.seed_wishlists()
+            self.seed_messages()
+        self.reset_sequences()
+        if settings.SHARD_DATABASES:
+            self.log(f"Moved {rebalance()} rows to their shards")
+
+    def ids(self, model, count):
+        """Reserve `count` primary keys after the current maximum"""
+        if model not in self.next_ids:
+            self.next_ids[model] = (
+                max(
+                    model._base_manager.using(alias).aggregate(Max("pk"))["pk__max"]
+                    or 0
+                    for alias in model_databases(model)
+                )
+                + 1
+            )
+        start = self.next_ids[model]
+        self.next_ids[model] = start + count
+        return range(start, start + count)
+
+    def insert(self, model, rows):
+        """Write model instances with executemany, a chunk per transaction.
+
+        This skips bulk_create's per-value SQL compilation, which dominates
+        the load time at these volumes. Only date and JSON values go through
+        the field's db_prep, auto_now fields share a single timestamp, and
+        auto-created through tables let the database number their rows.
+        """
+        quote = connection.ops.quote_name
+        fields = [
+            field
+            for field in model._meta.concrete_fields
+            if not (model._meta.auto_created and field.primary_key)
+        ]
+        now = timezone.now()
+        getters = []
+        for field in fields:
+            if getattr(field, "auto_now", False) or getattr(
+                field, "auto_now_add", False
+            ):
+                value = field.get_db_prep_save(now, connection)
+                getters.append(lambda obj, value=value: value)
+            elif field.get_internal_type() in PREPARED_TYPES:
+                getters.append(
+                    lambda obj, field=field: field.get_db_prep_save(
+                        getattr(obj, field.attname), connection
+                    )
+                )
+            else:
+                getters.append(attrgetter(field.attname))
+        sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            quote(model._meta.db_table),
+            ", ".join(quote(field.column) for field in fields),
+            ", ".join(["%s"] * len(fields)),
+        )
+        written = 0
+        for chunk in chunked(rows, self.chunk_size):
+            params = [[getter(obj) for getter in getters] for obj in chunk]
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+            written += len(chunk)
+        self.log(f"{model._meta.label}: {written}")
+        return written
+
+    def pick(self, weighted, k):
+        population, cum_weights = weighted
+        return self.random.choices(population, cum_weights=cum_weights, k=k)
+
+    def seed_lookups(self):
+        categories = [
+            Category(pk=pk, name=name, kind=kind)
+            for (name, kind), pk in zip(
+                [(n, Category.CategoryKindChoices.ROOMS) for n in ROOM_CATEGORIES]
+                + [
+                    (n, Category.CategoryKindChoices.EXPERIENCES)
+                    for n in EXPERIENCE_CATEGORIES
+                ],
+                self.ids(Category, len(ROOM_CATEGORIES) + len(EXPERIENCE_CATEGORIES)),
+            )
+        ]
+        self.insert(Category, categories)
+        self.room_categories = [c.pk for c in categories[: len(ROOM_CATEGORIES)]]
+        self.experience_categories = [c.pk for c in categories[len(ROOM_CATEGORIES) :]]
+        self.amenities = list(self.ids(Amenity, len(AMENITIES)))
+        self.insert(
+            Amenity,
+            (Amenity(pk=pk, name=name) for pk, name in zip(self.amenities, AMENITIES)),
+        )
+        self.perks = list(self.ids(Perk, len(PERKS)))
+        self.insert(
+            Perk,
+            (
+                Perk(pk=pk, name=name, explanation=f"{name} included")
+                for pk, name in zip(self.perks, PERKS)
+            ),
+        )
+
+    def seed_users(self):
+        count = self.counts["users"]
+        password = make_password(BENCH_PASSWORD)
+        user_ids = list(self.ids(User, count))
+        # One host per ten users; hosts and guests are ranked independently.
+        self.hosts = user_ids[: max(1, count // 10)]
+        self.host_ranking = zipf(self.shuffled(self.hosts))
+        self.user_ranking = zipf(self.shuffled(user_ids), s=0.8)
+        hosts = set(self.hosts)
+        # A second run appends to the dataset and keeps the existing admin.
+        with_admin = not User.objects.filter(username=BENCH_ADMIN).exists()
+
+        def rows():
+            for n, pk in enumerate(user_ids):
+                is_admin = with_admin and n == 0
+                yield User(
+                    pk=pk,
+                    username=BENCH_ADMIN if is_admin else f"bench{pk}",
+                    password=password,
+                    name=f"Bench User {pk}",
+                    is_host=pk in hosts,
+                    is_staff=is_admin,
+                    is_superuser=is_admin,
+                    gender=self.random.choice(User.GenderChoices.values),
+                    language=self.random.choice(User.LanguageChoices.values),
+                    currency=self.random.choice(User.CurrencyChoices.values),
+                )
+
+        self.insert(User, rows())
+
+    def shuffled(self, values):
+        values = list(values)
+        self.random.shuffle(values)
+        return values
+
+    def seed_rooms(self):
+        count = self.counts["rooms"]
+        room_ids = list(self.ids(Room, count))
+        self.room_ranking = zipf(self.shuffled(room_ids))
+        self.first_room = room_ids[0] if room_ids else None
+        self.room_owners = self.pick(self.host_ranking, count)
+        owners = iter(self.room_owners)
+
+        def rows():
+            for pk in room_ids:
+                country, city = self.random.choice(CITIES)
+                rooms = self.random.choices([1, 2, 3, 4, 5], [30, 35, 20, 10, 5])[0]
+                yield Room(
+                    pk=pk,
+                    name=f"{city} stay #{pk}",
+                    country=country,
+                    city=city,
+                    price=int(self.random.lognormvariate(11.5, 0.6)) // 1000 * 1000,
+                    rooms=rooms,
+                    toilets=max(1, rooms - self.random.randint(0, 2)),
+                    description=self.sentence(12),
+                    address=f"{pk} Bench-ro, {city}",
+                    pet_friendly=self.random.random() < 0.4,
+                    kind=self.random.choice(Room.RoomKindChoices.values),
+                    owner_id=next(owners),
+                    category_id=self.random.choice(self.room_categories),
+                )
+
+        self.insert(Room, rows())
+
+        def amenities():
+            for pk in room_ids:
+                for amenity_id in self.random.sample(
+                    self.amenities, self.random.randint(2, 10)
+                ):
+                    yield Room.amenities.through(room_id=pk, amenity_id=amenity_id)
+
+        self.insert(Room.amenities.through, amenities())
+
+        def photos():
+            photo_ids = iter(self.ids(Photo, count * 8))
+            for pk in room_ids:
+                for n in range(self.random.randint(1, 8)):
+                    photo_id = next(photo_ids)
+                    yield Photo(
+                        pk=photo_id,
+                        file=f"https://picsum.photos/seed/{photo_id}/1280/853",
+                        description=f"Photo {n + 1}",
+                        room_id=pk,
+                    )
+
+        self.insert(Photo, photos())
+
+    def seed_experiences(self):
+        count = self.counts["experiences"]
+        experience_ids = list(self.ids(Experience, count))
+        self.experience_ranking = zipf(self.shuffled(experience_ids)) if count else None
+        hosts = iter(self.pick(self.host_ranking, count))
+
+        def rows():
+            for pk in experience_ids:
+                country, city = self.random.choice(CITIES)
+                start = self.random.randint(8, 18)
+                yield Experience(
+                    pk=pk,
+                    country=country,
+                    city=city,
+                    name=f"{city} experience #{pk}",
+                    host_id=next(hosts),
+                    price=self.random.randint(10, 200) * 1000,
+                    address=f"{pk} Bench-gil, {city}",
+                    start=time(start),
+                    end=time(start + self.random.randint(1, 4)),
+                    description=self.sentence(12),
+                    category_id=self.random.choice(self.experience_categories),
+                )
+
+        self.insert(Experience, rows())
+
+        def perks():
+            for pk in experience_ids:
+                for perk_id in self.random.sample(
+                    self.perks, self.random.randint(0, 3)
+                ):
+                    yield Experience.perks.through(experience_id=pk, perk_id=perk_id)
+
+        self.insert(Experience.perks.through, perks())
+        videos = experience_ids[::4]
+        self.insert(
+            Video,
+            (
+                Video(
+                    pk=video_id,
+                    file=f"https://example.com/videos/{pk}.mp4",
+                    experience_id=pk,
+                )
+                for video_id, pk in zip(self.ids(Video, len(videos)), videos)
+            ),
+        )
+
+    def seed_reviews(self):
+        count = self.counts["reviews"]
+        experience_share = 0.1 if self.experience_ranking else 0
+
+        def rows():
+            for pks in chunked(self.ids(Review, count), self.chunk_size):
+                users = self.pick(self.user_ranking, len(pks))
+                rooms = self.pick(self.room_ranking, len(pks))
+                for pk, user_id, room_id in zip(pks, users, rooms):
+                    experience_id = None
+                    if self.random.random() < experience_share:
+                        room_id = None
+                        experience_id = self.pick(self.experience_ranking, 1)[0]
+                    yield Review(
+                        pk=pk,
+                        user_id=user_id,
+                        room_id=room_id,
+                        experience_id=experience_id,
+                        payload=self.sentence(self.random.randint(3, 20)),
+                        rating=self.random.choices(range(1, 6), RATING_WEIGHTS)[0],
+                    )
+
+        self.insert(Review, rows())
+
+    def seed_bookings(self):
+        count = self.counts["bookings"]
+        days = [self.anchor + timedelta(days=n) for n in range(-365, 181)]
+        seasons = weighted(
+            days,
+            lambda rank, day: MONTH_WEIGHTS[day.month - 1]
+            * (1.5 if day.weekday() >= 4 else 1),
+        )
+        experience_share = 0.1 if self.experience_ranking else 0
+        self.chats = []
+
+        def rows():
+            for pks in chunked(self.ids(Booking, count), self.chunk_size):
+                users = self.pick(self.user_ranking, len(pks))
+                rooms = self.pick(self.room_ranking, len(pks))
+                check_ins = self.pick(seasons, len(pks))
+                for pk, user_id, room_id, check_in in zip(pks, users, rooms, check_ins):
+                    if self.random.random() < experience_share:
+                        experience_id = self.pick(self.experience_ranking, 1)[0]
+                        yield Booking(
+                            pk=pk,
+                            kind=Booking.BookingKindChoices.EXPERIENCE,
+                            user_id=user_id,
+                            experience_id=experience_id,
+                            experience_time=timezone.make_aware(
+                                datetime.combine(check_in, time(10))
+                            ),
+                            guests=self.random.randint(1, 4),
+                        )
+                        continue
+                    nights = self.random.choices(
+                        [1, 2, 3, 4, 7, 14], [25, 30, 20, 10, 10, 5]
+                    )[0]
+                    if self.random.random() < 0.2:
+                        self.chats.append((user_id, room_id))
+                    yield Booking(
+                        pk=pk,
+                        kind=Booking.BookingKindChoices.ROOM,
+                        user_id=user_id,
+                        room_id=room_id,
+                        check_in=check_in,
+                        check_out=check_in + timedelta(days=nights),
+                        guests=self.random.randint(1, 6),
+                    )
+
+        self.insert(Booking, rows())
+
+    def seed_wishlists(self):
+        users = self.user_ranking[0][: max(1, len(self.user_ranking[0]) // 3)]
+        wishlist_ids = list(self.ids(Wishlist, len(users)))
+        self.insert(
+            Wishlist,
+            (
+                Wishlist(pk=pk, name="Saved", user_id=user_id)
+                for pk, user_id in zip(wishlist_ids, users)
+            ),
+        )
+
+        def rooms():
+            for pk in wishlist_ids:
+                for room_id in set(
+                    self.pick(self.room_ranking, self.random.randint(1, 20))
+                ):
+                    yield Wishlist.rooms.through(wishlist_id=pk, room_id=room_id)
+
+        self.insert(Wishlist.rooms.through, rooms())
+
+    def seed_messages(self):
+        chat_ids = list(self.ids(ChattingRoom, len(self.chats)))
+        self.insert(ChattingRoom, (ChattingRoom(pk=pk) for pk in chat_ids))
+        participants = []
+
+        def members():
+            for pk, (guest_id, room_id) in zip(chat_ids, self.chats):
+                host_id = self.room_owners[room_id - self.first_room]
+                participants.append((guest_id, host_id))
+                yield ChattingRoom.users.through(chattingroom_id=pk, user_id=guest_id)
+                if host_id != guest_id:
+                    yield ChattingRoom.users.through(
+                        chattingroom_id=pk, user_id=host_id
+                    )
+
+        self.insert(ChattingRoom.users.through, members())
+
+        def rows():
+            message_ids = iter(self.ids(Message, len(chat_ids) * 12))
+            for pk, users in zip(chat_ids, participants):
+                for n in range(self.random.randint(1, 12)):
+                    yield Message(
+                        pk=next(message_ids),
+                        text=self.sentence(self.random.randint(2, 15)),
+                        user_id=users[n % 2],
+                        room_id=pk,
+                    )
+
+        self.insert(Message, rows())
+
+    def sentence(self, words):
+        return " ".join(self.random.choices(WORDS, k=words)).capitalize() + "."
+
+    def reset_sequences(self):
+        models = [
+            Category,
+            Amenity,
+            Perk,
+            User,
+            Room,
+            Photo,
+            Experience,
+            Video,
+            Review,
+            Booking,
+            Wishlist,
+            ChattingRoom,
+            Message,
+            Room.amenities.through,
+            Experience.perks.through,
+            Wishlist.rooms.through,
+            ChattingRoom.users.through,
+        ]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
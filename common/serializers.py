@@ -0,0 +1,185 @@
+"""Read-only list serialization straight from .values()
+
+A ValuesSerializer is a compiled twin of a DRF ModelSerializer for hot list
+endpoints. The ModelSerializer's fields are compiled once per class: plain
+model fields become dictionary lookups on .values() rows, a nested
+serializer on a foreign key becomes joined lookups, and a nested many=True
+serializer becomes one more query whose rows are grouped by parent.
+SerializerMethodFields have no column to read, so the ValuesSerializer
+implements them as get_<name>(row) and lists what they read in
+`method_lookups`. Each row gives the same keys, in the same order and with
+the same values, as the ModelSerializer.
+"""
+
+from collections import defaultdict
+from itertools import islice
+from operator import itemgetter
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import ForeignObjectRel
+from rest_framework import fields as drf_fields
+from rest_framework.serializers import BaseSerializer, ListSerializer
+
+# DRF fields whose to_representation hands back what the database returned
+PASSTHROUGH_FIELDS = (
+    drf_fields.BooleanField,
+    drf_fields.CharField,
+    drf_fields.FloatField,
+    drf_fields.IntegerField,
+)
+
+VALUE, METHOD, ONE, MANY = "value", "method", "one", "many"
+
+
+def relation_lookup(model, name):
+    """Lookup from the model a relation points at back to `model`"""
+    relation = model._meta.get_field(name)
+    if isinstance(relation, ForeignObjectRel):
+        return relation.field.name
+    return relation.related_query_name()
+
+
+class ValuesSerializer:
+    serializer_class = None
+    # {method field name: lookups its get_<name>(row) reads}
+    method_lookups = {}
+    # {nested field name: ValuesSerializer subclass}; nested serializers
+    # without method fields are compiled on the fly
+    nested = {}
+
+    def __init__(self, queryset, context=None):
+        self.queryset = queryset
+        self.context = context or {}
+
+    @classmethod
+    def prepare(cls, queryset):
+        """Add the annotations that method fields read"""
+        return queryset
+
+    @classmethod
+    def plan(cls):
+        """(lookups, fields) compiled from serializer_class, cached per class"""
+        if "_plan" not in cls.__dict__:
+            cls._plan = cls.compile()
+        return cls._plan
+
+    @classmethod
+    def compile(cls, prefix=""):
+        model = cls.serializer_class.Meta.model
+        lookups, fields = [], []
+        for name, field in cls.serializer_class().fields.items():
+            if isinstance(field, drf_fields.SerializerMethodField):
+                if prefix or name not in cls.method_lookups:
+                    raise ImproperlyConfigured(
+                        f"{cls.__name__} cannot compile method field {name!r}"
+                    )
+                lookups += cls.method_lookups[name]
+                fields.append((name, METHOD, getattr(cls, f"get_{name}")))
+                continue
+            if field.source == "*":
+                raise ImproperlyConfigured(
+                    f"{cls.__name__} cannot compile field {name!r} with source='*'"
+                )
+            source = prefix + field.source.replace(".", "__")
+            if isinstance(field, ListSerializer):
+                if prefix:
+                    raise ImproperlyConfigured(
+                        f"{cls.__name__} cannot compile {name!r} inside a nested "
+                        "serializer"
+                    )
+                child = cls.nested.get(name) or compiled(type(field.child))
+                link = relation_lookup(model, field.source)
+                lookups.append("pk")
+                fields.append((name, MANY, (child, link)))
+            elif isinstance(field, BaseSerializer):
+                child = cls.nested.get(name) or compiled(type(field))
+                child_lookups, child_fields = child.compile(f"{source}__")
+                lookups += [source, *child_lookups]
+                fields.append((name, ONE, (source, child_fields)))
+            else:
+                lookups.append(source)
+                if isinstance(field, PASSTHROUGH_FIELDS):
+                    fields.append((name, VALUE, (source, None)))
+                else:
+                    fields.append((name, VALUE, (source, field.to_representation)))
+        return list(dict.fromkeys(lookups)), fields
+
+    @property
+    def data(self):
+        lookups, fields = self.plan()
+        rows = list(self.prepare(self.queryset).values(*lookups))
+        return self.build(rows, fields)
+
+    def batches(self, size):
+        """Like data, `size` rows at a time, reading with .iterator()"""
+        lookups, fields = self.plan()
+        rows = self.prepare(self.queryset).values(*lookups).iterator(chunk_size=size)
+        while batch := list(islice(rows, size)):
+            yield self.build(batch, fields)
+
+    def grouped(self, link, parents):
+        """{parent pk: [data]} for the rows related to `parents` through link"""
+        lookups, fields = self.plan()
+        queryset = self.prepare(self.queryset.filter(**{f"{link}__in": parents}))
+        rows = list(queryset.values(*dict.fromkeys([*lookups, link])))
+        groups = defaultdict(list)
+        for row, data in zip(rows, self.build(rows, fields)):
+            groups[row[link]].append(data)
+        return groups
+
+    def build(self, rows, fields):
+        if not rows:
+            return []
+        getters = self.getters(fields, rows)
+        return [{name: getter(row) for name, getter in getters} for row in rows]
+
+    def getters(self, fields, rows):
+        getters = []
+        for name, kind, spec in fields:
+            if kind is VALUE:
+                source, convert = spec
+                getters.append((name, self.value_getter(source, convert)))
+            elif kind is METHOD:
+                getters.append((name, spec.__get__(self)))
+            elif kind is ONE:
+                source, child_fields = spec
+                getters.append(
+                    (name, self.object_getter(source, self.getters(child_fields, ())))
+                )
+            else:
+                child, link = spec
+                related = child.serializer_class.Meta.model._default_manager.all()
+                groups = child(related, self.context).grouped(
+                    link, [row["pk"] for row in rows]
+                )
+                getters.append((name, lambda row, groups=groups: groups[row["pk"]]))
+        return getters
+
+    @staticmethod
+    def value_getter(source, convert):
+        if convert is None:
+            return itemgetter(source)
+
+        def get(row):
+            value = row[source]
+            return None if value is None else convert(value)
+
+        return get
+
+    @staticmethod
+    def object_getter(source, getters):
+        def get(row):
+            if row[source] is None:
+                return None
+            return {name: getter(row) for name, getter in getters}
+
+        return get
+
+
+def compiled(serializer_class):
+    """ValuesSerializer for a ModelSerializer without method fields"""
+    return type(
+        f"{serializer_class.__name__}Values",
+        (ValuesSerializer,),
+        {"serializer_class": serializer_class},
+    )
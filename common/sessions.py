@@ -0,0 +1,73 @@
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.backends.cached_db import (
+    SessionStore as CachedDBStore,
+)
+from django.core.cache import cache
+from django.utils import timezone
+
+
+class SessionStore(CachedDBStore):
+    """Cached database sessions that skip the write when nothing changed"""
+
+    _loaded_state = None
+
+    def _state(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._loaded_state = self._state(data)
+        return data
+
+    def save(self, must_create=False):
+        if (
+            not must_create
+            and self.session_key
+            and self._loaded_state is not None
+            and self._state(self._get_session(no_load=True)) == self._loaded_state
+        ):
+            return
+        super().save(must_create)
+        self._loaded_state = self._state(self._get_session(no_load=True))
+
+
+_pending_logins = {}
+_pending_lock = threading.Lock()
+_last_flush = time.monotonic()
+
+
+def record_last_login(sender, user, **kwargs):
+    """Replacement for django.contrib.auth's update_last_login.
+
+    The timestamp is buffered and written together with the other logins of
+    this process by flush_last_logins(), so a killed worker loses at most
+    LAST_LOGIN_FLUSH_INTERVAL seconds of last_login updates.
+    """
+    user.last_login = timezone.now()
+    with _pending_lock:
+        _pending_logins[user.pk] = user.last_login
+
+
+def flush_last_logins(force=False):
+    global _last_flush
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.LAST_LOGIN_FLUSH_INTERVAL:
+        return
+    with _pending_lock:
+        if not force and now - _last_flush < settings.LAST_LOGIN_FLUSH_INTERVAL:
+            return
+        pending = dict(_pending_logins)
+        _pending_logins.clear()
+        _last_flush = now
+    if not pending:
+        return
+    User = get_user_model()
+    User.objects.bulk_update(
+        [User(pk=pk, last_login=last_login) for pk, last_login in pending.items()],
+        ["last_login"],
+    )
+    cache.delete_many([User.cache_key(pk) for pk in pending])
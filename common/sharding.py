@@ -0,0 +1,245 @@
+"""Horizontal partitioning of the fastest-growing tables
+
+SHARDED_MODELS maps a model label to the fields that make up its shard key;
+the first one that is set decides the shard, so room bookings live with
+their room and experience bookings with their experience. Rows are spread
+over SHARD_DATABASES by key modulo the number of shards. Without shards
+configured everything stays on the default database.
+
+Shards only hold the sharded tables, so their foreign keys are declared
+with db_constraint=False and never joined across databases: use prefetch
+instead of select_related for the users, rooms and chat rooms they point at.
+The constraints are only dropped on the shards themselves (see ShardsOnly);
+the copies of the tables on default keep them.
+"""
+
+import heapq
+from itertools import islice
+from operator import attrgetter
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.db.migrations.operations.base import Operation
+
+# New rows on shard N are numbered from (N + 1) * SHARD_ID_SPACE, so ids
+# stay unique across shards and rows can move between them unchanged.
+SHARD_ID_SPACE = 10**12
+
+
+def is_sharded(model):
+    return bool(settings.SHARD_DATABASES) and (
+        model._meta.label_lower in settings.SHARDED_MODELS
+    )
+
+
+def shard_databases():
+    return list(settings.SHARD_DATABASES) or ["default"]
+
+
+def shard_for(key):
+    shards = settings.SHARD_DATABASES
+    if not shards:
+        return "default"
+    return shards[(key or 0) % len(shards)]
+
+
+def shard_key(instance):
+    for field in settings.SHARDED_MODELS[instance._meta.label_lower]:
+        value = getattr(instance, field)
+        if value is not None:
+            return value
+    return None
+
+
+def parent_key(model, parent):
+    """Shard key for model rows hanging off `parent` (a related manager)"""
+    for field in settings.SHARDED_MODELS[model._meta.label_lower]:
+        related = model._meta.get_field(field).related_model
+        if related is not None and isinstance(parent, related):
+            return parent.pk
+    return None
+
+
+def model_databases(model):
+    """Every database that can hold rows of `model`"""
+    if is_sharded(model):
+        return ["default", *settings.SHARD_DATABASES]
+    return ["default"]
+
+
+class ShardedManager(models.Manager):
+    def create(self, **kwargs):
+        # The queryset would pick a database before the instance exists;
+        # saving without one lets the router see the shard key.
+        instance = self.model(**kwargs)
+        instance.save(force_insert=True, using=self._db)
+        return instance
+
+    def for_key(self, key):
+        """Queryset on the shard that holds `key`"""
+        return self.db_manager(shard_for(key)).get_queryset()
+
+    def across_shards(self, order_by="-pk", limit=None, **filters):
+        """Run a filter on every shard and merge the results in order.
+
+        Each shard returns at most `limit` rows already sorted by
+        `order_by`, so the merge never reads more than limit * shards rows.
+        """
+        field = order_by.lstrip("-")
+        results = []
+        for alias in shard_databases():
+            queryset = self.db_manager(alias).filter(**filters).order_by(order_by)
+            if limit is not None:
+                queryset = queryset[:limit]
+            results.append(list(queryset))
+        merged = heapq.merge(
+            *results, key=attrgetter(field), reverse=order_by.startswith("-")
+        )
+        return list(islice(merged, limit))
+
+
+def rebalance(batch_size=1000, dry_run=False, log=None):
+    """Move every sharded row that is not on shard_for(its key) there.
+
+    Rows are read from the default database and every shard in pk order,
+    copied to their shard and only then deleted from the source, batch by
+    batch, so an interrupted run can simply be started again. Returns the
+    number of rows moved (or that would move, with dry_run).
+    """
+    log = log or (lambda message: None)
+    moved = 0
+    for label in settings.SHARDED_MODELS:
+        model = apps.get_model(label)
+        for source in model_databases(model):
+            last_pk = 0
+            while True:
+                rows = list(
+                    model._base_manager.using(source)
+                    .filter(pk__gt=last_pk)
+                    .order_by("pk")[:batch_size]
+                )
+                if not rows:
+                    break
+                last_pk = rows[-1].pk
+                targets = {}
+                for row in rows:
+                    target = shard_for(shard_key(row))
+                    if target != source:
+                        targets.setdefault(target, []).append(row)
+                for target, misplaced in targets.items():
+                    log(f"{label}: {len(misplaced)} rows {source} -> {target}")
+                    moved += len(misplaced)
+                    if dry_run:
+                        continue
+                    destination = model._base_manager.using(target)
+                    pks = [row.pk for row in misplaced]
+                    # Rows copied by an interrupted run are already there.
+                    copied = set(
+                        destination.filter(pk__in=pks).values_list("pk", flat=True)
+                    )
+                    with transaction.atomic(using=target):
+                        destination.bulk_create(
+                            [row for row in misplaced if row.pk not in copied]
+                        )
+                    with transaction.atomic(using=source):
+                        model._base_manager.using(source).filter(pk__in=pks).delete()
+    return moved
+
+
+def seed_id_ranges(sender, using, **kwargs):
+    """post_migrate receiver that moves each shard's id sequences apart"""
+    if using not in settings.SHARD_DATABASES:
+        return
+    connection = connections[using]
+    if connection.vendor != "sqlite":
+        return
+    start = (settings.SHARD_DATABASES.index(using) + 1) * SHARD_ID_SPACE
+    with connection.cursor() as cursor:
+        tables = connection.introspection.table_names(cursor)
+        for label in settings.SHARDED_MODELS:
+            table = apps.get_model(label)._meta.db_table
+            if table not in tables:
+                continue
+            cursor.execute(
+                "UPDATE sqlite_sequence SET seq = %s WHERE name = %s AND seq < %s",
+                [start, table, start],
+            )
+            cursor.execute(
+                "INSERT INTO sqlite_sequence (name, seq) SELECT %s, %s "
+                "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = %s)",
+                [table, start, table],
+            )
+
+
+def sharded_foreign_keys():
+    """{parent model: [(sharded model, foreign key)]} for the cascade"""
+    parents = {}
+    for label in settings.SHARDED_MODELS:
+        model = apps.get_model(label)
+        for field in model._meta.concrete_fields:
+            if field.many_to_one:
+                parents.setdefault(field.related_model, []).append((model, field))
+    return parents
+
+
+def cascade_to_shards(sender, instance, **kwargs):
+    """post_delete receiver applying on_delete to rows on the shards.
+
+    The deletion collector only looks in the parent's database, which no
+    longer holds these rows.
+    """
+    for model, field in sharded_foreign_keys().get(sender, []):
+        on_delete = field.remote_field.on_delete
+        for alias in settings.SHARD_DATABASES:
+            rows = model._base_manager.using(alias).filter(
+                **{field.attname: instance.pk}
+            )
+            if on_delete is models.CASCADE:
+                rows.delete()
+            elif on_delete is models.SET_NULL:
+                rows.update(**{field.attname: None})
+
+
+def connect_signals():
+    from django.db.models.signals import post_delete, post_migrate
+
+    post_migrate.connect(seed_id_ranges, dispatch_uid="shard_id_ranges")
+    for parent in sharded_foreign_keys():
+        post_delete.connect(
+            cascade_to_shards, sender=parent, dispatch_uid=f"shard_cascade_{parent}"
+        )
+
+
+class ShardsOnly(Operation):
+    """Migration operation whose schema change only runs on SHARD_DATABASES.
+
+    The model state changes everywhere, so makemigrations stays quiet, but
+    databases that are not shards keep their schema as it was.
+    """
+
+    reduces_to_sql = False
+
+    def __init__(self, operation):
+        self.operation = operation
+
+    def deconstruct(self):
+        return self.__class__.__qualname__, [self.operation], {}
+
+    def state_forwards(self, app_label, state):
+        self.operation.state_forwards(app_label, state)
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.alias in settings.SHARD_DATABASES:
+            self.operation.database_forwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.alias in settings.SHARD_DATABASES:
+            self.operation.database_backwards(
+                app_label, schema_editor, from_state, to_state
+            )
+
+    def describe(self):
+        return f"{self.operation.describe()} (on shards only)"
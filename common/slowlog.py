@@ -0,0 +1,131 @@
+"""Slow query log
+
+Every connection gets an execute wrapper that times its queries. Queries
+slower than SLOW_QUERY_THRESHOLD_MS are kept in a per-process ring buffer
+with the view and serializer method that issued them, a trimmed stack of
+project frames and, for SELECTs, the database's query plan.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = str(settings.BASE_DIR)
+
+_lock = threading.Lock()
+_entries = deque(maxlen=settings.SLOW_QUERY_LOG_SIZE)
+
+
+def entries():
+    """Logged queries, newest first"""
+    with _lock:
+        return list(reversed(_entries))
+
+
+def clear():
+    with _lock:
+        _entries.clear()
+
+
+def install(sender, connection, **kwargs):
+    """connection_created receiver that adds the slow query wrapper"""
+    if slow_query_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(slow_query_wrapper)
+
+
+def slow_query_wrapper(execute, sql, params, many, context):
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        ms = (time.perf_counter() - start) * 1000
+        if ms >= settings.SLOW_QUERY_THRESHOLD_MS:
+            record(sql, params, many, ms, context["connection"])
+
+
+def record(sql, params, many, ms, connection):
+    view, serializer, stack = attribute(sys._getframe(2))
+    entry = {
+        "at": timezone.now(),
+        "alias": connection.alias,
+        "ms": round(ms, 3),
+        "sql": sql,
+        "params": None if many else repr(params)[:500],
+        "view": view,
+        "serializer": serializer,
+        "stack": stack,
+        "plan": "" if many else explain(sql, params, connection),
+    }
+    with _lock:
+        _entries.append(entry)
+    logger.warning(
+        "Slow query (%.1f ms) from %s: %s", ms, serializer or view or "?", sql[:200]
+    )
+
+
+def in_project(filename):
+    return (
+        filename.startswith(PROJECT_ROOT)
+        and "site-packages" not in filename
+        and filename != __file__
+    )
+
+
+def attribute(frame):
+    """(view, serializer method, trimmed stack) for the frame issuing a query.
+
+    The view and serializer are the innermost project frames whose `self` is
+    an APIView or a serializer, e.g. "RoomDetailSerializer.get_is_liked".
+    The stack lists project frames innermost first.
+    """
+    from rest_framework.serializers import BaseSerializer
+    from rest_framework.views import APIView
+
+    view = serializer = None
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        if in_project(code.co_filename):
+            stack.append(
+                f"{os.path.relpath(code.co_filename, PROJECT_ROOT)}:"
+                f"{frame.f_lineno} in {code.co_name}"
+            )
+            instance = frame.f_locals.get("self")
+            name = f"{type(instance).__name__}.{code.co_name}"
+            if view is None and isinstance(instance, APIView):
+                view = name
+            elif serializer is None and isinstance(instance, BaseSerializer):
+                serializer = name
+        frame = frame.f_back
+    return view, serializer, stack[: settings.SLOW_QUERY_STACK_DEPTH]
+
+
+def explain(sql, params, connection):
+    if sql.lstrip()[:6].upper() != "SELECT":
+        return ""
+    # A failed EXPLAIN would abort the surrounding transaction outside SQLite.
+    if connection.vendor != "sqlite" and connection.in_atomic_block:
+        return ""
+    prefix = "EXPLAIN QUERY PLAN " if connection.vendor == "sqlite" else "EXPLAIN "
+    try:
+        # create_cursor() skips the execute wrappers, so this is not timed.
+        with connection.wrap_database_errors:
+            cursor = connection.create_cursor()
+            try:
+                cursor.execute(prefix + sql, params)
+                return "\n".join(
+                    " ".join(str(column) for column in row) for row in cursor.fetchall()
+                )
+            finally:
+                cursor.close()
+    except DatabaseError as error:
+        return f"EXPLAIN failed: {error}"
@@ -0,0 +1,153 @@
+"""Worker startup profile
+
+Each measurement boots the project in a fresh interpreter the way a WSGI
+worker does, then serves one request. The child runs under
+-X importtime, which gives the import cost of every module, or under
+tracemalloc, which gives the memory allocated by each package's code.
+The two runs are separate so that tracemalloc does not slow down the
+import timings.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from collections import Counter
+
+from django.conf import settings
+
+BOOTSTRAP = """
+import json, os, sys, time
+
+started = time.perf_counter()
+if os.environ.get("STARTUP_MEMORY"):
+    import tracemalloc
+
+    tracemalloc.start(64)
+
+from django.core.wsgi import get_wsgi_application
+
+application = get_wsgi_application()
+ready = time.perf_counter()
+
+from django.conf import settings
+
+settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, "127.0.0.1"]
+response = {}
+environ = {
+    "REQUEST_METHOD": "GET",
+    "PATH_INFO": os.environ["STARTUP_PATH"],
+    "SERVER_NAME": "127.0.0.1",
+    "SERVER_PORT": "80",
+    "wsgi.url_scheme": "http",
+    "wsgi.input": sys.stdin.buffer,
+    "wsgi.errors": sys.stderr,
+}
+body = application(environ, lambda status, headers: response.update(status=status))
+b"".join(body)
+finished = time.perf_counter()
+
+result = {
+    "ready_ms": round((ready - started) * 1000, 1),
+    "first_request_ms": round((finished - started) * 1000, 1),
+    "status": response["status"],
+    "modules": len(sys.modules),
+}
+try:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    result["peak_rss_kb"] = peak // 1024 if sys.platform == "darwin" else peak
+except ImportError:
+    pass
+try:
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                result["rss_kb"] = int(line.split()[1])
+except OSError:
+    pass
+if os.environ.get("STARTUP_MEMORY"):
+    # Module code is allocated by the import machinery; charge it to the
+    # innermost real file on the stack, i.e. the module doing the import.
+    memory = {}
+    for stat in tracemalloc.take_snapshot().statistics("traceback"):
+        for frame in reversed(stat.traceback):
+            if not frame.filename.startswith("<"):
+                memory[frame.filename] = memory.get(frame.filename, 0) + stat.size
+                break
+    result["memory"] = memory
+print(json.dumps(result))
+"""
+
+
+def package(name):
+    """Top-level package for a module name or a source file path"""
+    if os.sep not in name:
+        return name.strip().split(".")[0]
+    path = os.path.relpath(name, settings.BASE_DIR)
+    if not path.startswith(".."):
+        return path.split(os.sep)[0]
+    parts = name.split(os.sep)
+    for marker in ("site-packages", "dist-packages"):
+        if marker in parts:
+            return parts[parts.index(marker) + 1].split(".")[0]
+    return "<stdlib>"
+
+
+def import_times(stderr):
+    """Microseconds spent importing each top-level package (self time)"""
+    times = Counter()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, _, name = line[len("import time:") :].split("|")
+        times[package(name)] += int(own)
+    return times
+
+
+def boot(role, path, memory=False):
+    env = {
+        **os.environ,
+        "DJANGO_SETTINGS_MODULE": os.environ.get(
+            "DJANGO_SETTINGS_MODULE", "config.settings"
+        ),
+        "DEPLOYMENT_ROLE": role,
+        "STARTUP_PATH": path,
+    }
+    command = [sys.executable]
+    if memory:
+        env["STARTUP_MEMORY"] = "1"
+    else:
+        command += ["-X", "importtime"]
+    completed = subprocess.run(
+        [*command, "-c", BOOTSTRAP],
+        cwd=settings.BASE_DIR,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1])
+    return json.loads(completed.stdout.strip().splitlines()[-1]), completed.stderr
+
+
+def measure(role, path="/api/v1/categories/", top=15):
+    """Time to first request, RSS, and the heaviest packages for a role"""
+    result, stderr = boot(role, path)
+    times = import_times(stderr)
+    memory, _ = boot(role, path, memory=True)
+    allocated = Counter()
+    for filename, size in memory["memory"].items():
+        allocated[package(filename)] += size
+    result["import_ms"] = round(sum(times.values()) / 1000, 1)
+    result["import_ms_by_package"] = {
+        name: round(us / 1000, 1) for name, us in times.most_common(top)
+    }
+    result["allocated_kb"] = round(sum(allocated.values()) / 1024)
+    result["allocated_kb_by_package"] = {
+        name: round(size / 1024) for name, size in allocated.most_common(top)
+    }
+    result["role"] = role
+    return result
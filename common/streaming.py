@@ -0,0 +1,71 @@
+"""Streaming JSON arrays for large collections
+
+A streamed response reads its queryset with .iterator() and serializes and
+renders it STREAM_BATCH_SIZE rows at a time while the body is being sent,
+so memory stays flat however many rows there are. Each batch is rendered
+by the same renderer as a normal response and the array brackets and
+commas are added around it, so the body is byte for byte what the
+non-streamed response would have been.
+"""
+
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from common.docs import openapi
+from common.renderers import FastJSONRenderer
+from common.serializers import ValuesSerializer
+
+stream_parameter = openapi.Parameter(
+    "stream",
+    openapi.IN_QUERY,
+    description="Stream every row as one JSON array, ignoring page",
+    type=openapi.TYPE_BOOLEAN,
+    required=False,
+)
+
+
+def wants_stream(request):
+    return request.query_params.get("stream", "").lower() in ("1", "true", "yes")
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def serialized_batches(serializer, size=None):
+    """Lists of data from a ValuesSerializer or a many=True serializer"""
+    size = size or settings.STREAM_BATCH_SIZE
+    if isinstance(serializer, ValuesSerializer):
+        return serializer.batches(size)
+    rows = serializer.instance.iterator(chunk_size=size)
+    to_representation = serializer.child.to_representation
+    return ([to_representation(row) for row in batch] for batch in chunked(rows, size))
+
+
+def values_batches(queryset, size=None):
+    """Lists of .values() rows, for exports without a serializer"""
+    size = size or settings.STREAM_BATCH_SIZE
+    return chunked(queryset.iterator(chunk_size=size), size)
+
+
+def render_array(batches, renderer=None):
+    renderer = renderer or FastJSONRenderer()
+    yield b"["
+    separator = b""
+    for batch in batches:
+        yield separator + renderer.render(batch)[1:-1]
+        separator = b","
+    yield b"]"
+
+
+def stream_json(batches, filename=None):
+    response = StreamingHttpResponse(
+        render_array(batches), content_type="application/json"
+    )
+    if filename:
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,147 @@
+"""Test runner and helpers for the query budget tests"""
+
+import os
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+from django.urls import URLPattern, URLResolver, get_resolver
+from django.utils import timezone
+
+PROJECT_ROOT = str(settings.BASE_DIR)
+
+
+class TestRunner(DiscoverRunner):
+    """Runs the suite with replica reads turned off.
+
+    Replicas are test mirrors of default, but a mirror is its own
+    connection and cannot see the rows a TestCase writes inside its
+    transaction, so every read stays on default. TestReplicas turns them
+    back on with override_settings to check the routing itself.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.replica_settings = override_settings(REPLICA_DATABASES=[])
+        self.replica_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.replica_settings.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+class QueryRecorder:
+    """Records every query with the project frames that issued it"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        stack = [
+            frame
+            for frame in traceback.extract_stack()[:-1]
+            if frame.filename.startswith(PROJECT_ROOT)
+            and "site-packages" not in frame.filename
+            and not frame.filename.endswith(os.path.join("common", "testing.py"))
+        ]
+        self.queries.append((sql, stack))
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        self.wrappers = [
+            connections[alias].execute_wrapper(self) for alias in connections
+        ]
+        for wrapper in self.wrappers:
+            wrapper.__enter__()
+        return self
+
+    def __exit__(self, *exc_info):
+        for wrapper in reversed(self.wrappers):
+            wrapper.__exit__(*exc_info)
+
+    def report(self):
+        lines = []
+        for number, (sql, stack) in enumerate(self.queries, 1):
+            lines.append(f"{number}. {sql}")
+            lines.extend(
+                f"     {frame.filename}:{frame.lineno} in {frame.name}"
+                for frame in stack[-4:]
+            )
+        return "\n".join(lines)
+
+
+def iter_routes(patterns=None, prefix=""):
+    """Yield (route, pattern) for every URL pattern, resolving includes"""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        route = prefix + str(pattern.pattern)
+        if isinstance(pattern, URLResolver):
+            yield from iter_routes(pattern.url_patterns, route)
+        elif isinstance(pattern, URLPattern):
+            yield route, pattern
+
+
+def seed_dataset(size, host, guest):
+    """Create `size` rooms with photos, reviews, wishlists and bookings.
+
+    Returns the first room created so routes can be filled with its pk.
+    """
+    from bookings.models import Booking
+    from categories.models import Category
+    from direct_messages.models import ChattingRoom, Message
+    from medias.models import Photo
+    from reviews.models import Review
+    from rooms.models import Amenity, Room
+    from users.models import User
+    from wishlists.models import Wishlist
+
+    category, _ = Category.objects.get_or_create(
+        name="Seed", kind=Category.CategoryKindChoices.ROOMS
+    )
+    amenities = [Amenity.objects.create(name=f"Amenity {i}") for i in range(3)]
+    wishlist, _ = Wishlist.objects.get_or_create(name="Seed", user=guest)
+    chat = ChattingRoom.objects.create()
+    chat.users.add(host, guest)
+    today = timezone.localdate()
+    rooms = []
+    for i in range(size):
+        owner = User.objects.create(username=f"seed-host-{Room.objects.count()}")
+        room = Room.objects.create(
+            name=f"Room {i}",
+            price=10_000 + i,
+            rooms=1,
+            toilets=1,
+            description="",
+            address="",
+            kind=Room.RoomKindChoices.ENTIRE_PLACE,
+            owner=host if i == 0 else owner,
+            category=category,
+        )
+        room.amenities.add(*amenities)
+        for j in range(2):
+            Photo.objects.create(file=f"https://example.com/{i}-{j}.jpg", room=room)
+        for j in range(4):
+            Review.objects.create(
+                user=guest if j % 2 else owner,
+                room=room,
+                payload=f"Review {j}",
+                rating=1 + (i + j) % 5,
+            )
+        for j in range(2):
+            check_in = today + timedelta(days=10 * j + 1)
+            Booking.objects.create(
+                kind=Booking.BookingKindChoices.ROOM,
+                user=guest,
+                room=room,
+                check_in=check_in,
+                check_out=check_in + timedelta(days=2),
+                guests=2,
+            )
+        Message.objects.create(user=guest, room=chat, text=f"Hello {i}")
+        wishlist.rooms.add(room)
+        rooms.append(room)
+    return rooms[0]
@@ -1,3 +1,1070 @@
-from django.test import TestCase
+import io
+import json
+import re
+import sqlite3
+import tempfile
+import tracemalloc
+import uuid
+from datetime import date, datetime, time
+from datetime import timezone as dt_timezone
+from decimal import Decimal
+from unittest import mock, skipUnless
 
-# Create your tests here.
+import msgpack
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection, connections
+from django.db.utils import load_backend
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from common import profiling, schema, slowlog, tracing
+from common.benchmarks import SCENARIOS, summarize
+from common.db.pragmas import apply_pragmas
+from common.management.commands.sync_replicas import BackupRestarted, RestartLimit
+from common.metrics import registry
+from common.middleware import PRIMARY_PIN_COOKIE, ReplicaMiddleware
+from common.parsers import FastJSONParser
+from common.profiling import make_profile_token
+from common.renderers import FastJSONRenderer, MessagePackRenderer
+from common.routers import ReplicaRouter, ShardRouter, replica_reads
+from common.serializers import ValuesSerializer
+from common.seeding import BENCH_ADMIN, BENCH_PASSWORD
+from common.sessions import SessionStore, flush_last_logins
+from common.sharding import SHARD_ID_SPACE, shard_for
+from common.testing import QueryRecorder, iter_routes, seed_dataset
+from bookings.models import Booking
+from categories.models import Category
+from direct_messages.models import ChattingRoom, Message
+from experiences.models import Experience, Perk
+from medias.models import Photo, VideoUpload
+from reviews.models import Review
+from reviews.serializers import ReviewSerializer, ReviewValuesSerializer
+from rooms.models import Amenity, Room
+from rooms.serializers import (
+    AmenitySerializer,
+    AmenityValuesSerializer,
+    RoomListSerializer,
+    RoomListValuesSerializer,
+)
+from users.models import User
+from wishlists.models import Wishlist
+from wishlists.serializers import WishlistSerializer, WishlistValuesSerializer
+from wishlists.views import with_rooms
+
+
+class TestSessionStore(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_unchanged_session_is_not_rewritten(self):
+        session = SessionStore()
+        session["cart"] = [1, 2]
+        session.save()
+
+        session = SessionStore(session.session_key)
+        session["cart"] = [1, 2]
+        with CaptureQueriesContext(connection) as queries:
+            session.save()
+        self.assertEqual(len(queries), 0)
+
+        session["cart"] = [1, 2, 3]
+        session.save()
+        stored = Session.objects.get(session_key=session.session_key)
+        self.assertEqual(stored.get_decoded()["cart"], [1, 2, 3])
+
+
+@override_settings(LAST_LOGIN_FLUSH_INTERVAL=60 * 60)
+class TestLastLogin(TestCase):
+    USERNAME = "session-user"
+    PASSWORD = "session-password"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username=self.USERNAME)
+        self.user.set_password(self.PASSWORD)
+        self.user.save()
+
+    def test_last_login_is_buffered(self):
+        self.client.post(
+            "/api/v1/users/log-in",
+            data={"username": self.USERNAME, "password": self.PASSWORD},
+        )
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+        flush_last_logins(force=True)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+
+class TestMetrics(TestCase):
+    def test_metrics_endpoint(self):
+        self.client.get("/api/v1/rooms/amenities/")
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{route="api/v1/rooms/amenities/",method="GET"}',
+            body,
+        )
+        self.assertIn(
+            'http_request_db_queries_sum{route="api/v1/rooms/amenities/",method="GET"}',
+            body,
+        )
+
+    def test_unknown_methods_share_one_series(self):
+        for method in ("BREW", "WHATEVER"):
+            self.client.generic(method, "/api/v1/rooms/amenities/")
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn('route="api/v1/rooms/amenities/",method="other"', body)
+        self.assertNotIn("BREW", body)
+
+    def test_streamed_bytes_are_counted(self):
+        stats = registry.stats("api/v1/rooms/", "GET")
+        before = stats.response_bytes
+        response = self.client.get("/api/v1/rooms/?stream=1")
+        sent = len(b"".join(response.streaming_content))
+        self.assertGreater(sent, 0)
+        self.assertEqual(stats.response_bytes - before, sent)
+
+    def test_metrics_requires_allowed_ip(self):
+        response = self.client.get("/metrics", REMOTE_ADDR="10.1.2.3")
+        self.assertEqual(response.status_code, 403)
+
+
+class TestSeedBenchmark(TestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    COUNTS = ["--users=50", "--rooms=80", "--experiences=10", "--reviews=400"]
+
+    def seed(self):
+        call_command(
+            "seed_benchmark",
+            *self.COUNTS,
+            "--bookings=200",
+            "--seed=7",
+            "--anchor=2026-01-01",
+            stdout=io.StringIO(),
+        )
+        return list(
+            Review.objects.order_by("pk").values_list(
+                "pk", "user", "room", "experience", "rating", "payload"
+            )
+        ), [
+            (
+                booking.pk,
+                booking.user_id,
+                booking.room_id,
+                booking.check_in,
+                booking.check_out,
+            )
+            for booking in Booking.objects.across_shards(order_by="pk")
+        ]
+
+    def test_seed_is_reproducible(self):
+        first = self.seed()
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Room.objects.count(), 80)
+        self.assertEqual(len(first[0]), 400)
+        self.assertEqual(len(first[1]), 200)
+        self.assertTrue(
+            User.objects.get(username=BENCH_ADMIN).check_password(BENCH_PASSWORD)
+        )
+        self.assertTrue(self.client.login(username="bench2", password=BENCH_PASSWORD))
+
+        for model in (User, Category, Amenity, Perk, ChattingRoom):
+            model.objects.all().delete()
+        self.assertEqual(self.seed(), first)
+
+
+class TestBenchmark(TestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    def setUp(self):
+        cache.clear()
+        host = User.objects.create(username="bench-host")
+        guest = User.objects.create(username="bench-guest")
+        guest.set_password(BENCH_PASSWORD)
+        guest.save()
+        seed_dataset(2, host, guest)
+
+    def test_benchmark_and_compare(self):
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = f"{directory}/baseline.json"
+            call_command(
+                "benchmark",
+                "--suite=client",
+                "--iterations=3",
+                "--warmup=1",
+                f"--output={baseline}",
+                stdout=io.StringIO(),
+            )
+            with open(baseline) as results:
+                document = json.load(results)
+            self.assertEqual(
+                set(document["results"]),
+                {f"client:{name}" for name, *_ in SCENARIOS},
+            )
+            for result in document["results"].values():
+                self.assertLessEqual(result["p50_ms"], result["p99_ms"])
+                self.assertGreater(result["throughput_rps"], 0)
+
+            stdout = io.StringIO()
+            call_command(
+                "benchmark_compare", baseline, baseline, "--report", stdout=stdout
+            )
+            self.assertIn("client:review_create throughput_rps", stdout.getvalue())
+
+            result = document["results"]["client:room_detail"]
+            result["p95_ms"] *= 1.5
+            result["queries"] += 1
+            current = f"{directory}/current.json"
+            with open(current, "w") as results:
+                json.dump(document, results)
+            stdout = io.StringIO()
+            with self.assertRaises(CommandError):
+                call_command("benchmark_compare", baseline, current, stdout=stdout)
+            self.assertIn("client:room_detail p95_ms", stdout.getvalue())
+            self.assertIn("client:room_detail queries", stdout.getvalue())
+
+    def test_single_iteration(self):
+        result = summarize([0.002], [3], elapsed=0.002)
+        self.assertEqual(result["p50_ms"], result["p99_ms"])
+        self.assertEqual(result["p50_ms"], 2.0)
+        with self.assertRaises(CommandError):
+            call_command("benchmark", "--iterations=0", stdout=io.StringIO())
+
+
+class TestValuesSerializers(TestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    def setUp(self):
+        host = User.objects.create(username="values-host", avatar="https://a.b/c")
+        self.guest = User.objects.create(username="values-guest")
+        seed_dataset(3, host, self.guest)
+        Room.objects.create(
+            name="No reviews", price=1, rooms=1, toilets=1, owner=host, kind="x"
+        )
+        Wishlist.objects.create(name="Empty", user=self.guest)
+        Amenity.objects.create(name="Described", description="Yes")
+        Photo.objects.filter(pk=Photo.objects.order_by("pk").first().pk).update(
+            variants=[
+                {"name": "a.webp", "format": "webp", "width": 320},
+                {"name": "b.webp", "format": "webp", "width": 640},
+                {"name": "a.jpg", "format": "jpeg", "width": 320},
+            ]
+        )
+        request = RequestFactory().get("/")
+        request.user = host
+        self.context = {"request": request}
+
+    def assertSameOutput(self, serializer, queryset, values_serializer, values):
+        renderer = JSONRenderer()
+        with CaptureQueriesContext(connection) as queries:
+            expected = serializer(queryset, many=True, context=self.context).data
+        with self.assertNumQueries(len(queries)):
+            data = values_serializer(values, self.context).data
+        self.assertTrue(data)
+        self.assertEqual(renderer.render(data), renderer.render(expected))
+
+    def test_matches_model_serializers(self):
+        self.assertSameOutput(
+            RoomListSerializer,
+            Room.objects.with_rating().prefetch_related("photos"),
+            RoomListValuesSerializer,
+            Room.objects.all(),
+        )
+        reviews = Review.objects.order_by("pk")
+        self.assertSameOutput(
+            ReviewSerializer,
+            reviews.select_related("user")[2:7],
+            ReviewValuesSerializer,
+            reviews[2:7],
+        )
+        self.assertSameOutput(
+            AmenitySerializer,
+            Amenity.objects.all(),
+            AmenityValuesSerializer,
+            Amenity.objects.all(),
+        )
+        wishlists = Wishlist.objects.filter(user=self.guest)
+        self.assertSameOutput(
+            WishlistSerializer,
+            with_rooms(wishlists),
+            WishlistValuesSerializer,
+            wishlists,
+        )
+
+    def test_method_fields_need_an_implementation(self):
+        class Incomplete(ValuesSerializer):
+            serializer_class = RoomListSerializer
+
+        with self.assertRaises(ImproperlyConfigured):
+            Incomplete(Room.objects.all()).data
+
+    def test_benchmark_command(self):
+        stdout = io.StringIO()
+        call_command("benchmark_serializers", "--rows=10", "--repeat=1", stdout=stdout)
+        self.assertIn("identical=True", stdout.getvalue())
+        self.assertNotIn("identical=False", stdout.getvalue())
+
+
+@override_settings(STREAM_BATCH_SIZE=2)
+class TestStreaming(TestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    def setUp(self):
+        self.host = User.objects.create(username="stream-host")
+        self.guest = User.objects.create(username="stream-guest")
+        self.room = seed_dataset(5, self.host, self.guest)
+
+    def stream(self, path, **extra):
+        response = self.client.get(path, {"stream": "1"}, **extra)
+        self.assertTrue(response.streaming)
+        return list(response.streaming_content)
+
+    def test_streamed_body_matches_the_full_response(self):
+        self.client.force_login(self.host)
+        chunks = self.stream("/api/v1/rooms/")
+        # "[", three batches of at most two rooms, "]"
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(b"".join(chunks), self.client.get("/api/v1/rooms/").content)
+
+        path = f"/api/v1/rooms/{self.room.pk}/bookings"
+        self.assertEqual(b"".join(self.stream(path)), self.client.get(path).content)
+
+        path = f"/api/v1/rooms/{self.room.pk}/reviews"
+        streamed = json.loads(b"".join(self.stream(path)))
+        self.assertEqual(len(streamed), self.room.reviews.count())
+        self.assertEqual(streamed[:3], self.client.get(path).json())
+
+    def test_empty_collection(self):
+        Room.objects.all().delete()
+        response = self.client.get("/api/v1/rooms/", {"stream": "1"})
+        self.assertEqual(b"".join(response.streaming_content), b"[]")
+
+    @skipUnless(settings.ADMIN_ENABLED, "The admin is off for DEPLOYMENT_ROLE=api")
+    def test_admin_export(self):
+        self.host.is_staff = self.host.is_superuser = True
+        self.host.save()
+        self.client.force_login(self.host)
+        rooms = Room.objects.order_by("pk")
+        response = self.client.post(
+            "/admin/rooms/room/",
+            {
+                "action": "export_json",
+                "_selected_action": [room.pk for room in rooms],
+            },
+        )
+        self.assertIn("room.json", response["Content-Disposition"])
+        exported = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(
+            sorted(row["id"] for row in exported), [room.pk for room in rooms]
+        )
+        self.assertIn(self.host.pk, [row["owner_id"] for row in exported])
+
+
+class TestRenderers(TestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    PAYLOAD = {
+        "price": Decimal("12.50"),
+        "at": datetime(2026, 1, 2, 3, 4, 5, 678901, tzinfo=dt_timezone.utc),
+        "day": date(2026, 1, 2),
+        "time": time(3, 4),
+        "label": gettext_lazy("Room"),
+        "id": uuid.UUID(int=1),
+        "text": "line\u2028separator\u2029 é / \x1f",
+        "keys": {1: "one", None: "none"},
+        "rating": 4.25,
+        "rows": [{"pk": 1, "ok": True, "none": None}],
+    }
+
+    def test_same_bytes_as_json_renderer(self):
+        expected = JSONRenderer().render(self.PAYLOAD)
+        self.assertIn(b"\\u2028", expected)
+        self.assertEqual(FastJSONRenderer().render(self.PAYLOAD), expected)
+        with mock.patch("common.renderers.orjson", None):
+            self.assertEqual(FastJSONRenderer().render(self.PAYLOAD), expected)
+        self.assertEqual(
+            FastJSONRenderer().render({"big": 2**70}),
+            JSONRenderer().render({"big": 2**70}),
+        )
+        indented = "application/json; indent=2"
+        self.assertEqual(
+            FastJSONRenderer().render(self.PAYLOAD, indented),
+            JSONRenderer().render(self.PAYLOAD, indented),
+        )
+        self.assertEqual(FastJSONRenderer().render(None), b"")
+
+    def test_parser(self):
+        body = JSONRenderer().render(self.PAYLOAD)
+        self.assertEqual(
+            FastJSONParser().parse(io.BytesIO(body)),
+            JSONParser().parse(io.BytesIO(body)),
+        )
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b"{'single': 'quotes'}"))
+
+    def test_msgpack_negotiation(self):
+        self.assertTrue(settings.MSGPACK_ENABLED, "msgpack is a dependency")
+        Amenity.objects.create(name="Wifi")
+        response = self.client.get(
+            "/api/v1/rooms/amenities/", HTTP_ACCEPT="application/msgpack"
+        )
+        self.assertEqual(response["Content-Type"], "application/msgpack")
+        self.assertEqual(
+            msgpack.unpackb(response.content),
+            self.client.get("/api/v1/rooms/amenities/").json(),
+        )
+        payload = {key: self.PAYLOAD[key] for key in ("price", "at", "label")}
+        self.assertEqual(
+            msgpack.unpackb(MessagePackRenderer().render(payload)),
+            {"price": 12.5, "at": "2026-01-02T03:04:05.678901Z", "label": "Room"},
+        )
+
+    def test_msgpack_requests(self):
+        user = User.objects.create(username="packed")
+        user.set_password("secret")
+        user.save()
+        response = self.client.post(
+            "/api/v1/users/log-in",
+            msgpack.packb({"username": "packed", "password": "secret"}),
+            content_type="application/msgpack",
+        )
+        self.assertEqual(response.json(), {"ok": "Welcome!"})
+        response = self.client.post(
+            "/api/v1/users/log-in", b"\x93\x01", content_type="application/msgpack"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_benchmark_command(self):
+        guest = User.objects.create(username="render-guest")
+        seed_dataset(2, User.objects.create(username="render-host"), guest)
+        stdout = io.StringIO()
+        call_command("benchmark_renderers", "--rows=10", "--repeat=1", stdout=stdout)
+        self.assertIn("identical=True", stdout.getvalue())
+        self.assertNotIn("identical=False", stdout.getvalue())
+
+
+class TestSQLiteBackend(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f"{directory.name}/db.sqlite3"
+        settings_dict = {
+            **connection.settings_dict,
+            "ENGINE": "common.db.backends.sqlite3",
+            "NAME": self.path,
+            "OPTIONS": {"begin_retries": 2},
+        }
+        self.wrapper = load_backend(settings_dict["ENGINE"]).DatabaseWrapper(
+            settings_dict, "production"
+        )
+        self.addCleanup(self.wrapper.close)
+        self.wrapper.ensure_connection()
+        with override_settings(
+            SQLITE_PRAGMAS={"journal_mode": "WAL", "busy_timeout": 0}
+        ):
+            apply_pragmas(None, self.wrapper)
+
+    def test_pragmas(self):
+        with self.wrapper.cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            self.assertEqual(cursor.fetchone()[0], "wal")
+
+    def test_write_transactions_take_the_lock_up_front(self):
+        other = sqlite3.connect(self.path, timeout=0, isolation_level=None)
+        self.addCleanup(other.close)
+        self.wrapper._start_transaction_under_autocommit()
+        with self.assertRaises(sqlite3.OperationalError):
+            other.execute("BEGIN IMMEDIATE")
+        self.wrapper.connection.rollback()
+
+        other.execute("BEGIN IMMEDIATE")
+        with mock.patch("time.sleep") as sleep:
+            with self.assertRaisesMessage(OperationalError, "database is locked"):
+                self.wrapper._start_transaction_under_autocommit()
+        self.assertEqual(sleep.call_count, 2)
+
+
+@skipUnless(settings.DOCS_ENABLED, "The API docs are off for DEPLOYMENT_ROLE=api")
+class TestSchema(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        settings = override_settings(OPENAPI_SCHEMA_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        schema.clear()
+        self.addCleanup(schema.clear)
+
+    def test_schema_is_cached_with_an_etag(self):
+        response = self.client.get("/swagger.json")
+        self.assertEqual(response["Content-Type"], "application/json")
+        self.assertIn("/rooms/", response.json()["paths"])
+        etag = response["ETag"]
+        response = self.client.get("/swagger.json", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get("/swagger.yaml").status_code, 200)
+        self.assertEqual(self.client.get("/swagger.txt").status_code, 404)
+        self.assertContains(self.client.get("/swagger/"), "/swagger.json")
+
+    def test_generated_schema_is_served(self):
+        call_command("generate_schema", stdout=io.StringIO())
+        with open(f"{self.directory}/swagger.json", "w") as output:
+            output.write('{"paths": {}}')
+        self.assertEqual(self.client.get("/swagger.json").json(), {"paths": {}})
+
+
+class TestStartupProfile(TestCase):
+    def test_api_role_skips_docs_and_admin(self):
+        with tempfile.NamedTemporaryFile(suffix=".json") as output:
+            call_command(
+                "profile_startup",
+                "--role=all",
+                "--role=api",
+                "--path=/metrics",
+                "--top=1000",
+                f"--output={output.name}",
+                stdout=io.StringIO(),
+            )
+            full, api = json.load(output)
+        self.assertIn("drf_yasg", full["import_ms_by_package"])
+        self.assertNotIn("drf_yasg", api["import_ms_by_package"])
+        self.assertLess(api["modules"], full["modules"])
+        self.assertEqual(api["status"], "403 Forbidden")
+
+
+class TestProfiler(TestCase):
+    URL = "/api/v1/categories/"
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings = override_settings(PROFILER_ENABLED=True, PROFILER_DIR=directory.name)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.staff = User.objects.create(username="staff", is_staff=True)
+
+    def artifact(self, name, **headers):
+        response = self.client.get(f"/profiles/{name}", **headers)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content)
+
+    def test_staff_can_profile(self):
+        self.client.force_login(self.staff)
+        response = self.client.get(self.URL, {"profile": "cprofile"})
+        self.assertEqual(response.status_code, 200)
+        profile_id = response["X-Profile-Id"]
+
+        summary = json.loads(self.artifact(f"{profile_id}.json"))
+        self.assertEqual(summary["path"], f"{self.URL}?profile=cprofile")
+        self.assertTrue(summary["queries"])
+        self.assertIn("ms", summary["queries"][0])
+        self.assertTrue(self.artifact(summary["profile"]))
+
+    def test_signed_header_enables_sampling(self):
+        token = make_profile_token()
+        response = self.client.get(
+            self.URL, HTTP_X_PROFILE="sample", HTTP_X_PROFILE_TOKEN=token
+        )
+        profile_id = response["X-Profile-Id"]
+        summary = json.loads(
+            self.artifact(f"{profile_id}.json", HTTP_X_PROFILE_TOKEN=token)
+        )
+        self.assertEqual(summary["profile"], f"{profile_id}.folded")
+
+    def test_not_profiled_without_permission(self):
+        response = self.client.get(self.URL, {"profile": "cprofile"})
+        self.assertNotIn("X-Profile-Id", response)
+        response = self.client.get(
+            self.URL, HTTP_X_PROFILE="cprofile", HTTP_X_PROFILE_TOKEN="forged"
+        )
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertEqual(self.client.get(f"/profiles/{'0' * 32}.json").status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get("/profiles/settings.py").status_code, 404)
+
+    def test_overlapping_requests_share_tracemalloc(self):
+        profiling.start_tracing()
+        profiling.start_tracing()
+        profiling.stop_tracing()
+        # The first request is still running and can take its snapshot.
+        self.assertTrue(tracemalloc.is_tracing())
+        tracemalloc.take_snapshot()
+        profiling.stop_tracing()
+        self.assertFalse(tracemalloc.is_tracing())
+
+
+class TestSlowQueryLog(TestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    def setUp(self):
+        cache.clear()
+        host = User.objects.create(username="slow-host")
+        self.staff = User.objects.create(username="slow-staff", is_staff=True)
+        self.room = seed_dataset(1, host, self.staff)
+        self.client.force_login(self.staff)
+        slowlog.clear()
+        # Log every query from here on.
+        settings = override_settings(SLOW_QUERY_THRESHOLD_MS=0.000001)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def test_queries_are_attributed(self):
+        with self.assertLogs("common.slowlog", "WARNING") as logs:
+            self.client.get(f"/api/v1/rooms/{self.room.pk}")
+        liked = next(
+            entry
+            for entry in slowlog.entries()
+            if entry["serializer"] == "RoomDetailSerializer.get_is_liked"
+        )
+        self.assertEqual(liked["view"], "RoomDetail.get")
+        self.assertIn("wishlists", liked["sql"])
+        self.assertTrue(liked["plan"])
+        self.assertTrue(liked["stack"][0].startswith("rooms/serializers.py:"))
+        self.assertTrue(
+            any("RoomDetailSerializer.get_is_liked" in line for line in logs.output)
+        )
+
+    @skipUnless(settings.ADMIN_ENABLED, "The admin is off for DEPLOYMENT_ROLE=api")
+    def test_admin_page(self):
+        with self.assertLogs("common.slowlog", "WARNING") as logs:
+            Room.objects.get(pk=self.room.pk)
+            response = self.client.get("/admin/slow-queries/")
+            self.assertContains(response, "rooms_room")
+            self.client.post("/admin/slow-queries/")
+            self.assertNotContains(
+                self.client.get("/admin/slow-queries/"), "rooms_room"
+            )
+            self.client.logout()
+            response = self.client.get("/admin/slow-queries/")
+            self.assertEqual(response.status_code, 302)
+        self.assertTrue(any("rooms_room" in line for line in logs.output))
+
+
+class TestTracing(TestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    def setUp(self):
+        cache.clear()
+        host = User.objects.create(username="trace-host")
+        self.room = seed_dataset(1, host, host)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = f"{directory.name}/traces.jsonl"
+        settings = override_settings(
+            TRACING_ENABLED=True,
+            TRACING_SAMPLE_RATE=1.0,
+            TRACING_EXPORTER=f"file:{self.path}",
+        )
+        settings.enable()
+        self.addCleanup(settings.disable)
+        tracing.instrument()
+        self.addCleanup(tracing.uninstrument)
+
+    def spans(self):
+        with open(self.path) as traces:
+            documents = [json.loads(line) for line in traces]
+        return [
+            span
+            for document in documents
+            for resource in document["resourceSpans"]
+            for scope in resource["scopeSpans"]
+            for span in scope["spans"]
+        ]
+
+    def test_request_is_traced(self):
+        response = self.client.get(f"/api/v1/rooms/{self.room.pk}")
+        spans = self.spans()
+        by_id = {span["spanId"]: span for span in spans}
+        names = [span["name"] for span in spans]
+        self.assertEqual(spans[0]["name"], "GET api/v1/rooms/<int:pk>")
+        self.assertEqual(response["X-Trace-Id"], spans[0]["traceId"])
+        for name in (
+            "RoomDetail.dispatch",
+            "RoomDetail.check_permissions",
+            "QuerySet[Room]",
+            "db.query",
+            "render",
+        ):
+            self.assertIn(name, names)
+
+        photos = next(span for span in spans if span["name"] == "PhotoSerializer")
+        ancestors = []
+        while "parentSpanId" in photos:
+            photos = by_id[photos["parentSpanId"]]
+            ancestors.append(photos["name"])
+        self.assertEqual(
+            ancestors[:2], ["PhotoSerializer(many=True)", "RoomDetailSerializer"]
+        )
+
+    def test_traceparent_controls_sampling(self):
+        trace_id = "0af7651916cd43dd8448eb211c80319c"
+        self.client.get(
+            "/api/v1/categories/",
+            HTTP_TRACEPARENT=f"00-{trace_id}-b7ad6b7169203331-00",
+        )
+        with self.assertRaises(FileNotFoundError):
+            self.spans()
+        self.client.get(
+            "/api/v1/categories/",
+            HTTP_TRACEPARENT=f"00-{trace_id}-b7ad6b7169203331-01",
+        )
+        root = self.spans()[0]
+        self.assertEqual(root["traceId"], trace_id)
+        self.assertEqual(root["parentSpanId"], "b7ad6b7169203331")
+
+
+@override_settings(REPLICA_DATABASES=["replica0"])
+class TestReplicas(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        self.middleware = ReplicaMiddleware(self.route_room)
+
+    def route_room(self, request):
+        return HttpResponse(self.router.db_for_read(Room))
+
+    def test_router(self):
+        self.assertEqual(self.router.db_for_read(Room), "default")
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Room), "replica0")
+            self.assertEqual(self.router.db_for_read(Review), "replica0")
+            self.assertEqual(self.router.db_for_read(Wishlist), "default")
+            self.assertEqual(self.router.db_for_write(Room), "default")
+        self.assertFalse(self.router.allow_migrate("replica0", "rooms"))
+        self.assertIsNone(self.router.allow_migrate("default", "rooms"))
+
+    def test_writes_pin_to_primary(self):
+        response = self.middleware(self.factory.get("/"))
+        self.assertEqual(response.content, b"replica0")
+
+        response = self.middleware(self.factory.post("/"))
+        self.assertEqual(response.content, b"default")
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+        request = self.factory.get("/")
+        request.COOKIES[PRIMARY_PIN_COOKIE] = "1"
+        self.assertEqual(self.middleware(request).content, b"default")
+
+    def test_token_clients_pin_through_cache(self):
+        headers = {"HTTP_AUTHORIZATION": "Bearer token"}
+        self.middleware(self.factory.post("/", **headers))
+        self.assertEqual(
+            self.middleware(self.factory.get("/", **headers)).content, b"default"
+        )
+        self.assertEqual(self.middleware(self.factory.get("/")).content, b"replica0")
+
+    def test_sync_under_the_production_profile(self):
+        with tempfile.TemporaryDirectory() as directory:
+            primary = sqlite3.connect(f"{directory}/primary.sqlite3")
+            primary.execute("CREATE TABLE t (x)")
+            primary.execute("INSERT INTO t VALUES (1)")
+            primary.commit()
+            primary.close()
+            databases = {
+                "default": {
+                    "ENGINE": "common.db.backends.sqlite3",
+                    "NAME": f"{directory}/primary.sqlite3",
+                },
+                "replica0": {
+                    "ENGINE": "django.db.backends.sqlite3",
+                    "NAME": f"{directory}/replica.sqlite3",
+                },
+            }
+            with mock.patch.dict(settings.DATABASES, databases):
+                call_command("sync_replicas", stdout=io.StringIO())
+            replica = sqlite3.connect(f"{directory}/replica.sqlite3")
+            self.assertEqual(replica.execute("SELECT x FROM t").fetchall(), [(1,)])
+            replica.close()
+
+    def test_backup_restart_limit(self):
+        with tempfile.TemporaryDirectory() as directory:
+            source = sqlite3.connect(f"{directory}/primary.sqlite3")
+            source.execute("CREATE TABLE t (x)")
+            source.executemany("INSERT INTO t VALUES (randomblob(4000))", [()] * 50)
+            source.commit()
+            writer = sqlite3.connect(f"{directory}/primary.sqlite3")
+            target = sqlite3.connect(f"{directory}/replica.sqlite3")
+            limit = RestartLimit(2)
+
+            def progress(status, remaining, total):
+                # Another connection writes between every step.
+                writer.execute("INSERT INTO t VALUES (1)")
+                writer.commit()
+                limit(status, remaining, total)
+
+            with self.assertRaises(BackupRestarted):
+                source.backup(target, pages=5, progress=progress)
+            self.assertEqual(limit.restarts, 3)
+            for connection in (source, writer, target):
+                connection.close()
+
+
+class TestShardConstraints(TestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    TABLES = {
+        "bookings_booking": {"user_id", "room_id", "experience_id"},
+        "direct_messages_message": {"user_id", "room_id"},
+    }
+
+    def foreign_keys(self, alias, table):
+        with connections[alias].cursor() as cursor:
+            constraints = connections[alias].introspection.get_constraints(
+                cursor, table
+            )
+        return {
+            column
+            for constraint in constraints.values()
+            if constraint["foreign_key"]
+            for column in constraint["columns"]
+        }
+
+    def test_default_keeps_its_foreign_keys(self):
+        for table, columns in self.TABLES.items():
+            self.assertEqual(self.foreign_keys("default", table), columns)
+
+    @skipUnless(settings.SHARD_DATABASES, "Set DATABASE_SHARDS")
+    def test_shards_drop_them(self):
+        for alias in settings.SHARD_DATABASES:
+            for table in self.TABLES:
+                self.assertEqual(self.foreign_keys(alias, table), set())
+
+
+@skipUnless(
+    len(settings.SHARD_DATABASES) >= 2,
+    "Set DATABASE_SHARDS to two or more SQLite files",
+)
+class TestSharding(TestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    def setUp(self):
+        self.host = User.objects.create(username="shard-host")
+        self.guest = User.objects.create(username="shard-guest")
+        self.rooms = [
+            Room.objects.create(
+                name=f"Room {n}",
+                price=1,
+                rooms=1,
+                toilets=1,
+                description="",
+                address="",
+                owner=self.host,
+            )
+            for n in range(2)
+        ]
+
+    def book(self, room, **kwargs):
+        return Booking.objects.create(
+            kind=Booking.BookingKindChoices.ROOM,
+            user=self.guest,
+            room=room,
+            guests=1,
+            **kwargs,
+        )
+
+    def test_rows_follow_their_key(self):
+        first, second = self.rooms
+        self.assertNotEqual(shard_for(first.pk), shard_for(second.pk))
+        booking = self.book(first)
+        self.assertEqual(booking._state.db, shard_for(first.pk))
+        self.assertGreaterEqual(booking.pk, SHARD_ID_SPACE)
+        self.assertEqual(list(first.bookings.all()), [booking])
+        self.assertEqual(list(Booking.objects.for_room(second)), [])
+        self.assertEqual(booking.room, first)
+        router = ShardRouter()
+        self.assertFalse(router.allow_migrate("shard0", "rooms", "room"))
+        self.assertTrue(router.allow_migrate("shard0", "bookings", "booking"))
+
+    def test_fan_out(self):
+        bookings = [self.book(room) for room in self.rooms]
+        self.assertEqual(
+            Booking.objects.for_user(self.guest),
+            list(reversed(bookings)),
+        )
+        self.client.force_login(self.guest)
+        response = self.client.get("/api/v1/bookings/me")
+        self.assertEqual(
+            [booking["pk"] for booking in response.json()],
+            [booking.pk for booking in Booking.objects.for_user(self.guest)],
+        )
+
+    def test_deletes_reach_the_shards(self):
+        booking = self.book(self.rooms[0])
+        chat = ChattingRoom.objects.create()
+        message = Message.objects.create(user=self.guest, room=chat, text="Hi")
+        self.assertEqual(message._state.db, shard_for(chat.pk))
+        self.rooms[0].delete()
+        chat.delete()
+        booking.refresh_from_db()
+        self.assertIsNone(booking.room_id)
+        self.assertFalse(Message.objects.for_room(chat).exists())
+
+    def test_rebalance(self):
+        room = self.rooms[0]
+        booking = Booking.objects.using("default").create(
+            kind=Booking.BookingKindChoices.ROOM,
+            user=self.guest,
+            room=room,
+            guests=1,
+        )
+        output = io.StringIO()
+        call_command("rebalance_shards", "--dry-run", stdout=output)
+        self.assertIn("Would move 1 rows", output.getvalue())
+        call_command("rebalance_shards", stdout=io.StringIO())
+        self.assertFalse(Booking.objects.using("default").exists())
+        self.assertEqual(list(Booking.objects.for_room(room)), [booking])
+
+
+class TestQueryBudgets(TestCase):
+    """GET every route on a small and a larger dataset.
+
+    Query counts must stay within the budget and must not grow with the
+    number of rooms. New routes need a budget entry here.
+    """
+
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    DOCS_ROUTES = ("swagger<str:format>", "swagger/", "redoc/")
+    BUDGETS = {
+        "swagger<str:format>": 2,
+        "swagger/": 2,
+        "redoc/": 2,
+        "metrics": 0,
+        "profiles/<str:name>": 2,
+        "api/v1/rooms/": 5,
+        "api/v1/rooms/<int:pk>": 9,
+        "api/v1/rooms/prices": 2,
+        "api/v1/rooms/<int:pk>/reviews": 4,
+        "api/v1/rooms/<int:pk>/photos": 2,
+        "api/v1/rooms/<int:pk>/bookings": 4,
+        "api/v1/rooms/<int:pk>/amenities": 3,
+        "api/v1/rooms/<int:pk>/page": 8,
+        "api/v1/rooms/amenities/": 3,
+        "api/v1/rooms/amenities/<int:pk>": 3,
+        "api/v1/users/": 2,
+        "api/v1/users/me": 2,
+        "api/v1/users/change-password": 2,
+        "api/v1/users/log-in": 2,
+        "api/v1/users/log-out": 2,
+        "api/v1/users/token": 2,
+        "api/v1/users/@<str:username>": 3,
+        "api/v1/medias/photos/<int:pk>": 2,
+        "api/v1/medias/videos/uploads": 2,
+        "api/v1/medias/videos/uploads/<uuid:pk>": 3,
+        "api/v1/wishlists/": 6,
+        "api/v1/wishlists/<int:pk>": 6,
+        "api/v1/wishlists/<int:pk>/rooms/<int:room_pk>": 2,
+        "api/v1/categories/": 3,
+        "api/v1/categories/<int:pk>": 3,
+        "api/v1/experiences/perks/": 3,
+        "api/v1/experiences/perks/<int:pk>": 3,
+        "api/v1/moderation/queue": 4,
+        "api/v1/bookings/me": 3,
+        r"^user\-uploads/(?P<path>.*)$": 2,
+    }
+    SMALL = 2
+    LARGE = 12
+
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create(username="budget-host")
+        self.guest = User.objects.create(username="budget-guest", is_staff=True)
+        self.room = seed_dataset(self.SMALL, self.host, self.guest)
+        experience = Experience.objects.create(
+            name="Tour",
+            host=self.host,
+            price=1,
+            address="",
+            start="10:00",
+            end="12:00",
+            description="",
+        )
+        self.upload = VideoUpload.objects.create(
+            user=self.guest,
+            experience=experience,
+            filename="tour.mp4",
+            size=10,
+            checksum="0" * 64,
+        )
+        self.perk = Perk.objects.create(name="Snacks", explanation="")
+        self.client.force_login(self.guest)
+
+    def url(self, route):
+        if route.startswith("^"):
+            return "/user-uploads/missing.jpg"
+        values = {
+            "format": ".json",
+            "name": "missing.json",
+            "username": self.guest.username,
+            "room_pk": self.room.pk,
+        }
+        if route.startswith("api/v1/rooms/amenities/"):
+            values["pk"] = self.room.amenities.first().pk
+        elif route.startswith("api/v1/wishlists/"):
+            values["pk"] = self.guest.wishlists.first().pk
+        elif route.startswith("api/v1/categories/"):
+            values["pk"] = self.room.category_id
+        elif route.startswith("api/v1/experiences/perks/"):
+            values["pk"] = self.perk.pk
+        elif route.startswith("api/v1/medias/photos/"):
+            values["pk"] = self.room.photos.first().pk
+        elif route.startswith("api/v1/medias/videos/"):
+            values["pk"] = self.upload.pk
+        else:
+            values["pk"] = self.room.pk
+        return "/" + re.sub(
+            r"<(?:\w+:)?(\w+)>", lambda match: str(values[match[1]]), route
+        )
+
+    def measure(self):
+        counts = {}
+        for route, _ in iter_routes():
+            if route.startswith("admin/"):
+                continue
+            url = self.url(route)
+            # Warm up caches that are filled once per process or session.
+            self.client.get(url)
+            with QueryRecorder() as recorder:
+                response = self.client.get(url)
+            self.assertLess(response.status_code, 500, route)
+            counts[route] = recorder
+        return counts
+
+    def test_query_budgets(self):
+        small = self.measure()
+        routes = {
+            route
+            for route in self.BUDGETS
+            if settings.DOCS_ENABLED or route not in self.DOCS_ROUTES
+        }
+        self.assertEqual(set(small), routes, "Every route needs a budget")
+        seed_dataset(self.LARGE - self.SMALL, self.host, self.guest)
+        large = self.measure()
+        for route, recorder in large.items():
+            with self.subTest(route=route):
+                self.assertLessEqual(
+                    len(recorder.queries),
+                    self.BUDGETS[route],
+                    f"{route} is over its query budget:\n{recorder.report()}",
+                )
+                self.assertEqual(
+                    len(recorder.queries),
+                    len(small[route].queries),
+                    f"{route} queries grow with the number of rooms:\n"
+                    f"{recorder.report()}",
+                )
@@ -0,0 +1,375 @@
+"""In-process request tracing
+
+TracingMiddleware opens a root span per sampled request and the current
+span is tracked in a ContextVar, so nested spans need no plumbing. With
+TRACING_ENABLED, instrument() wraps APIView dispatch, authentication,
+permission and throttle checks, serializer to_representation, queryset
+evaluation, every SQL query and response rendering.
+
+Finished traces are exported as OTLP/JSON (ExportTraceServiceRequest), one
+document per trace, either appended to a file ("file:<path>") or POSTed to
+an OTLP/HTTP endpoint such as the trace_collector command.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+logger = logging.getLogger(__name__)
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+_current = ContextVar("current_span", default=None)
+
+
+class Trace:
+    __slots__ = ("trace_id", "spans", "dropped")
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.spans = []
+        self.dropped = 0
+
+
+class Span:
+    __slots__ = (
+        "trace",
+        "span_id",
+        "parent_id",
+        "name",
+        "kind",
+        "start",
+        "end",
+        "attributes",
+        "error",
+        "token",
+    )
+
+    def __init__(self, trace, name, parent_id=None, kind=SPAN_KIND_INTERNAL):
+        self.trace = trace
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attributes = {}
+        self.error = None
+        self.end = None
+        self.token = None
+        self.start = time.time_ns()
+        trace.spans.append(self)
+
+    def finish(self):
+        self.end = time.time_ns()
+
+
+def current_span():
+    return _current.get()
+
+
+@contextmanager
+def span(name, kind=SPAN_KIND_INTERNAL, **attributes):
+    """Record a child of the current span; does nothing outside a trace"""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    trace = parent.trace
+    if len(trace.spans) >= settings.TRACING_MAX_SPANS:
+        trace.dropped += 1
+        yield None
+        return
+    child = Span(trace, name, parent.span_id, kind)
+    child.attributes.update(attributes)
+    token = _current.set(child)
+    try:
+        yield child
+    except BaseException as error:
+        child.error = repr(error)
+        raise
+    finally:
+        child.finish()
+        _current.reset(token)
+
+
+def start_trace(name, traceparent=None):
+    """Open a root span if the request is sampled, else return None.
+
+    A W3C traceparent header continues the caller's trace and keeps its
+    sampling decision; otherwise TRACING_SAMPLE_RATE decides.
+    """
+    match = TRACEPARENT.match(traceparent or "")
+    if match:
+        trace_id, parent_id, flags = match.groups()
+        if not int(flags, 16) & 1:
+            return None
+    else:
+        if random.random() >= settings.TRACING_SAMPLE_RATE:
+            return None
+        trace_id, parent_id = os.urandom(16).hex(), None
+    root = Span(Trace(trace_id), name, parent_id, SPAN_KIND_SERVER)
+    root.token = _current.set(root)
+    return root
+
+
+def end_trace(root):
+    root.finish()
+    _current.reset(root.token)
+    if root.trace.dropped:
+        root.attributes["tracing.dropped_spans"] = root.trace.dropped
+    get_exporter().export(root.trace)
+
+
+def traced(name):
+    """Decorator for functions that should get a span when traced.
+
+    `name` is called with the function's arguments to name the span.
+    """
+
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if _current.get() is None:
+                return function(*args, **kwargs)
+            with span(name(*args, **kwargs)):
+                return function(*args, **kwargs)
+
+        wrapper.__wrapped_by_tracing__ = function
+        return wrapper
+
+    return decorator
+
+
+# Instrumentation
+
+
+def _view_name(method):
+    return lambda view, *args, **kwargs: f"{type(view).__name__}.{method}"
+
+
+def _serializer_name(serializer, *args, **kwargs):
+    from rest_framework.serializers import ListSerializer
+
+    if isinstance(serializer, ListSerializer):
+        return f"{type(serializer.child).__name__}(many=True)"
+    return type(serializer).__name__
+
+
+def _queryset_name(queryset, *args, **kwargs):
+    return f"QuerySet[{queryset.model.__name__}]"
+
+
+def _patch_targets():
+    from django.db.models.query import QuerySet
+    from rest_framework.response import Response
+    from rest_framework.serializers import ListSerializer, Serializer
+    from rest_framework.views import APIView
+
+    targets = [
+        (APIView, method, _view_name(method))
+        for method in (
+            "dispatch",
+            "perform_authentication",
+            "check_permissions",
+            "check_throttles",
+        )
+    ]
+    targets += [
+        (Serializer, "to_representation", _serializer_name),
+        (ListSerializer, "to_representation", _serializer_name),
+        (QuerySet, "_fetch_all", _queryset_name),
+    ]
+    return targets, Response
+
+
+def instrument():
+    """Wrap DRF and ORM entry points; safe to call more than once"""
+    targets, Response = _patch_targets()
+    for cls, attribute, name in targets:
+        function = cls.__dict__[attribute]
+        if not hasattr(function, "__wrapped_by_tracing__"):
+            setattr(cls, attribute, traced(name)(function))
+    rendered_content = Response.__dict__["rendered_content"]
+    if not hasattr(rendered_content.fget, "__wrapped_by_tracing__"):
+        Response.rendered_content = property(
+            traced(lambda response: "render")(rendered_content.fget)
+        )
+    connection_created.connect(install_query_spans, dispatch_uid="tracing")
+    for connection in connections.all(initialized_only=True):
+        install_query_spans(None, connection)
+
+
+def uninstrument():
+    targets, Response = _patch_targets()
+    for cls, attribute, name in targets:
+        function = cls.__dict__[attribute]
+        setattr(cls, attribute, getattr(function, "__wrapped_by_tracing__", function))
+    fget = Response.__dict__["rendered_content"].fget
+    Response.rendered_content = property(getattr(fget, "__wrapped_by_tracing__", fget))
+    connection_created.disconnect(dispatch_uid="tracing")
+    for connection in connections.all(initialized_only=True):
+        if query_span in connection.execute_wrappers:
+            connection.execute_wrappers.remove(query_span)
+
+
+def install_query_spans(sender, connection, **kwargs):
+    if query_span not in connection.execute_wrappers:
+        connection.execute_wrappers.append(query_span)
+
+
+def query_span(execute, sql, params, many, context):
+    if _current.get() is None:
+        return execute(sql, params, many, context)
+    connection = context["connection"]
+    with span(
+        "db.query",
+        SPAN_KIND_CLIENT,
+        **{
+            "db.system": connection.vendor,
+            "db.name": connection.alias,
+            "db.statement": sql[: settings.TRACING_MAX_STATEMENT],
+        },
+    ):
+        return execute(sql, params, many, context)
+
+
+# Export
+
+
+def _value(value):
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_json(trace):
+    """OTLP/JSON ExportTraceServiceRequest for a finished trace"""
+    spans = []
+    for item in trace.spans:
+        document = {
+            "traceId": trace.trace_id,
+            "spanId": item.span_id,
+            "name": item.name,
+            "kind": item.kind,
+            "startTimeUnixNano": str(item.start),
+            "endTimeUnixNano": str(item.end or item.start),
+            "attributes": [
+                {"key": key, "value": _value(value)}
+                for key, value in item.attributes.items()
+            ],
+            "status": {"code": STATUS_OK},
+        }
+        if item.parent_id:
+            document["parentSpanId"] = item.parent_id
+        if item.error:
+            document["status"] = {"code": STATUS_ERROR, "message": item.error}
+        spans.append(document)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {
+                            "key": "service.name",
+                            "value": _value(settings.TRACING_SERVICE_NAME),
+                        }
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class FileExporter:
+    """Appends one OTLP/JSON document per line"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, trace):
+        line = json.dumps(otlp_json(trace), separators=(",", ":"))
+        with self.lock, open(self.path, "a") as output:
+            output.write(line + "\n")
+
+
+class HttpExporter:
+    """POSTs traces to an OTLP/HTTP endpoint from a background thread.
+
+    Requests never wait for the collector; when the queue is full new
+    traces are dropped.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.queue = queue.Queue(maxsize=settings.TRACING_QUEUE_SIZE)
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def export(self, trace):
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            logger.debug("Trace queue full, dropping trace %s", trace.trace_id)
+
+    def run(self):
+        while True:
+            trace = self.queue.get()
+            request = urllib.request.Request(
+                self.url,
+                data=json.dumps(otlp_json(trace)).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            try:
+                urllib.request.urlopen(request, timeout=5).close()
+            except OSError as error:
+                logger.debug("Could not export trace %s: %s", trace.trace_id, error)
+
+
+class NullExporter:
+    def export(self, trace):
+        pass
+
+
+_exporters = {}
+_exporters_lock = threading.Lock()
+
+
+def get_exporter():
+    target = settings.TRACING_EXPORTER
+    exporter = _exporters.get(target)
+    if exporter is None:
+        with _exporters_lock:
+            exporter = _exporters.get(target)
+            if exporter is None:
+                if target.startswith("file:"):
+                    exporter = FileExporter(target[len("file:") :])
+                elif target.startswith(("http://", "https://")):
+                    exporter = HttpExporter(target)
+                else:
+                    exporter = NullExporter()
+                _exporters[target] = exporter
+    return exporter
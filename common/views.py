@@ -1,3 +1,57 @@
-from django.shortcuts import render
+import os
 
-# Create your views here.
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition, require_GET
+
+from common import schema
+from common.metrics import registry
+from common.profiling import artifact_path, check_profile_token
+
+
+@require_GET
+def metrics(request):
+    if (
+        request.META.get("REMOTE_ADDR") not in settings.METRICS_ALLOWED_IPS
+        and not request.user.is_staff
+    ):
+        return HttpResponse(status=403)
+    return HttpResponse(
+        registry.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+@require_GET
+def profile_artifact(request, name):
+    token = request.headers.get("X-Profile-Token")
+    if not (request.user.is_staff or (token and check_profile_token(token))):
+        return HttpResponse(status=403)
+    path = artifact_path(name)
+    if not settings.PROFILER_ENABLED or path is None or not os.path.exists(path):
+        raise Http404
+    return FileResponse(open(path, "rb"), as_attachment=True, filename=name)
+
+
+def schema_etag(request, format):
+    format = format.lstrip(".")
+    if format not in schema.CONTENT_TYPES:
+        return None
+    return schema.get_document(format).etag
+
+
+@require_GET
+@condition(etag_func=schema_etag)
+def openapi_schema(request, format):
+    format = format.lstrip(".")
+    if format not in schema.CONTENT_TYPES:
+        raise Http404
+    response = HttpResponse(
+        schema.get_document(format).body,
+        content_type=schema.CONTENT_TYPES[format],
+    )
+    # Clients revalidate with the ETag, which changes with every deploy
+    # that changes the schema.
+    patch_cache_control(response, no_cache=True)
+    return response
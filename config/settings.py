@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+from importlib.util import find_spec
 from pathlib import Path
 from decouple import config
 
@@ -31,13 +32,24 @@ ALLOWED_HOSTS = config(
 )
 
 
+# "all" serves everything. "api" workers leave out the admin site and the
+# API docs, so they never import django.contrib.admin or drf_yasg.
+DEPLOYMENT_ROLE = config("DEPLOYMENT_ROLE", default="all")
+
+ADMIN_ENABLED = DEPLOYMENT_ROLE != "api"
+
+DOCS_ENABLED = DEPLOYMENT_ROLE != "api"
+
+
 # Application definition
 THIRD_PARTY_APPS = [
     "rest_framework",
-    "drf_yasg",
     "corsheaders",
 ]
 
+if DOCS_ENABLED:
+    THIRD_PARTY_APPS.append("drf_yasg")
+
 CUSTOM_APPS = [
     "common.apps.CommonConfig",
     "users.apps.UsersConfig",
@@ -49,10 +61,10 @@ CUSTOM_APPS = [
     "bookings.apps.BookingsConfig",
     "medias.apps.MediasConfig",
     "direct_messages.apps.DirectMessagesConfig",
+    "moderation.apps.ModerationConfig",
 ]
 
 SYSTEM_APPS = [
-    "django.contrib.admin",
     "django.contrib.auth",
     "django.contrib.contenttypes",
     "django.contrib.sessions",
@@ -60,22 +72,76 @@ SYSTEM_APPS = [
     "django.contrib.staticfiles",
 ]
 
+if ADMIN_ENABLED:
+    SYSTEM_APPS.insert(0, "django.contrib.admin")
+
 
 INSTALLED_APPS = SYSTEM_APPS + THIRD_PARTY_APPS + CUSTOM_APPS
 
 MIDDLEWARE = [
+    "common.middleware.MetricsMiddleware",
+    "common.middleware.TracingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "django.contrib.sessions.middleware.SessionMiddleware",
+    "common.middleware.ReplicaMiddleware",
+    "common.middleware.SessionRefreshMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "common.middleware.ProfilerMiddleware",
 ]
 
 ROOT_URLCONF = "config.urls"
 
+METRICS_ALLOWED_IPS = config(
+    "METRICS_ALLOWED_IPS",
+    default="127.0.0.1",
+    cast=lambda v: [s.strip() for s in v.split(",")],
+)
+
+# Profiling
+
+PROFILER_ENABLED = config("PROFILER_ENABLED", default=False, cast=bool)
+
+PROFILER_DIR = config("PROFILER_DIR", default=str(BASE_DIR / "profiles"))
+
+PROFILER_TOKEN_MAX_AGE = config("PROFILER_TOKEN_MAX_AGE", default=60 * 60, cast=int)
+
+PROFILER_SAMPLE_INTERVAL = 0.001
+
+PROFILER_TOP_ALLOCATIONS = 50
+
+# OpenAPI
+
+# generate_schema writes swagger.json and swagger.yaml here at build time;
+# without them the schema is generated on the first request.
+OPENAPI_SCHEMA_DIR = config("OPENAPI_SCHEMA_DIR", default=str(BASE_DIR / "openapi"))
+
+# The docs pages load the cached schema instead of regenerating it.
+SWAGGER_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+
+REDOC_SETTINGS = {"SPEC_URL": ("schema-json", {"format": ".json"})}
+
+# Tracing
+
+TRACING_ENABLED = config("TRACING_ENABLED", default=False, cast=bool)
+
+# Share of requests traced when the caller sends no traceparent header
+TRACING_SAMPLE_RATE = config("TRACING_SAMPLE_RATE", default=0.01, cast=float)
+
+# "file:<path>" or an OTLP/HTTP URL such as http://127.0.0.1:4318/v1/traces
+TRACING_EXPORTER = config("TRACING_EXPORTER", default="")
+
+TRACING_SERVICE_NAME = config("TRACING_SERVICE_NAME", default="airbnb-api")
+
+TRACING_MAX_SPANS = 2000
+
+TRACING_MAX_STATEMENT = 1000
+
+TRACING_QUEUE_SIZE = 1000
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -98,14 +164,126 @@ WSGI_APPLICATION = "config.wsgi.application"
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# "production" switches SQLite to WAL with the pragmas below, persistent
+# connections and write transactions that start with BEGIN IMMEDIATE.
+DATABASE_PROFILE = config("DATABASE_PROFILE", default="development")
+
+if DATABASE_PROFILE == "production":
+    SQLITE_DATABASE = {
+        "ENGINE": "common.db.backends.sqlite3",
+        "CONN_MAX_AGE": config("CONN_MAX_AGE", default=600, cast=int),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "transaction_mode": "IMMEDIATE",
+            "begin_retries": 5,
+        },
+    }
+    # Applied to every new connection by common.db.pragmas
+    SQLITE_PRAGMAS = {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "busy_timeout": 5000,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,
+        "temp_store": "MEMORY",
+    }
+else:
+    SQLITE_DATABASE = {"ENGINE": "django.db.backends.sqlite3"}
+    SQLITE_PRAGMAS = {}
+
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
+        **SQLITE_DATABASE,
         "NAME": BASE_DIR / "db.sqlite3",
     }
 }
 
 
+# Comma-separated SQLite files that sync_replicas keeps as copies of the
+# primary. Safe reads of REPLICA_APPS go to them unless the client wrote in
+# the last REPLICA_PIN_SECONDS.
+DATABASE_REPLICAS = config(
+    "DATABASE_REPLICAS",
+    default="",
+    cast=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+)
+
+REPLICA_DATABASES = []
+
+for index, name in enumerate(DATABASE_REPLICAS):
+    alias = f"replica{index}"
+    DATABASES[alias] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+        "TEST": {"MIRROR": "default"},
+    }
+    REPLICA_DATABASES.append(alias)
+
+# Comma-separated SQLite files that hold the SHARDED_MODELS tables. Rows are
+# placed by the first shard key field that is set; see common/sharding.py.
+DATABASE_SHARDS = config(
+    "DATABASE_SHARDS",
+    default="",
+    cast=lambda v: [s.strip() for s in v.split(",") if s.strip()],
+)
+
+SHARD_DATABASES = []
+
+for index, name in enumerate(DATABASE_SHARDS):
+    alias = f"shard{index}"
+    DATABASES[alias] = {
+        **SQLITE_DATABASE,
+        "NAME": name,
+    }
+    SHARD_DATABASES.append(alias)
+
+SHARDED_MODELS = {
+    "bookings.booking": ("room_id", "experience_id"),
+    "direct_messages.message": ("room_id",),
+}
+
+DATABASE_ROUTERS = ["common.routers.ShardRouter", "common.routers.ReplicaRouter"]
+
+REPLICA_APPS = ("rooms", "experiences", "categories", "reviews")
+
+REPLICA_PIN_SECONDS = config("REPLICA_PIN_SECONDS", default=10, cast=int)
+
+# Keeps replica reads off under test; see common/testing.py
+TEST_RUNNER = "common.testing.TestRunner"
+
+
+# Queries slower than this are kept in the slow query log; 0 turns it off
+SLOW_QUERY_THRESHOLD_MS = config("SLOW_QUERY_THRESHOLD_MS", default=100, cast=float)
+
+SLOW_QUERY_LOG_SIZE = 200
+
+SLOW_QUERY_STACK_DEPTH = 8
+
+
+# Cache
+
+CACHES = {
+    "default": {
+        "BACKEND": config(
+            "CACHE_BACKEND",
+            default="django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": config("CACHE_LOCATION", default=""),
+    }
+}
+
+
+# Sessions
+
+SESSION_ENGINE = "common.sessions"
+
+SESSION_REFRESH_INTERVAL = config("SESSION_REFRESH_INTERVAL", default=60 * 60, cast=int)
+
+SESSION_BATCH_LAST_LOGIN = config("SESSION_BATCH_LAST_LOGIN", default=True, cast=bool)
+
+LAST_LOGIN_FLUSH_INTERVAL = config("LAST_LOGIN_FLUSH_INTERVAL", default=60, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -150,11 +328,77 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 # Auth
 AUTH_USER_MODEL = "users.User"
 
+# orjson and msgpack are dependencies in pyproject.toml; without msgpack
+# application/msgpack is simply not offered, and without orjson JSON goes
+# through DRF's encoder (see common/renderers.py).
+MSGPACK_ENABLED = find_spec("msgpack") is not None
+
+REST_FRAMEWORK = {
+    "DEFAULT_AUTHENTICATION_CLASSES": [
+        "users.authentication.SignedTokenAuthentication",
+        "rest_framework.authentication.SessionAuthentication",
+        "rest_framework.authentication.BasicAuthentication",
+    ],
+    "DEFAULT_RENDERER_CLASSES": [
+        "common.renderers.FastJSONRenderer",
+        *(["common.renderers.MessagePackRenderer"] if MSGPACK_ENABLED else []),
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
+    "DEFAULT_PARSER_CLASSES": [
+        "common.parsers.FastJSONParser",
+        *(["common.parsers.MessagePackParser"] if MSGPACK_ENABLED else []),
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ],
+}
+
+AUTH_TOKEN_MAX_AGE = config("AUTH_TOKEN_MAX_AGE", default=60 * 60 * 24 * 7, cast=int)
+
+USER_CACHE_TIMEOUT = config("USER_CACHE_TIMEOUT", default=60 * 15, cast=int)
+
+# Parts of GET /api/v1/rooms/<pk>/page, see rooms/cache.py
+ROOM_CACHE_TIMEOUT = config("ROOM_CACHE_TIMEOUT", default=60 * 5, cast=int)
+ROOM_CALENDAR_DAYS = 90
+
 MEDIA_ROOT = "uploads"
 MEDIA_URL = "user-uploads/"
 
+# "nginx" (X-Accel-Redirect), "sendfile" (X-Sendfile) or "" to stream from Django
+MEDIA_ACCEL = config("MEDIA_ACCEL", default="")
+
+MEDIA_ACCEL_PREFIX = config("MEDIA_ACCEL_PREFIX", default="/protected-media/")
+
+MEDIA_PRIVATE_PREFIXES = ("private/",)
+
+MEDIA_MAX_AGE = 60 * 60
+
+MEDIA_BLOCK_SIZE = 64 * 1024
+
+# Partial video uploads live outside MEDIA_ROOT so they are never served
+CHUNKED_UPLOAD_DIR = config(
+    "CHUNKED_UPLOAD_DIR", default=str(BASE_DIR / "uploads-partial")
+)
+
+CHUNKED_UPLOAD_BLOCK_SIZE = 64 * 1024
+
+THUMBNAIL_WIDTHS = (320, 640, 1280)
+
+THUMBNAIL_FORMATS = ("webp", "jpeg")
+
+THUMBNAIL_QUALITY = 80
+
+# 0 renders thumbnails inline, unset uses one process per core
+THUMBNAIL_WORKERS = config(
+    "THUMBNAIL_WORKERS",
+    default=None,
+    cast=lambda v: None if v in (None, "") else int(v),
+)
+
 PAGE_SIZE = 3
 
+# Rows serialized and rendered at a time by ?stream=1 responses and exports
+STREAM_BATCH_SIZE = config("STREAM_BATCH_SIZE", cast=int, default=500)
+
 CORS_ALLOWED_ORIGINS = ["http://127.0.0.1:3000"]
 
 CORS_ALLOW_CREDENTIALS = True
@@ -1,29 +1,40 @@
-from django.contrib import admin
-from django.urls import path, include
-from django.conf import settings
-from django.conf.urls.static import static
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
-
+import re
 
-schema_view = get_schema_view(
-    openapi.Info(
-        title="airbnb",
-        default_version="v1",
-        description="API description",
-    ),
-    public=True,
-)
+from django.urls import path, include, re_path
+from django.conf import settings
+from common.schema import ui_view
+from common.views import metrics, openapi_schema, profile_artifact
+from medias.views import serve_media
 
 urlpatterns = [
-    path('swagger<str:format>', schema_view.without_ui(cache_timeout=0), name='schema-json'),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-    path("admin/", admin.site.urls),
+    path("metrics", metrics),
+    path("profiles/<str:name>", profile_artifact),
     path("api/v1/rooms/", include("rooms.urls")),
     path("api/v1/users/", include("users.urls")),
     path("api/v1/medias/", include("medias.urls")),
     path("api/v1/wishlists/", include("wishlists.urls")),
     path("api/v1/categories/", include("categories.urls")),
     path("api/v1/experiences/", include("experiences.urls")),
-] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    path("api/v1/moderation/", include("moderation.urls")),
+    path("api/v1/bookings/", include("bookings.urls")),
+    re_path(
+        r"^%s(?P<path>.*)$" % re.escape(settings.MEDIA_URL.lstrip("/")),
+        serve_media,
+    ),
+]
+
+if settings.DOCS_ENABLED:
+    urlpatterns += [
+        path("swagger<str:format>", openapi_schema, name="schema-json"),
+        path("swagger/", ui_view("swagger"), name="schema-swagger-ui"),
+        path("redoc/", ui_view("redoc"), name="schema-redoc"),
+    ]
+
+if settings.ADMIN_ENABLED:
+    from django.contrib import admin
+    from common.admin import slow_queries
+
+    urlpatterns += [
+        path("admin/slow-queries/", slow_queries, name="slow-queries"),
+        path("admin/", admin.site.urls),
+    ]
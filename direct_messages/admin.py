@@ -6,9 +6,14 @@ from direct_messages.models import ChattingRoom, Message
 class ChattingRoomAdmin(admin.ModelAdmin):
     list_display = ("__str__", "created_at", "updated_at")
     list_filter = ("created_at",)
+    search_fields = ("=users__username",)
+    autocomplete_fields = ("users",)
 
 
 @admin.register(Message)
 class MessageAdmin(admin.ModelAdmin):
-    list_display = ("text", "user", "room", "created_at")
-    list_filter = ("created_at",)
+    list_display = ("text", "user", "room", "flagged_words", "created_at")
+    list_filter = ("is_flagged", "created_at")
+    list_select_related = ("user", "room")
+    autocomplete_fields = ("user", "room")
+    show_full_result_count = False
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.2 on 2026-10-19 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        (
+            "direct_messages",
+            "0002_alter_chattingroom_users_alter_message_room_and_more",
+        ),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="message",
+            name="flagged_words",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="message",
+            name="is_flagged",
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 4.2.2 on 2026-10-19 11:49
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from common.sharding import ShardsOnly
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("direct_messages", "0003_add_moderation_flags"),
+    ]
+
+    # Only shards drop the constraints: they do not hold the tables the
+    # foreign keys point at. See common.sharding.ShardsOnly.
+    operations = [
+        ShardsOnly(
+            migrations.AlterField(
+                model_name="message",
+                name="room",
+                field=models.ForeignKey(
+                    db_constraint=False,
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name="messages",
+                    to="direct_messages.chattingroom",
+                ),
+            )
+        ),
+        ShardsOnly(
+            migrations.AlterField(
+                model_name="message",
+                name="user",
+                field=models.ForeignKey(
+                    blank=True,
+                    db_constraint=False,
+                    null=True,
+                    on_delete=django.db.models.deletion.SET_NULL,
+                    related_name="messages",
+                    to=settings.AUTH_USER_MODEL,
+                ),
+            )
+        ),
+    ]
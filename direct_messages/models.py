@@ -1,5 +1,11 @@
 from django.db import models
 from common.models import CommonModel
+from common.sharding import ShardedManager
+
+
+class MessageManager(ShardedManager):
+    def for_room(self, room):
+        return self.for_key(room.pk).filter(room=room)
 
 
 class ChattingRoom(CommonModel):
@@ -21,12 +27,18 @@ class Message(CommonModel):
         blank=True,
         on_delete=models.SET_NULL,
         related_name="messages",
+        db_constraint=False,
     )
     room = models.ForeignKey(
         "direct_messages.ChattingRoom",
         on_delete=models.CASCADE,
         related_name="messages",
+        db_constraint=False,
     )
+    is_flagged = models.BooleanField(default=False, db_index=True)
+    flagged_words = models.CharField(max_length=255, blank=True, default="")
+
+    objects = MessageManager()
 
     def __str__(self):
         return f"{self.user} says: {self.text}"
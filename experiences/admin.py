@@ -12,6 +12,8 @@ class ExperienceAdmin(admin.ModelAdmin):
         "created_at",
     )
     list_filter = ("category",)
+    search_fields = ("name",)
+    autocomplete_fields = ("host", "perks")
 
 
 @admin.register(Perk)
@@ -21,3 +23,4 @@ class PerkAdmin(admin.ModelAdmin):
         "details",
         "explanation",
     )
+    search_fields = ("name",)
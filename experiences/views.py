@@ -3,7 +3,7 @@ from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
 from rest_framework.status import HTTP_204_NO_CONTENT
 
-from drf_yasg.utils import swagger_auto_schema
+from common.docs import swagger_auto_schema
 
 from experiences.models import Perk
 from experiences.serializers import PerkSerializer
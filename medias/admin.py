@@ -6,8 +6,10 @@ from medias.models import Photo, Video
 class PhotoAdmin(admin.ModelAdmin):
     list_display = ("id", "room", "description")
     list_display_links = ("id", "room")
+    list_select_related = ("room",)
+    autocomplete_fields = ("room", "experience")
 
 
 @admin.register(Video)
 class VideoAdmin(admin.ModelAdmin):
-    pass
+    autocomplete_fields = ("experience",)
@@ -0,0 +1,141 @@
+import logging
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from multiprocessing import get_context
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import connection
+
+from medias.storage import store_blob
+from rooms.cache import invalidate_rooms
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.THUMBNAIL_WORKERS or os.cpu_count(),
+                    mp_context=get_context("spawn"),
+                )
+    return _executor
+
+
+def render_variants(root, name, widths, formats, quality):
+    """Write resized copies of MEDIA_ROOT/name next to it.
+
+    Runs inside a worker process, so it only touches Pillow and the file
+    system. Returns [{"width", "format", "name"}] for the files written.
+    """
+    from PIL import Image, ImageOps
+
+    stem = os.path.splitext(name)[0]
+    variants = []
+    with Image.open(os.path.join(root, name)) as original:
+        # Let the JPEG decoder downscale while reading the largest width.
+        original.draft("RGB", (max(widths), max(widths)))
+        image = ImageOps.exif_transpose(original).convert("RGB")
+    usable = [width for width in sorted(widths) if width < image.width]
+    if len(usable) < len(widths):
+        usable.append(image.width)
+    for width in usable:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        for fmt in formats:
+            variant_name = f"{stem}-{width}w.{fmt}"
+            resized.save(
+                os.path.join(root, variant_name),
+                format="JPEG" if fmt == "jpeg" else fmt.upper(),
+                quality=quality,
+            )
+            variants.append({"width": width, "format": fmt, "name": variant_name})
+    return variants
+
+
+def _variant_job(name):
+    return partial(
+        render_variants,
+        os.path.abspath(settings.MEDIA_ROOT),
+        name,
+        settings.THUMBNAIL_WIDTHS,
+        settings.THUMBNAIL_FORMATS,
+        settings.THUMBNAIL_QUALITY,
+    )
+
+
+def _save_variants(blob_id, variants):
+    from medias.models import Blob, Photo
+
+    Blob.objects.filter(pk=blob_id).update(variants=variants)
+    photos = Photo.objects.filter(blob_id=blob_id)
+    photos.update(variants=variants)
+    # update() sends no signals; drop room pages cached without the srcset.
+    invalidate_rooms(
+        set(photos.filter(room__isnull=False).values_list("room_id", flat=True)),
+        parts=("detail",),
+    )
+
+
+def _store_variants(blob_id, future):
+    try:
+        variants = future.result()
+    except Exception:
+        logger.exception("Thumbnail generation failed for blob %s", blob_id)
+        return
+    try:
+        _save_variants(blob_id, variants)
+    finally:
+        connection.close()
+
+
+def schedule_variants(blob):
+    """Generate thumbnails for a stored blob off the request thread.
+
+    Returns the variants when THUMBNAIL_WORKERS is 0 and they were rendered
+    inline, None otherwise.
+    """
+    job = _variant_job(blob.name)
+    if settings.THUMBNAIL_WORKERS == 0:
+        variants = job()
+        _save_variants(blob.pk, variants)
+        return variants
+    future = get_executor().submit(job)
+    future.add_done_callback(partial(_store_variants, blob.pk))
+
+
+def save_photo_upload(upload, **fields):
+    """Store an uploaded image by content hash and create its Photo"""
+    from medias.models import Photo
+
+    blob = store_blob(upload)
+    photo = Photo.objects.create(
+        file=default_storage.url(blob.name),
+        blob=blob,
+        variants=blob.variants,
+        **fields,
+    )
+    if not blob.variants:
+        photo.variants = schedule_variants(blob) or []
+    return photo
+
+
+def srcset(variants, fmt):
+    return ", ".join(
+        f"{default_storage.url(variant['name'])} {variant['width']}w"
+        for variant in variants
+        if variant["format"] == fmt
+    )
+
+
+def srcsets(variants):
+    """{format: srcset} for every format among the variants"""
+    return {fmt: srcset(variants, fmt) for fmt in {v["format"] for v in variants}}
@@ -0,0 +1,80 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import ProtectedError
+from django.utils import timezone
+
+from medias.models import Blob
+from medias.storage import delete_blob_files
+
+
+class Command(BaseCommand):
+    help = "Delete media blobs that are no longer referenced by any Photo or Video"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--grace",
+            type=int,
+            default=60 * 60,
+            help="Seconds a blob must stay unreferenced before it is deleted",
+        )
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--interval",
+            type=int,
+            default=0,
+            help="Keep sweeping every N seconds instead of running once",
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            deleted = self.sweep(options["grace"], options["batch_size"])
+            self.stdout.write(f"Deleted {deleted} unreferenced blobs")
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
+
+    def sweep(self, grace, batch_size):
+        cutoff = timezone.now() - timedelta(seconds=grace)
+        deleted = 0
+        last_pk = 0
+        while True:
+            pks = list(
+                Blob.objects.filter(
+                    pk__gt=last_pk, ref_count__lte=0, updated_at__lte=cutoff
+                )
+                .order_by("pk")
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            if not pks:
+                return deleted
+            for pk in pks:
+                if self.collect(pk):
+                    deleted += 1
+            last_pk = pks[-1]
+
+    def collect(self, pk):
+        """Delete one blob and its files if it is still unreferenced.
+
+        The row stays locked while the files are removed, so store_blob,
+        whose UPDATE of the row waits for the lock, either takes its
+        reference first or sees the row gone and writes the file again.
+        """
+        try:
+            with transaction.atomic():
+                blob = (
+                    Blob.objects.select_for_update()
+                    .filter(pk=pk, ref_count__lte=0)
+                    .first()
+                )
+                if blob is None:
+                    return False
+                blob.delete()
+                delete_blob_files(blob)
+        except ProtectedError:
+            # A Photo or Video still points at it; the count drifted.
+            self.stderr.write(f"Blob {pk} is unreferenced but still in use")
+            return False
+        return True
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.2 on 2026-10-19 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medias", "0003_alter_photo_file_alter_video_file"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="photo",
+            name="variants",
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
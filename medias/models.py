@@ -1,10 +1,33 @@
+import uuid
+
 from django.db import models
 from common.models import CommonModel
 
 
+class Blob(CommonModel):
+    """Media file stored once per content hash"""
+
+    digest = models.CharField(max_length=64, unique=True)
+    name = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    ref_count = models.IntegerField(default=0, db_index=True)
+    variants = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return self.digest
+
+
 class Photo(CommonModel):
     file = models.URLField()
     description = models.CharField(max_length=140)
+    variants = models.JSONField(default=list, blank=True)
+    blob = models.ForeignKey(
+        "medias.Blob",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="photos",
+    )
     room = models.ForeignKey(
         "rooms.Room",
         on_delete=models.CASCADE,
@@ -26,9 +49,44 @@ class Photo(CommonModel):
 
 class Video(CommonModel):
     file = models.URLField()
+    blob = models.ForeignKey(
+        "medias.Blob",
+        on_delete=models.PROTECT,
+        null=True,
+        blank=True,
+        related_name="videos",
+    )
     experience = models.OneToOneField(
         "experiences.Experience", on_delete=models.CASCADE, related_name="videos"
     )
 
     def __str__(self):
         return "Video File"
+
+
+class VideoUpload(CommonModel):
+    """Resumable upload of an Experience video, sent in chunks"""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        "users.User", on_delete=models.CASCADE, related_name="video_uploads"
+    )
+    experience = models.ForeignKey(
+        "experiences.Experience",
+        on_delete=models.CASCADE,
+        related_name="video_uploads",
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    offset = models.PositiveBigIntegerField(default=0)
+    checksum = models.CharField(max_length=64)
+    video = models.ForeignKey(
+        "medias.Video",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="uploads",
+    )
+
+    def __str__(self):
+        return f"{self.filename} ({self.offset}/{self.size})"
@@ -1,12 +1,62 @@
+from rest_framework import serializers
 from rest_framework.serializers import ModelSerializer
-from medias.models import Photo
+from common.serializers import ValuesSerializer
+from medias.images import save_photo_upload, srcsets
+from medias.models import Photo, VideoUpload
 
 
 class PhotoSerializer(ModelSerializer):
+    srcset = serializers.SerializerMethodField()
+
     class Meta:
         model = Photo
         fields = (
             "pk",
             "file",
             "description",
+            "srcset",
+        )
+
+    def get_srcset(self, photo):
+        return srcsets(photo.variants)
+
+
+class PhotoValuesSerializer(ValuesSerializer):
+    serializer_class = PhotoSerializer
+    method_lookups = {"srcset": ["variants"]}
+
+    def get_srcset(self, row):
+        return srcsets(row["variants"])
+
+
+class PhotoUploadSerializer(ModelSerializer):
+    file = serializers.ImageField()
+
+    class Meta:
+        model = Photo
+        fields = (
+            "file",
+            "description",
+        )
+
+    def create(self, validated_data):
+        upload = validated_data.pop("file")
+        return save_photo_upload(upload, **validated_data)
+
+
+class VideoUploadSerializer(ModelSerializer):
+    class Meta:
+        model = VideoUpload
+        fields = (
+            "id",
+            "experience",
+            "filename",
+            "size",
+            "checksum",
+            "offset",
+            "video",
+        )
+        read_only_fields = (
+            "offset",
+            "video",
         )
@@ -0,0 +1,75 @@
+import os
+import re
+
+from django.conf import settings
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """Read at most `length` bytes of an open file starting at `start`"""
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """Return (start, end) for a single byte range, or None to send it all.
+
+    Multiple ranges are answered with the whole file, which RFC 9110 allows.
+    Raises ValueError for a range that cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        start, end = max(size - int(last), 0), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise ValueError
+    return start, end
+
+
+def is_content_addressed(path):
+    return path.startswith("blobs/")
+
+
+def is_private(path):
+    return path.startswith(tuple(settings.MEDIA_PRIVATE_PREFIXES))
+
+
+def has_media_permission(request, path):
+    if any(part.startswith(".") for part in path.split("/")):
+        return False
+    if is_private(path):
+        return request.user.is_staff
+    return True
+
+
+def accel_path(path):
+    return settings.MEDIA_ACCEL_PREFIX.rstrip("/") + "/" + path
+
+
+def file_etag(path, stat):
+    if is_content_addressed(path):
+        return '"%s"' % os.path.basename(path).split(".")[0]
+    return '"%x-%x"' % (stat.st_size, int(stat.st_mtime))
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from medias.models import Photo, Video
+from medias.storage import release_blob
+
+
+@receiver(post_delete, sender=Photo)
+@receiver(post_delete, sender=Video)
+def release_media_blob(sender, instance, **kwargs):
+    if instance.blob_id:
+        release_blob(instance.blob_id)
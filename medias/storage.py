@@ -0,0 +1,78 @@
+import hashlib
+import os
+
+from django.core.files.storage import default_storage
+from django.db.models import F
+from django.utils import timezone
+
+
+def blob_name(digest, extension):
+    return f"blobs/{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+def file_digest(upload):
+    sha256 = hashlib.sha256()
+    for chunk in upload.chunks():
+        sha256.update(chunk)
+    upload.seek(0)
+    return sha256.hexdigest()
+
+
+def store_blob(upload, digest=None):
+    """Store an upload by content hash and take a reference to it.
+
+    Identical bytes map to the same Blob, so they are written (and
+    thumbnailed) once no matter how many rows point at them. The file is
+    written under the Blob's name, so the first upload of a digest decides
+    its extension and later ones reuse that file. The reference is taken
+    before the file is touched, so collect_media_blobs cannot remove it in
+    between.
+    """
+    digest = digest or file_digest(upload)
+    extension = os.path.splitext(upload.name)[1].lower()
+    blob = take_blob(digest, blob_name(digest, extension), upload.size)
+    try:
+        if not default_storage.exists(blob.name):
+            saved = default_storage.save(blob.name, upload)
+            if saved != blob.name:
+                # Another upload of the same bytes wrote it first.
+                default_storage.delete(saved)
+    except Exception:
+        release_blob(blob.pk)
+        raise
+    return blob
+
+
+def take_blob(digest, name, size):
+    """Add a reference to the Blob for digest, creating it if needed.
+
+    The reference is taken with a single UPDATE rather than a locked
+    read-modify-write, so concurrent uploads of the same bytes queue on the
+    write instead of failing on SQLite, which ignores select_for_update.
+    """
+    from medias.models import Blob
+
+    while True:
+        Blob.objects.get_or_create(digest=digest, defaults={"name": name, "size": size})
+        taken = Blob.objects.filter(digest=digest).update(
+            ref_count=F("ref_count") + 1,
+            updated_at=timezone.now(),
+        )
+        if taken:
+            return Blob.objects.get(digest=digest)
+        # Swept between the two queries; create it again.
+
+
+def release_blob(blob_id):
+    """Drop a reference; unreferenced blobs are left for collect_media_blobs"""
+    from medias.models import Blob
+
+    Blob.objects.filter(pk=blob_id).update(
+        ref_count=F("ref_count") - 1,
+        updated_at=timezone.now(),
+    )
+
+
+def delete_blob_files(blob):
+    for name in [blob.name] + [variant["name"] for variant in blob.variants]:
+        default_storage.delete(name)
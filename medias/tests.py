@@ -1,3 +1,357 @@
-from django.test import TestCase
+import hashlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connections
+from django.test import RequestFactory, override_settings
+from PIL import Image
+from rest_framework.test import APITestCase
+
+from common.metrics import registry
+from common.middleware import MetricsMiddleware
+from experiences.models import Experience
+from medias.images import _save_variants
+from medias.models import Blob, Photo, Video, VideoUpload
+from medias.storage import store_blob
+from medias.uploads import partial_path, save_chunk
+from medias.views import serve_media
+from rooms.models import Room
+from users.models import User
+
+
+def make_image(width=800, height=600):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "orange").save(buffer, format="JPEG")
+    return SimpleUploadedFile("photo.jpg", buffer.getvalue(), "image/jpeg")
+
+
+class TestPhotoUpload(APITestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.media_settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            THUMBNAIL_WORKERS=0,
+        )
+        self.media_settings.enable()
+        self.owner = User.objects.create(username="host")
+        self.room = Room.objects.create(
+            name="Room",
+            price=1,
+            rooms=1,
+            toilets=1,
+            description="",
+            address="",
+            owner=self.owner,
+        )
+        self.url = f"/api/v1/rooms/{self.room.pk}/photos"
+
+    def tearDown(self):
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_upload_creates_variants(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(
+            self.url,
+            data={"file": make_image(), "description": "Front"},
+            format="multipart",
+        )
+        self.assertEqual(response.status_code, 200)
+
+        photo = Photo.objects.get(pk=response.json()["pk"])
+        self.assertEqual(
+            sorted({variant["width"] for variant in photo.variants}),
+            [320, 640, 800],
+        )
+        data = self.client.get(f"/api/v1/rooms/{self.room.pk}").json()
+        srcset = data["photos"][0]["srcset"]
+        self.assertEqual(set(srcset), {"webp", "jpeg"})
+        self.assertIn("320w", srcset["webp"])
+
+    def test_thumbnails_refresh_the_cached_room_page(self):
+        cache.clear()
+        blob = store_blob(make_image())
+        Photo.objects.create(file="", description="", blob=blob, room=self.room)
+        page = f"/api/v1/rooms/{self.room.pk}/page"
+        photo = self.client.get(page).json()["room"]["photos"][0]
+        self.assertEqual(photo["srcset"], {})
+
+        _save_variants(
+            blob.pk, [{"name": "blobs/a-320w.webp", "format": "webp", "width": 320}]
+        )
+        photo = self.client.get(page).json()["room"]["photos"][0]
+        self.assertIn("320w", photo["srcset"]["webp"])
+
+    def test_upload_rejects_non_images(self):
+        self.client.force_authenticate(self.owner)
+        response = self.client.post(
+            self.url,
+            data={
+                "file": SimpleUploadedFile("photo.jpg", b"nope", "image/jpeg"),
+                "description": "Broken",
+            },
+            format="multipart",
+        )
+        self.assertFalse(Photo.objects.exists())
+
+    def test_identical_uploads_share_a_blob(self):
+        self.client.force_authenticate(self.owner)
+        image = make_image()
+        for _ in range(2):
+            image.seek(0)
+            self.client.post(
+                self.url,
+                data={"file": image, "description": "Same"},
+                format="multipart",
+            )
+        self.assertEqual(Photo.objects.count(), 2)
+        blob = Blob.objects.get()
+        self.assertEqual(blob.ref_count, 2)
+        self.assertTrue(all(photo.variants for photo in Photo.objects.all()))
+
+        photos = list(Photo.objects.all())
+        self.client.delete(f"/api/v1/medias/photos/{photos[0].pk}")
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 1)
+
+        self.client.delete(f"/api/v1/medias/photos/{photos[1].pk}")
+        blob.refresh_from_db()
+        self.assertEqual(blob.ref_count, 0)
+        path = os.path.join(self.media_root, blob.name)
+        self.assertTrue(os.path.exists(path))
+
+        call_command("collect_media_blobs", grace=0, stdout=io.StringIO())
+        self.assertFalse(Blob.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_same_bytes_under_another_extension_share_the_file(self):
+        content = make_image().read()
+        first = store_blob(SimpleUploadedFile("a.jpg", content))
+        second = store_blob(SimpleUploadedFile("b.jpeg", content))
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Blob.objects.get().ref_count, 2)
+        stored = [name for _, _, names in os.walk(self.media_root) for name in names]
+        self.assertEqual(stored, [os.path.basename(first.name)])
+
+    def test_concurrent_identical_uploads_share_a_blob(self):
+        content = make_image().read()
+        database = os.path.join(self.media_root, "blobs.sqlite3")
+        errors = []
+
+        def in_thread(target):
+            def run():
+                try:
+                    target()
+                except Exception as error:
+                    errors.append(error)
+                finally:
+                    connections.close_all()
+
+            return threading.Thread(target=run)
+
+        def create_table():
+            with connections["default"].schema_editor() as editor:
+                editor.create_model(Blob)
+
+        start = threading.Barrier(4)
+
+        def upload():
+            start.wait()
+            store_blob(SimpleUploadedFile("photo.jpg", content))
+
+        # New connections in other threads open the file, not the test database.
+        with mock.patch.dict(connections.settings["default"], NAME=database):
+            setup = in_thread(create_table)
+            setup.start()
+            setup.join()
+            uploads = [in_thread(upload) for _ in range(start.parties)]
+            for thread in uploads:
+                thread.start()
+            for thread in uploads:
+                thread.join()
+
+            self.assertEqual(errors, [])
+            with sqlite3.connect(database) as db:
+                rows = db.execute("SELECT ref_count FROM medias_blob").fetchall()
+        self.assertEqual(rows, [(start.parties,)])
+
+    def test_sweep_skips_blobs_still_in_use(self):
+        blob = store_blob(make_image())
+        Photo.objects.create(file="", description="", blob=blob)
+        Blob.objects.filter(pk=blob.pk).update(ref_count=0)
+        stderr = io.StringIO()
+        call_command(
+            "collect_media_blobs", grace=0, stdout=io.StringIO(), stderr=stderr
+        )
+        self.assertTrue(Blob.objects.filter(pk=blob.pk).exists())
+        self.assertTrue(os.path.exists(os.path.join(self.media_root, blob.name)))
+        self.assertIn("still in use", stderr.getvalue())
+
+
+class TestServeMedia(APITestCase):
+    CONTENT = bytes(range(256)) * 4
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.media_settings = override_settings(MEDIA_ROOT=self.media_root)
+        self.media_settings.enable()
+        os.makedirs(os.path.join(self.media_root, "blobs", "ab"))
+        with open(os.path.join(self.media_root, "blobs", "ab", "abcd.bin"), "wb") as f:
+            f.write(self.CONTENT)
+        self.url = "/user-uploads/blobs/ab/abcd.bin"
+
+    def tearDown(self):
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def test_full_file(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENT)
+        self.assertIn("immutable", response["Cache-Control"])
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_file_responses_keep_the_file_wrapper(self):
+        # The test client wraps streaming bodies itself, so call the
+        # middleware directly.
+        request = RequestFactory().get(self.url)
+        middleware = MetricsMiddleware(
+            lambda request: serve_media(request, "blobs/ab/abcd.bin")
+        )
+        stats = registry.stats("unmatched", "GET")
+        before = stats.response_bytes
+        response = middleware(request)
+        self.assertIsNotNone(response.file_to_stream)
+        self.assertEqual(stats.response_bytes - before, len(self.CONTENT))
+        response.close()
+
+    def test_byte_range(self):
+        response = self.client.get(self.url, HTTP_RANGE="bytes=10-19")
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response["Content-Range"], "bytes 10-19/1024")
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENT[10:20])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=-4")
+        self.assertEqual(b"".join(response.streaming_content), self.CONTENT[-4:])
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=5000-")
+        self.assertEqual(response.status_code, 416)
+
+    @override_settings(MEDIA_ACCEL="nginx")
+    def test_accel_redirect(self):
+        response = self.client.get(self.url)
+        self.assertEqual(
+            response["X-Accel-Redirect"], "/protected-media/blobs/ab/abcd.bin"
+        )
+        self.assertEqual(response.content, b"")
+
+    def test_path_traversal(self):
+        response = self.client.get("/user-uploads/../manage.py")
+        self.assertEqual(response.status_code, 404)
+
+    def test_private_files_are_not_publicly_cacheable(self):
+        os.makedirs(os.path.join(self.media_root, "private"))
+        with open(os.path.join(self.media_root, "private", "id.pdf"), "wb") as f:
+            f.write(self.CONTENT)
+        url = "/user-uploads/private/id.pdf"
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+        self.client.force_login(User.objects.create(username="staff", is_staff=True))
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("public", response["Cache-Control"])
+        self.assertIn("no-store", response["Cache-Control"])
+        self.assertIn("Cookie", response["Vary"])
+
+
+class TestVideoUpload(APITestCase):
+    CONTENT = os.urandom(200_000)
+    URL = "/api/v1/medias/videos/uploads"
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.media_settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            CHUNKED_UPLOAD_DIR=os.path.join(self.media_root, "partial"),
+        )
+        self.media_settings.enable()
+        self.host = User.objects.create(username="host")
+        self.experience = Experience.objects.create(
+            name="Tour",
+            host=self.host,
+            price=1,
+            address="",
+            start="10:00",
+            end="12:00",
+            description="",
+        )
+        self.client.force_authenticate(self.host)
+
+    def tearDown(self):
+        self.media_settings.disable()
+        shutil.rmtree(self.media_root)
+
+    def start(self, checksum=None):
+        response = self.client.post(
+            self.URL,
+            data={
+                "experience": self.experience.pk,
+                "filename": "tour.mp4",
+                "size": len(self.CONTENT),
+                "checksum": checksum or hashlib.sha256(self.CONTENT).hexdigest(),
+            },
+        )
+        self.assertEqual(response.status_code, 201)
+        return f"{self.URL}/{response.json()['id']}"
+
+    def send(self, url, offset, chunk):
+        return self.client.patch(
+            url,
+            data=chunk,
+            content_type="application/offset+octet-stream",
+            HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def test_chunked_upload(self):
+        url = self.start()
+        response = self.send(url, 0, self.CONTENT[:150_000])
+        self.assertEqual(response.json()["offset"], 150_000)
+
+        response = self.send(url, 0, self.CONTENT[:10])
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.client.get(url).json()["offset"], 150_000)
+
+        response = self.send(url, 150_000, self.CONTENT[150_000:])
+        self.assertEqual(response.status_code, 200)
+        video = Video.objects.get(experience=self.experience)
+        self.assertEqual(response.json()["video"], video.pk)
+        with open(os.path.join(self.media_root, video.blob.name), "rb") as f:
+            self.assertEqual(f.read(), self.CONTENT)
+        self.assertFalse(os.listdir(os.path.join(self.media_root, "partial")))
+
+    def test_losing_a_race_for_the_offset_writes_nothing(self):
+        url = self.start()
+        self.send(url, 0, self.CONTENT[:100])
+        first, second = VideoUpload.objects.get(), VideoUpload.objects.get()
+        self.assertEqual(save_chunk(first, io.BytesIO(b"x" * 50), 50), 50)
+        self.assertIsNone(save_chunk(second, io.BytesIO(b"y" * 50), 50))
+        with open(partial_path(first), "rb") as f:
+            self.assertEqual(f.read(), self.CONTENT[:100] + b"x" * 50)
+        self.assertEqual(VideoUpload.objects.get().offset, 150)
+
+    def test_checksum_mismatch_restarts(self):
+        url = self.start(checksum="0" * 64)
+        response = self.send(url, 0, self.CONTENT)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(VideoUpload.objects.get().offset, 0)
+        self.assertFalse(Video.objects.exists())
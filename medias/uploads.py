@@ -0,0 +1,114 @@
+import hashlib
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from medias.storage import release_blob, store_blob
+
+
+class PartialFile(File):
+    """Finished chunk file; FileSystemStorage moves it instead of copying"""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+def partial_path(upload):
+    return os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{upload.pk}.part")
+
+
+def save_chunk(upload, stream, length):
+    """Append `length` bytes from the request stream at upload.offset.
+
+    The bytes are spooled to a temporary file first. The offset is then
+    claimed with a conditional UPDATE, and the chunk is only appended to the
+    partial file by the request that won it, inside the same transaction, so
+    two requests racing for one offset cannot both write. Reads in
+    CHUNKED_UPLOAD_BLOCK_SIZE blocks, so memory use does not depend on the
+    chunk or file size. Returns the number of bytes written, or None when
+    another request claimed the offset first.
+    """
+    from medias.models import VideoUpload
+
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    with tempfile.TemporaryFile(dir=settings.CHUNKED_UPLOAD_DIR) as chunk:
+        written = copy_blocks(stream, chunk, length)
+        chunk.seek(0)
+        with transaction.atomic():
+            claimed = VideoUpload.objects.filter(
+                pk=upload.pk, offset=upload.offset
+            ).update(offset=upload.offset + written)
+            if not claimed:
+                return None
+            path = partial_path(upload)
+            with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+                f.seek(upload.offset)
+                copy_blocks(chunk, f, written)
+                f.truncate()
+    return written
+
+
+def copy_blocks(source, target, length):
+    copied = 0
+    while copied < length:
+        block = source.read(min(settings.CHUNKED_UPLOAD_BLOCK_SIZE, length - copied))
+        if not block:
+            break
+        target.write(block)
+        copied += len(block)
+    return copied
+
+
+def file_checksum(path):
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(settings.CHUNKED_UPLOAD_BLOCK_SIZE), b""):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def discard(upload):
+    try:
+        os.remove(partial_path(upload))
+    except FileNotFoundError:
+        pass
+
+
+def complete(upload):
+    """Store the finished file as a Blob and attach it to the Experience video.
+
+    Returns None when the checksum does not match; the partial file is then
+    discarded and the upload starts over from offset 0.
+    """
+    from medias.models import Video
+
+    path = partial_path(upload)
+    digest = file_checksum(path)
+    if digest != upload.checksum:
+        discard(upload)
+        upload.offset = 0
+        upload.save(update_fields=["offset", "updated_at"])
+        return None
+    with open(path, "rb") as f:
+        blob = store_blob(PartialFile(f, name=upload.filename), digest=digest)
+    discard(upload)
+    with transaction.atomic():
+        video = (
+            Video.objects.select_for_update()
+            .filter(experience=upload.experience)
+            .first()
+        )
+        if video is None:
+            video = Video(experience=upload.experience)
+        elif video.blob_id:
+            release_blob(video.blob_id)
+        video.blob = blob
+        video.file = default_storage.url(blob.name)
+        video.save()
+        upload.video = video
+        upload.save(update_fields=["video", "updated_at"])
+    return video
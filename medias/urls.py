@@ -1,6 +1,8 @@
 from django.urls import path
-from medias.views import PhotoDetail
+from medias.views import PhotoDetail, VideoUploadDetail, VideoUploads
 
 urlpatterns = [
     path("photos/<int:pk>", PhotoDetail.as_view()),
-]
\ No newline at end of file
+    path("videos/uploads", VideoUploads.as_view()),
+    path("videos/uploads/<uuid:pk>", VideoUploadDetail.as_view()),
+]
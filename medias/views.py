@@ -1,9 +1,31 @@
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import NotFound, PermissionDenied
-from medias.models import Photo
+from rest_framework.exceptions import NotFound, ParseError, PermissionDenied
+from medias import uploads
+from medias.models import Photo, VideoUpload
+from medias.serializers import VideoUploadSerializer
+from medias.serving import (
+    RangeFile,
+    accel_path,
+    file_etag,
+    has_media_permission,
+    is_content_addressed,
+    is_private,
+    parse_range,
+)
 
 
 class PhotoDetail(APIView):
@@ -25,3 +47,169 @@ class PhotoDetail(APIView):
             raise PermissionDenied
         photo.delete()
         return Response(status=status.HTTP_200_OK)
+
+
+class VideoUploads(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = VideoUploadSerializer(data=request.data)
+        if serializer.is_valid():
+            if serializer.validated_data["experience"].host != request.user:
+                raise PermissionDenied
+            upload = serializer.save(user=request.user)
+            return Response(
+                VideoUploadSerializer(upload).data,
+                status=status.HTTP_201_CREATED,
+                headers={"Upload-Offset": upload.offset},
+            )
+        else:
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class VideoUploadDetail(APIView):
+    """Resumable upload protocol.
+
+    PATCH sends the next chunk as the raw request body, with the byte position
+    it starts at in an Upload-Offset header. GET reports the offset to resume
+    from. The Video is created once the last byte arrives and the checksum
+    matches.
+    """
+
+    permission_classes = [IsAuthenticated]
+
+    def get_object(self, pk, user):
+        try:
+            return VideoUpload.objects.select_related("experience").get(
+                pk=pk, user=user
+            )
+        except VideoUpload.DoesNotExist:
+            raise NotFound
+
+    def get(self, request, pk):
+        upload = self.get_object(pk, request.user)
+        return Response(
+            VideoUploadSerializer(upload).data,
+            headers={"Upload-Offset": upload.offset},
+        )
+
+    def patch(self, request, pk):
+        upload = self.get_object(pk, request.user)
+        if upload.video_id:
+            return Response(VideoUploadSerializer(upload).data)
+        try:
+            offset = int(request.headers["Upload-Offset"])
+            length = int(request.headers["Content-Length"])
+        except (KeyError, ValueError):
+            raise ParseError("Upload-Offset and Content-Length are required.")
+        if offset != upload.offset:
+            return Response(
+                {"offset": upload.offset},
+                status=status.HTTP_409_CONFLICT,
+                headers={"Upload-Offset": upload.offset},
+            )
+        if offset + length > upload.size:
+            raise ParseError("Chunk goes past the declared size.")
+        written = uploads.save_chunk(upload, request.stream, length)
+        if written is None:
+            upload.refresh_from_db(fields=["offset"])
+            return Response(
+                {"offset": upload.offset},
+                status=status.HTTP_409_CONFLICT,
+                headers={"Upload-Offset": upload.offset},
+            )
+        upload.offset = offset + written
+        if upload.offset == upload.size and uploads.complete(upload) is None:
+            return Response(
+                {"checksum": "Checksum mismatch, upload restarted."},
+                status=status.HTTP_400_BAD_REQUEST,
+                headers={"Upload-Offset": 0},
+            )
+        return Response(
+            VideoUploadSerializer(upload).data,
+            headers={"Upload-Offset": upload.offset},
+        )
+
+    def delete(self, request, pk):
+        upload = self.get_object(pk, request.user)
+        uploads.discard(upload)
+        upload.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+@require_safe
+def serve_media(request, path):
+    """Serve MEDIA_ROOT files.
+
+    With MEDIA_ACCEL set the bytes are handed off to the front server through
+    X-Accel-Redirect (nginx) or X-Sendfile (Apache, lighttpd); otherwise they
+    are streamed with FileResponse, honouring single byte ranges.
+    """
+    try:
+        full_path = safe_join(os.path.abspath(settings.MEDIA_ROOT), path)
+        stat = os.stat(full_path)
+    except (OSError, SuspiciousFileOperation):
+        raise Http404
+    if not os.path.isfile(full_path) or not has_media_permission(request, path):
+        raise Http404
+
+    etag = file_etag(path, stat)
+    content_type, _ = mimetypes.guess_type(full_path)
+    content_type = content_type or "application/octet-stream"
+    if _not_modified(request, etag, stat):
+        response = HttpResponseNotModified()
+    elif settings.MEDIA_ACCEL == "nginx":
+        response = HttpResponse(content_type=content_type)
+        response["X-Accel-Redirect"] = quote(accel_path(path))
+    elif settings.MEDIA_ACCEL == "sendfile":
+        response = HttpResponse(content_type=content_type)
+        response["X-Sendfile"] = full_path
+    else:
+        response = _file_response(request, full_path, stat, etag, content_type)
+
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(stat.st_mtime)
+    response["Accept-Ranges"] = "bytes"
+    if is_private(path):
+        # Staff-only: never let a shared cache keep it for someone else.
+        patch_cache_control(response, private=True, no_store=True)
+        patch_vary_headers(response, ["Cookie", "Authorization"])
+    elif is_content_addressed(path):
+        patch_cache_control(response, public=True, max_age=31536000, immutable=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.MEDIA_MAX_AGE)
+    return response
+
+
+def _not_modified(request, etag, stat):
+    if "If-None-Match" in request.headers:
+        return request.headers["If-None-Match"] == etag
+    modified_since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return modified_since is not None and modified_since >= int(stat.st_mtime)
+
+
+def _file_response(request, full_path, stat, etag, content_type):
+    size = stat.st_size
+    byte_range = None
+    range_header = request.headers.get("Range")
+    if_range = request.headers.get("If-Range")
+    if range_header and (not if_range or if_range == etag):
+        try:
+            byte_range = parse_range(range_header, size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            return response
+    if byte_range is None:
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(
+            RangeFile(open(full_path, "rb"), start, end - start + 1),
+            status=206,
+            content_type=content_type,
+        )
+        response["Content-Length"] = end - start + 1
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+    response.block_size = settings.MEDIA_BLOCK_SIZE
+    return response
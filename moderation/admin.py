@@ -0,0 +1,17 @@
+from django.contrib import admin
+from moderation.models import BlockedWord
+from moderation.scanner import schedule_rebuild
+
+
+@admin.action(description="Rebuild moderation flags")
+def rebuild_flags(model_admin, request, words):
+    schedule_rebuild()
+    model_admin.message_user(request, "Rebuilding flags in the background.")
+
+
+@admin.register(BlockedWord)
+class BlockedWordAdmin(admin.ModelAdmin):
+    actions = (rebuild_flags,)
+    list_display = ("word", "is_active", "created_at")
+    list_filter = ("is_active",)
+    search_fields = ("word",)
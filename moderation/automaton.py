@@ -0,0 +1,53 @@
+from collections import deque
+
+
+class Automaton:
+    """Aho-Corasick matcher: finds every listed word in one pass over a text"""
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.fail = [0]
+        self.outputs = [()]
+        for word in words:
+            self._add(word.lower())
+        self._link()
+
+    def _add(self, word):
+        if not word:
+            return
+        state = 0
+        for char in word:
+            next_state = self.transitions[state].get(char)
+            if next_state is None:
+                next_state = len(self.transitions)
+                self.transitions.append({})
+                self.fail.append(0)
+                self.outputs.append(())
+                self.transitions[state][char] = next_state
+            state = next_state
+        self.outputs[state] = (word,)
+
+    def _link(self):
+        queue = deque(self.transitions[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.transitions[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.transitions[fallback].get(char, 0)
+                self.outputs[next_state] += self.outputs[self.fail[next_state]]
+
+    def find(self, text):
+        """Return the set of words that occur in text, case-insensitively"""
+        found = set()
+        state = 0
+        transitions, fail, outputs = self.transitions, self.fail, self.outputs
+        for char in text.lower():
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if outputs[state]:
+                found.update(outputs[state])
+        return found
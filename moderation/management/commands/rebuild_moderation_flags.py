@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from moderation.scanner import rebuild_flags
+
+
+class Command(BaseCommand):
+    help = "Rescan reviews and messages against the blocked word list"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        updated = rebuild_flags(chunk_size=options["chunk_size"])
+        self.stdout.write(f"Updated flags on {updated} rows")
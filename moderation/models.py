@@ -0,0 +1,12 @@
+from django.db import models
+from common.models import CommonModel
+
+
+class BlockedWord(CommonModel):
+    """Word that flags a Review or Message for moderation"""
+
+    word = models.CharField(max_length=100, unique=True)
+    is_active = models.BooleanField(default=True)
+
+    def __str__(self):
+        return self.word
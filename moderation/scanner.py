@@ -0,0 +1,120 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import connections
+
+from common.sharding import is_sharded, shard_databases
+from moderation.automaton import Automaton
+
+VERSION_KEY = "moderation:words-version"
+
+_automaton = None
+_version = None
+_automaton_lock = threading.Lock()
+
+
+def bump_version():
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_automaton():
+    """Automaton for the active word list, rebuilt when the list changes"""
+    global _automaton, _version
+    from moderation.models import BlockedWord
+
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(VERSION_KEY, version, None)
+        version = cache.get(VERSION_KEY, version)
+    if _automaton is None or version != _version:
+        with _automaton_lock:
+            if _automaton is None or version != _version:
+                words = BlockedWord.objects.filter(is_active=True).values_list(
+                    "word", flat=True
+                )
+                _automaton = Automaton(words)
+                _version = version
+    return _automaton
+
+
+def scan(text):
+    """Return (is_flagged, flagged_words) for a text"""
+    words = sorted(get_automaton().find(text or ""))
+    return bool(words), ",".join(words)[:255]
+
+
+def moderated_models():
+    from direct_messages.models import Message
+    from reviews.models import Review
+
+    return [(Review, "payload"), (Message, "text")]
+
+
+def rebuild_flags(chunk_size=1000):
+    """Rescan every Review and Message in pk order, chunk by chunk.
+
+    Messages are rescanned on every shard.
+
+    Only rows whose flags change are written. Returns the number of rows
+    updated.
+    """
+    updated = 0
+    for model, field in moderated_models():
+        databases = shard_databases() if is_sharded(model) else ["default"]
+        for alias in databases:
+            updated += _rebuild_model(model.objects.using(alias), field, chunk_size)
+    return updated
+
+
+def _rebuild_model(queryset, field, chunk_size):
+    model = queryset.model
+    updated = 0
+    last_pk = 0
+    while True:
+        rows = list(
+            queryset.filter(pk__gt=last_pk)
+            .order_by("pk")
+            .values_list("pk", field, "is_flagged", "flagged_words")[:chunk_size]
+        )
+        if not rows:
+            break
+        changed = []
+        for pk, text, is_flagged, flagged_words in rows:
+            flags = scan(text)
+            if flags != (is_flagged, flagged_words):
+                changed.append(
+                    model(pk=pk, is_flagged=flags[0], flagged_words=flags[1])
+                )
+        queryset.bulk_update(changed, ["is_flagged", "flagged_words"])
+        updated += len(changed)
+        last_pk = rows[-1][0]
+    return updated
+
+
+_rebuild_running = threading.Lock()
+_rebuild_pending = threading.Event()
+
+
+def schedule_rebuild():
+    """Run rebuild_flags in a background thread.
+
+    Changes that arrive while a rebuild is running are coalesced into one
+    more pass.
+    """
+    _rebuild_pending.set()
+    if _rebuild_running.acquire(blocking=False):
+        threading.Thread(target=_rebuild_loop, daemon=True).start()
+
+
+def _rebuild_loop():
+    try:
+        while _rebuild_pending.is_set():
+            _rebuild_pending.clear()
+            rebuild_flags()
+    finally:
+        connections.close_all()
+        _rebuild_running.release()
+    if _rebuild_pending.is_set():
+        schedule_rebuild()
@@ -0,0 +1,35 @@
+from rest_framework import serializers
+from direct_messages.models import Message
+from reviews.models import Review
+from users.serializers import TinyUserSerializer
+
+
+class FlaggedReviewSerializer(serializers.ModelSerializer):
+    user = TinyUserSerializer(read_only=True)
+
+    class Meta:
+        model = Review
+        fields = (
+            "pk",
+            "user",
+            "room",
+            "experience",
+            "payload",
+            "flagged_words",
+            "created_at",
+        )
+
+
+class FlaggedMessageSerializer(serializers.ModelSerializer):
+    user = TinyUserSerializer(read_only=True)
+
+    class Meta:
+        model = Message
+        fields = (
+            "pk",
+            "user",
+            "room",
+            "text",
+            "flagged_words",
+            "created_at",
+        )
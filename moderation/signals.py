@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from direct_messages.models import Message
+from moderation.models import BlockedWord
+from moderation.scanner import bump_version, scan, schedule_rebuild
+from reviews.models import Review
+
+
+@receiver(pre_save, sender=Review)
+def flag_review(sender, instance, **kwargs):
+    instance.is_flagged, instance.flagged_words = scan(instance.payload)
+
+
+@receiver(pre_save, sender=Message)
+def flag_message(sender, instance, **kwargs):
+    instance.is_flagged, instance.flagged_words = scan(instance.text)
+
+
+@receiver(post_save, sender=BlockedWord)
+@receiver(post_delete, sender=BlockedWord)
+def word_list_changed(sender, **kwargs):
+    bump_version()
+    transaction.on_commit(word_list_committed)
+
+
+def word_list_committed():
+    # Bump again: another process may have rebuilt from the old rows while
+    # the transaction was still open.
+    bump_version()
+    schedule_rebuild()
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from direct_messages.models import ChattingRoom, Message
+from moderation.automaton import Automaton
+from moderation.models import BlockedWord
+from moderation.scanner import rebuild_flags
+from reviews.models import Review
+from users.models import User
+
+
+class TestAutomaton(APITestCase):
+    def test_overlapping_words(self):
+        automaton = Automaton(["he", "she", "his", "hers"])
+        self.assertEqual(automaton.find("ushers"), {"she", "he", "hers"})
+        self.assertEqual(automaton.find("SHE"), {"she", "he"})
+        self.assertEqual(automaton.find("nothing"), set())
+
+
+class TestModeration(APITestCase):
+    URL = "/api/v1/moderation/queue"
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username="guest")
+        BlockedWord.objects.create(word="scam")
+        BlockedWord.objects.create(word="spam")
+
+    def test_flags_computed_on_write(self):
+        review = Review.objects.create(
+            user=self.user, payload="Total SCAM and spam", rating=1
+        )
+        self.assertTrue(review.is_flagged)
+        self.assertEqual(review.flagged_words, "scam,spam")
+
+        review.payload = "Lovely stay"
+        review.save()
+        self.assertFalse(Review.objects.get(pk=review.pk).is_flagged)
+
+        room = ChattingRoom.objects.create()
+        message = Message.objects.create(user=self.user, room=room, text="spam!")
+        self.assertTrue(message.is_flagged)
+
+    def test_rebuild_after_word_list_change(self):
+        review = Review.objects.create(user=self.user, payload="fake photos", rating=1)
+        self.assertFalse(review.is_flagged)
+
+        BlockedWord.objects.create(word="fake")
+        self.assertEqual(rebuild_flags(chunk_size=1), 1)
+        self.assertTrue(Review.objects.get(pk=review.pk).is_flagged)
+
+    def test_queue(self):
+        Review.objects.create(user=self.user, payload="scam", rating=1)
+        Review.objects.create(user=self.user, payload="fine", rating=5)
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 401)
+
+        self.client.force_authenticate(
+            User.objects.create(username="staff", is_staff=True)
+        )
+        data = self.client.get(self.URL).json()
+        self.assertEqual([review["payload"] for review in data["reviews"]], ["scam"])
+        self.assertEqual(data["messages"], [])
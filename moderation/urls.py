@@ -0,0 +1,6 @@
+from django.urls import path
+from moderation.views import ModerationQueue
+
+urlpatterns = [
+    path("queue", ModerationQueue.as_view()),
+]
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.db.models import prefetch_related_objects
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from direct_messages.models import Message
+from moderation.serializers import FlaggedMessageSerializer, FlaggedReviewSerializer
+from reviews.models import Review
+
+
+class ModerationQueue(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        try:
+            page = request.query_params.get("page", 1)
+            page = int(page)
+        except ValueError:
+            page = 1
+        page_size = settings.PAGE_SIZE
+        start = (page - 1) * page_size
+        end = start + page_size
+        reviews = (
+            Review.objects.filter(is_flagged=True)
+            .select_related("user")
+            .order_by("-pk")[start:end]
+        )
+        # Messages may be spread over shards, so the users are fetched
+        # separately instead of joined.
+        messages = Message.objects.across_shards(
+            order_by="-created_at", limit=end, is_flagged=True
+        )[start:]
+        prefetch_related_objects(messages, "user")
+        return Response(
+            {
+                "reviews": FlaggedReviewSerializer(reviews, many=True).data,
+                "messages": FlaggedMessageSerializer(messages, many=True).data,
+            }
+        )
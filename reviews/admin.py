@@ -1,35 +1,46 @@
 from django.contrib import admin
+from common.admin import export_json
 from reviews.models import Review
 
 
-class WordFilter(admin.SimpleListFilter):
-    
-    title = "Filter by words!"
+class FlaggedFilter(admin.SimpleListFilter):
 
-    parameter_name = "word"
+    title = "Filter by moderation flags!"
+
+    parameter_name = "flagged"
 
     def lookups(self, request, model_admin):
         return [
-            ("good", "Good"),
-            ("great", "Great"),
-            ("awesome", "Awesome"),
+            ("yes", "Flagged"),
+            ("no", "Clean"),
         ]
 
     def queryset(self, request, reviews):
-        word = self.value()
-        if word:
-            return reviews.filter(payload__contains=word)
+        value = self.value()
+        if value:
+            return reviews.filter(is_flagged=value == "yes")
         else:
-            reviews 
+            return reviews
 
 
 @admin.register(Review)
 class ReviewAdmin(admin.ModelAdmin):
-    list_display = ("__str__", "payload")
+    actions = (export_json,)
+    list_display = ("__str__", "payload", "flagged_words")
     list_filter = (
-        WordFilter,
+        FlaggedFilter,
         "rating",
         "user__is_host",
         "room__category",
         "room__pet_friendly",
     )
+
+    list_select_related = ("user",)
+
+    autocomplete_fields = (
+        "user",
+        "room",
+        "experience",
+    )
+
+    show_full_result_count = False
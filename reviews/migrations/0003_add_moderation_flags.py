@@ -0,0 +1,23 @@
+# Generated by Django 4.2.2 on 2026-10-19 11:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0002_alter_review_experience_alter_review_room_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="review",
+            name="flagged_words",
+            field=models.CharField(blank=True, default="", max_length=255),
+        ),
+        migrations.AddField(
+            model_name="review",
+            name="is_flagged",
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+    ]
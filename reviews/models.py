@@ -24,6 +24,8 @@ class Review(CommonModel):
     )
     payload = models.TextField()
     rating = models.PositiveIntegerField()
+    is_flagged = models.BooleanField(default=False, db_index=True)
+    flagged_words = models.CharField(max_length=255, blank=True, default="")
 
     def __str__(self):
         return f"{self.user} / {self.rating}"
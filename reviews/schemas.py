@@ -1,4 +1,4 @@
-from drf_yasg import openapi
+from common.docs import openapi
 
 review_request_body = openapi.Schema(
     type=openapi.TYPE_OBJECT,
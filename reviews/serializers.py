@@ -1,4 +1,5 @@
 from rest_framework import serializers
+from common.serializers import ValuesSerializer
 from users.serializers import TinyUserSerializer
 from reviews.models import Review
 
@@ -13,3 +14,7 @@ class ReviewSerializer(serializers.ModelSerializer):
             "payload",
             "rating",
         )
+
+
+class ReviewValuesSerializer(ValuesSerializer):
+    serializer_class = ReviewSerializer
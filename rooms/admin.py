@@ -1,18 +1,47 @@
 from django.contrib import admin
+from django.utils import timezone
+from common.admin import export_json
+from rooms.cache import invalidate_rooms
 from rooms.models import Room, Amenity
 
 
 @admin.action(description="Set all prices to zero")
 def reset_prices(model_admin, request, rooms):
-    for room in rooms.all():
-        room.price = 0
-        room.save()
+    pks = list(rooms.values_list("pk", flat=True))
+    rooms.update(price=0, updated_at=timezone.now())
+    invalidate_rooms(pks)
+
+
+@admin.action(description="Raise prices by 10%%")
+def raise_prices(model_admin, request, rooms):
+    pks = list(rooms.values_list("pk", flat=True))
+    rooms.adjust_prices(percent=10)
+    invalidate_rooms(pks)
+
+
+@admin.action(description="Lower prices by 10%%")
+def lower_prices(model_admin, request, rooms):
+    pks = list(rooms.values_list("pk", flat=True))
+    rooms.adjust_prices(percent=-10)
+    invalidate_rooms(pks)
 
 
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
 
-    actions = (reset_prices,)
+    actions = (
+        reset_prices,
+        raise_prices,
+        lower_prices,
+        export_json,
+    )
+
+    list_select_related = ("owner",)
+
+    autocomplete_fields = (
+        "owner",
+        "amenities",
+    )
 
     list_display = (
         "name",
@@ -39,6 +68,17 @@ class RoomAdmin(admin.ModelAdmin):
         "=owner__username",
     )
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_total_amenities().with_rating()
+
+    @admin.display(ordering="_total_amenities")
+    def total_amenities(self, room):
+        return room.total_amenities()
+
+    @admin.display(ordering="_rating")
+    def rating(self, room):
+        return room.rating()
+
 
 @admin.register(Amenity)
 class AmenityAdmin(admin.ModelAdmin):
@@ -49,6 +89,8 @@ class AmenityAdmin(admin.ModelAdmin):
         "updated_at",
     )
 
+    search_fields = ("name",)
+
     readonly_fields = (
         "created_at",
         "updated_at",
@@ -0,0 +1,36 @@
+from django.conf import settings
+from django.core.cache import cache
+
+ROOM_CACHE_PARTS = ("detail", "amenities", "reviews", "rating", "calendar")
+
+
+def room_cache_key(pk, part):
+    return f"rooms:room:{pk}:{part}"
+
+
+def invalidate_rooms(pks, parts=ROOM_CACHE_PARTS):
+    """Forget cached room data.
+
+    Writes through Model.save and delete are handled by rooms.signals; call
+    it after writes that skip them, such as queryset.update().
+    """
+    cache.delete_many([room_cache_key(pk, part) for pk in pks for part in parts])
+
+
+def cached_parts(pk, builders):
+    """{part: value} for a room, calling builders[part]() for cache misses.
+
+    Every part is fetched with one get_many and the misses are stored with
+    one set_many, for ROOM_CACHE_TIMEOUT seconds.
+    """
+    keys = {part: room_cache_key(pk, part) for part in builders}
+    found = cache.get_many(keys.values())
+    parts, missing = {}, {}
+    for part, key in keys.items():
+        if key in found:
+            parts[part] = found[key]
+        else:
+            parts[part] = missing[key] = builders[part]()
+    if missing:
+        cache.set_many(missing, settings.ROOM_CACHE_TIMEOUT)
+    return parts
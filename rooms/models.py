@@ -1,8 +1,81 @@
+from decimal import Decimal
+
 from django.db import models
+from django.db.models import (
+    Avg,
+    Count,
+    ExpressionWrapper,
+    F,
+    IntegerField,
+    OuterRef,
+    Subquery,
+    Value,
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
 from rest_framework.exceptions import NotFound
 from common.models import CommonModel
 
 
+class RoomQuerySet(models.QuerySet):
+    ROUNDING = ("nearest", "up", "down")
+
+    def adjust_prices(self, percent=None, amount=None, round_to=1, rounding="nearest"):
+        """Change every price in one UPDATE.
+
+        The new price is price * (100 + percent) / 100 or price + amount,
+        rounded to a multiple of round_to and never below zero. Returns the
+        number of rooms updated.
+
+        The arithmetic stays in integers: percent is turned into an exact
+        fraction, so a float multiplier's rounding noise (100 * 1.1 is
+        110.00000000000001) never reaches the rounding.
+        """
+        if percent is not None:
+            numerator, denominator = Decimal(str(percent)).as_integer_ratio()
+            scale = 100 * denominator
+            total = F("price") * Value(scale + numerator)
+        else:
+            scale = 1
+            total = F("price") + Value(int(amount))
+        divisor = scale * round_to
+        # Integer division truncates; results below zero are clamped anyway.
+        if rounding == "up":
+            total = total + Value(divisor - 1)
+        elif rounding == "nearest":
+            total = total + Value(divisor // 2)
+        steps = ExpressionWrapper(total / Value(divisor), output_field=IntegerField())
+        return self.update(
+            price=Greatest(steps * Value(round_to), Value(0)),
+            updated_at=timezone.now(),
+        )
+
+    def with_rating(self):
+        from reviews.models import Review
+
+        return self.annotate(
+            _rating=Subquery(
+                Review.objects.filter(room=OuterRef("pk"))
+                .values("room")
+                .annotate(average=Avg("rating"))
+                .values("average")
+            )
+        )
+
+    def with_total_amenities(self):
+        return self.annotate(
+            _total_amenities=Coalesce(
+                Subquery(
+                    Room.amenities.through.objects.filter(room=OuterRef("pk"))
+                    .values("room")
+                    .annotate(count=Count("pk"))
+                    .values("count")
+                ),
+                0,
+            )
+        )
+
+
 class Room(CommonModel):
     """Room Model Definition"""
 
@@ -33,6 +106,8 @@ class Room(CommonModel):
         related_name="rooms",
     )
 
+    objects = RoomQuerySet.as_manager()
+
     def __str__(self):
         return self.name
 
@@ -44,9 +119,13 @@ class Room(CommonModel):
             raise NotFound
 
     def total_amenities(self):
+        if hasattr(self, "_total_amenities"):
+            return self._total_amenities
         return self.amenities.count()
 
     def rating(room):
+        if hasattr(room, "_rating"):
+            return 0 if room._rating is None else round(room._rating, 2)
         count = room.reviews.count()
         if count == 0:
             return 0
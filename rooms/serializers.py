@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from wishlists.models import Wishlist
-from rooms.models import Amenity, Room
-from medias.serializers import PhotoSerializer
+from rooms.models import Amenity, Room, RoomQuerySet
+from common.serializers import ValuesSerializer
+from medias.serializers import PhotoSerializer, PhotoValuesSerializer
 from users.serializers import TinyUserSerializer
 from categories.serializers import CategorySerializer
 
@@ -16,6 +17,10 @@ class AmenitySerializer(serializers.ModelSerializer):
         )
 
 
+class AmenityValuesSerializer(ValuesSerializer):
+    serializer_class = AmenitySerializer
+
+
 class RoomDetailSerializer(serializers.ModelSerializer):
     owner = TinyUserSerializer(read_only=True)
     category = CategorySerializer(read_only=True)
@@ -45,6 +50,20 @@ class RoomDetailSerializer(serializers.ModelSerializer):
         return False
 
 
+class RoomPageDetailSerializer(RoomDetailSerializer):
+    """RoomDetailSerializer without the viewer's fields, so it can be cached
+
+    The amenities are a part of their own on the page.
+    """
+
+    is_owner = None
+    is_liked = None
+
+    class Meta:
+        model = Room
+        exclude = ("amenities",)
+
+
 class RoomListSerializer(serializers.ModelSerializer):
     rating = serializers.SerializerMethodField()
     is_owner = serializers.SerializerMethodField()
@@ -68,4 +87,39 @@ class RoomListSerializer(serializers.ModelSerializer):
 
     def get_is_owner(self, room):
         request = self.context["request"]
-        return room.owner == request.user
+        return room.owner_id == request.user.pk
+
+
+class RoomListValuesSerializer(ValuesSerializer):
+    serializer_class = RoomListSerializer
+    method_lookups = {"rating": ["_rating"], "is_owner": ["owner"]}
+    nested = {"photos": PhotoValuesSerializer}
+
+    @classmethod
+    def prepare(cls, queryset):
+        return queryset.with_rating()
+
+    def get_rating(self, row):
+        return 0 if row["_rating"] is None else round(row["_rating"], 2)
+
+    def get_is_owner(self, row):
+        return row["owner"] == self.context["request"].user.pk
+
+
+class RoomPriceAdjustmentSerializer(serializers.Serializer):
+    rooms = serializers.ListField(
+        child=serializers.IntegerField(),
+        required=False,
+    )
+    percent = serializers.FloatField(required=False, min_value=-100)
+    amount = serializers.IntegerField(required=False)
+    round_to = serializers.IntegerField(default=1, min_value=1)
+    rounding = serializers.ChoiceField(
+        choices=list(RoomQuerySet.ROUNDING),
+        default="nearest",
+    )
+
+    def validate(self, data):
+        if ("percent" in data) == ("amount" in data):
+            raise serializers.ValidationError("Send either percent or amount.")
+        return data
@@ -0,0 +1,55 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from bookings.models import Booking
+from medias.models import Photo
+from reviews.models import Review
+from rooms.cache import invalidate_rooms
+from rooms.models import Amenity, Room
+
+
+@receiver(post_save, sender=Room)
+@receiver(post_delete, sender=Room)
+def invalidate_room(sender, instance, **kwargs):
+    invalidate_rooms([instance.pk])
+
+
+@receiver(m2m_changed, sender=Room.amenities.through)
+def invalidate_room_amenities(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action.startswith("post_"):
+            invalidate_rooms([instance.pk], parts=("amenities",))
+    elif action in ("post_add", "post_remove"):
+        invalidate_rooms(pk_set, parts=("amenities",))
+    elif action == "pre_clear":
+        # amenity.rooms.clear() does not say which rooms it is about to touch.
+        invalidate_amenity(Amenity, instance)
+
+
+@receiver(post_save, sender=Amenity)
+@receiver(pre_delete, sender=Amenity)
+def invalidate_amenity(sender, instance, created=False, **kwargs):
+    if not created:
+        pks = instance.rooms.values_list("pk", flat=True)
+        invalidate_rooms(list(pks), parts=("amenities",))
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def invalidate_review(sender, instance, **kwargs):
+    if instance.room_id:
+        invalidate_rooms([instance.room_id], parts=("detail", "reviews", "rating"))
+
+
+@receiver(post_save, sender=Booking)
+@receiver(post_delete, sender=Booking)
+def invalidate_booking(sender, instance, **kwargs):
+    if instance.room_id:
+        invalidate_rooms([instance.room_id], parts=("calendar",))
+
+
+@receiver(post_save, sender=Photo)
+@receiver(post_delete, sender=Photo)
+def invalidate_photo(sender, instance, **kwargs):
+    if instance.room_id:
+        invalidate_rooms([instance.room_id], parts=("detail",))
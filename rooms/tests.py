@@ -1,6 +1,19 @@
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
 from rest_framework.test import APITestCase
 
+from common.testing import QueryRecorder
+from bookings.models import Booking
+from reviews.models import Review
 from rooms import models
+from users.models import User
+from wishlists.models import Wishlist
 
 
 class TestAmenities(APITestCase):
@@ -108,3 +121,230 @@ class TestAmenity(APITestCase):
     def test_delete_amenity(self):
         response = self.client.delete("/api/v1/rooms/amenities/1")
         self.assertEqual(response.status_code, 204)
+
+
+@skipUnless(settings.ADMIN_ENABLED, "The admin is off for DEPLOYMENT_ROLE=api")
+class TestRoomAdmin(APITestCase):
+    URL = "/admin/rooms/room/"
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username="admin", is_staff=True, is_superuser=True
+        )
+        self.amenity = models.Amenity.objects.create(name="Wifi")
+        self.client.force_login(self.admin)
+        self.client.get(self.URL)
+
+    def add_rooms(self, count):
+        for i in range(count):
+            room = models.Room.objects.create(
+                name=f"Room {i}",
+                price=10,
+                rooms=1,
+                toilets=1,
+                description="",
+                address="",
+                kind=models.Room.RoomKindChoices.ENTIRE_PLACE,
+                owner=User.objects.create(username=f"owner-{i}-{count}"),
+            )
+            room.amenities.add(self.amenity)
+            Review.objects.create(user=self.admin, room=room, payload="", rating=4)
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.URL, {"o": "4"})
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow(self):
+        self.add_rooms(2)
+        few = self.count_queries()
+        self.add_rooms(10)
+        self.assertEqual(self.count_queries(), few)
+
+
+class TestRoomPrices(APITestCase):
+    URL = "/api/v1/rooms/prices"
+
+    def setUp(self):
+        self.host = User.objects.create(username="host")
+        self.other = User.objects.create(username="other")
+        self.rooms = [
+            self.make_room(self.host, 10_000),
+            self.make_room(self.host, 12_345),
+            self.make_room(self.other, 10_000),
+        ]
+        self.client.force_authenticate(self.host)
+
+    def make_room(self, owner, price):
+        return models.Room.objects.create(
+            name="Room",
+            price=price,
+            rooms=1,
+            toilets=1,
+            description="",
+            address="",
+            owner=owner,
+        )
+
+    def prices(self):
+        return [models.Room.objects.get(pk=room.pk).price for room in self.rooms]
+
+    def test_percent_with_rounding(self):
+        with self.assertNumQueries(2):
+            response = self.client.put(
+                self.URL,
+                data={"percent": 10, "round_to": 100},
+            )
+        self.assertEqual(response.json(), {"updated": 2})
+        self.assertEqual(self.prices(), [11_000, 13_600, 10_000])
+
+    def test_amount_on_selected_rooms(self):
+        response = self.client.put(
+            self.URL,
+            data={
+                "rooms": [self.rooms[1].pk, self.rooms[2].pk],
+                "amount": -20_000,
+            },
+            format="json",
+        )
+        self.assertEqual(response.json(), {"updated": 1})
+        self.assertEqual(self.prices(), [10_000, 0, 10_000])
+
+    def test_rounding_down(self):
+        self.client.put(
+            self.URL,
+            data={"amount": 99, "round_to": 1000, "rounding": "down"},
+        )
+        self.assertEqual(self.prices(), [10_000, 12_000, 10_000])
+
+    def test_rounding_is_exact(self):
+        room = self.make_room(self.host, 100)
+        models.Room.objects.filter(pk=room.pk).adjust_prices(percent=10, rounding="up")
+        room.refresh_from_db()
+        self.assertEqual(room.price, 110)
+        room.price = 29
+        room.save()
+        models.Room.objects.filter(pk=room.pk).adjust_prices(
+            percent=0.5, round_to=1, rounding="down"
+        )
+        room.refresh_from_db()
+        self.assertEqual(room.price, 29)
+        models.Room.objects.filter(pk=room.pk).adjust_prices(
+            percent=12.5, round_to=2, rounding="nearest"
+        )
+        room.refresh_from_db()
+        # 29 * 1.125 = 32.625, nearest multiple of 2
+        self.assertEqual(room.price, 32)
+
+    def test_percent_or_amount_required(self):
+        response = self.client.put(self.URL, data={"percent": 5, "amount": 5})
+        self.assertEqual(response.status_code, 400)
+
+
+class TestRoomPage(APITestCase):
+    databases = {"default", *settings.SHARD_DATABASES}
+
+    def setUp(self):
+        cache.clear()
+        self.host = User.objects.create(username="page-host")
+        self.guest = User.objects.create(username="page-guest")
+        self.room = models.Room.objects.create(
+            name="Page",
+            price=10,
+            rooms=1,
+            toilets=1,
+            description="",
+            address="",
+            kind=models.Room.RoomKindChoices.ENTIRE_PLACE,
+            owner=self.host,
+        )
+        self.amenities = [
+            models.Amenity.objects.create(name=f"Amenity {n}") for n in range(4)
+        ]
+        self.room.amenities.add(*self.amenities)
+        for rating in (5, 4, 4, 1):
+            Review.objects.create(
+                user=self.guest, room=self.room, payload="", rating=rating
+            )
+        self.today = timezone.localdate()
+        self.book(5, 7)
+        self.book(88, 95)
+        self.url = f"/api/v1/rooms/{self.room.pk}/page"
+
+    def book(self, start, end):
+        return Booking.objects.create(
+            kind=Booking.BookingKindChoices.ROOM,
+            user=self.guest,
+            room=self.room,
+            check_in=self.today + timedelta(days=start),
+            check_out=self.today + timedelta(days=end),
+            guests=1,
+        )
+
+    def test_page(self):
+        wishlist = Wishlist.objects.create(name="Trip", user=self.guest)
+        wishlist.rooms.add(self.room)
+        self.client.force_authenticate(self.guest)
+        with QueryRecorder() as cold:
+            data = self.client.get(self.url).json()
+        detail = self.client.get(f"/api/v1/rooms/{self.room.pk}").json()
+        self.assertEqual(
+            data["room"],
+            {
+                key: value
+                for key, value in detail.items()
+                if key not in ("is_owner", "is_liked", "amenities")
+            },
+        )
+        self.assertTrue(data["is_liked"])
+        self.assertFalse(data["is_owner"])
+        self.assertEqual(len(data["amenities"]), 4)
+        self.assertEqual(len(data["reviews"]), settings.PAGE_SIZE)
+        self.assertEqual(
+            data["rating"],
+            {
+                "average": 3.5,
+                "count": 4,
+                "distribution": {"1": 1, "2": 0, "3": 0, "4": 2, "5": 1},
+            },
+        )
+        days = [self.today + timedelta(days=n) for n in (5, 6, 7, 88, 89)]
+        self.assertEqual(data["booked_dates"], [day.isoformat() for day in days])
+
+        with QueryRecorder() as warm:
+            self.assertEqual(self.client.get(self.url).json(), data)
+        self.assertEqual(len(cold.queries), 7, cold.report())
+        self.assertEqual(len(warm.queries), 1, warm.report())
+
+    def test_writes_invalidate_the_cache(self):
+        self.client.get(self.url)
+        Review.objects.create(user=self.guest, room=self.room, payload="", rating=5)
+        self.book(20, 21)
+        self.room.amenities.remove(self.amenities[0])
+        self.amenities[1].name = "Renamed"
+        self.amenities[1].save()
+        data = self.client.get(self.url).json()
+        self.assertEqual(data["rating"]["count"], 5)
+        self.assertEqual(data["room"]["rating"], 3.8)
+        self.assertIn(
+            (self.today + timedelta(days=20)).isoformat(), data["booked_dates"]
+        )
+        self.assertEqual(
+            [amenity["name"] for amenity in data["amenities"]],
+            ["Renamed", "Amenity 2", "Amenity 3"],
+        )
+
+        models.Room.objects.filter(pk=self.room.pk).update(price=99)
+        self.assertEqual(self.client.get(self.url).json()["room"]["price"], 10)
+        self.room.delete()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_room_amenities(self):
+        response = self.client.get(
+            f"/api/v1/rooms/{self.room.pk}/amenities", {"page": 2}
+        )
+        self.assertEqual(
+            response.json(),
+            [{"pk": self.amenities[3].pk, "name": "Amenity 3", "description": None}],
+        )
@@ -2,7 +2,10 @@ from .amenities import Amenities, AmenityDetail
 from .rooms import (
     Rooms,
     RoomDetail,
+    RoomPrices,
     RoomReviews,
     RoomPhotos,
     RoomBookings,
+    RoomAmenities,
+    RoomPage,
 )
@@ -8,10 +8,11 @@ from rest_framework.status import (
     HTTP_400_BAD_REQUEST,
 )
 
-from drf_yasg.utils import swagger_auto_schema
+from common.docs import swagger_auto_schema
 
 from rooms.serializers import (
     AmenitySerializer,
+    AmenityValuesSerializer,
 )
 from rooms.models import Amenity
 
@@ -22,8 +23,7 @@ class Amenities(APIView):
         responses={200: AmenitySerializer(many=True)},
     )
     def get(self, request):
-        all_amenities = Amenity.objects.all()
-        serializer = AmenitySerializer(all_amenities, many=True)
+        serializer = AmenityValuesSerializer(Amenity.objects.all())
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -44,7 +44,6 @@ class Amenities(APIView):
 
 
 class AmenityDetail(APIView):
-    @staticmethod
     def get_object(self, pk):
         try:
             return Amenity.objects.get(pk=pk)
@@ -1,5 +1,8 @@
+from datetime import timedelta
+
 from django.conf import settings
 from django.db import transaction
+from django.db.models import Count
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.exceptions import (
@@ -9,19 +12,31 @@ from rest_framework.exceptions import (
 )
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from common.docs import openapi, swagger_auto_schema
+from common.streaming import (
+    serialized_batches,
+    stream_json,
+    stream_parameter,
+    wants_stream,
+)
 from rooms.serializers import (
     RoomDetailSerializer,
     RoomListSerializer,
+    RoomListValuesSerializer,
+    RoomPriceAdjustmentSerializer,
     AmenitySerializer,
+    AmenityValuesSerializer,
+    RoomPageDetailSerializer,
 )
 from bookings.models import Booking
 from categories.models import Category
+from rooms.cache import cached_parts, invalidate_rooms
 from rooms.models import Amenity, Room
-from medias.serializers import PhotoSerializer
-from reviews.serializers import ReviewSerializer
+from medias.serializers import PhotoSerializer, PhotoUploadSerializer
+from reviews.models import Review
+from reviews.serializers import ReviewSerializer, ReviewValuesSerializer
+from wishlists.models import Wishlist
 from bookings.serializers import PublicBookingSerializer, CreateRoomBookinSerializer
 from reviews.schemas import review_request_body
 
@@ -31,15 +46,16 @@ class Rooms(APIView):
 
     @swagger_auto_schema(
         operation_description="Get the list of all rooms",
+        manual_parameters=[stream_parameter],
         responses={200: RoomListSerializer(many=True)},
     )
     def get(self, request):
-        all_rooms = Room.objects.all()
-        serializer = RoomListSerializer(
-            all_rooms,
-            many=True,
+        serializer = RoomListValuesSerializer(
+            Room.objects.all(),
             context={"request": request},
         )
+        if wants_stream(request):
+            return stream_json(serialized_batches(serializer))
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -74,6 +90,39 @@ class Rooms(APIView):
             return Response(serializer.errors)
 
 
+class RoomPrices(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        operation_description="호스트 소유 Room 가격 일괄 변경 (percent 또는 amount)",
+        request_body=RoomPriceAdjustmentSerializer,
+        responses={200: "변경된 Room 수"},
+    )
+    def put(self, request):
+        serializer = RoomPriceAdjustmentSerializer(data=request.data)
+        if serializer.is_valid():
+            data = serializer.validated_data
+            rooms = Room.objects.filter(owner=request.user)
+            if "rooms" in data:
+                rooms = rooms.filter(pk__in=data["rooms"])
+                pks = data["rooms"]
+            else:
+                pks = list(rooms.values_list("pk", flat=True))
+            updated = rooms.adjust_prices(
+                percent=data.get("percent"),
+                amount=data.get("amount"),
+                round_to=data["round_to"],
+                rounding=data["rounding"],
+            )
+            invalidate_rooms(pks)
+            return Response({"updated": updated})
+        else:
+            return Response(
+                serializer.errors,
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+
 class RoomDetail(APIView):
     permission_classes = [IsAuthenticatedOrReadOnly]
 
@@ -139,11 +188,17 @@ class RoomReviews(APIView):
                 type=openapi.TYPE_INTEGER,
                 required=False,
                 default=1,
-            )
+            ),
+            stream_parameter,
         ],
         responses={200: ReviewSerializer},
     )
     def get(self, request, pk):
+        if wants_stream(request):
+            room = Room.get_object(pk)
+            return stream_json(
+                serialized_batches(ReviewValuesSerializer(room.reviews.all()))
+            )
         try:
             page = request.query_params.get("page", 1)
             page = int(page)
@@ -153,10 +208,7 @@ class RoomReviews(APIView):
         start = (page - 1) * page_size
         end = start + page_size
         room = Room.get_object(pk)
-        serializer = ReviewSerializer(
-            room.reviews.all()[start:end],
-            many=True,
-        )
+        serializer = ReviewValuesSerializer(room.reviews.all()[start:end])
         return Response(serializer.data)
 
     @swagger_auto_schema(
@@ -188,7 +240,7 @@ class RoomAmenities(APIView):
                 default=1,
             )
         ],
-        responses={200: AmenitySerializer},
+        responses={200: AmenitySerializer(many=True)},
     )
     def get(self, request, pk):
         try:
@@ -196,14 +248,11 @@ class RoomAmenities(APIView):
             page = int(page)
         except ValueError:
             page = 1
-        page_size = 3
+        page_size = settings.PAGE_SIZE
         start = (page - 1) * page_size
         end = start + page_size
         room = Room.get_object(pk)
-        serializer = AmenitySerializer(
-            room.reviews.all()[start:end],
-            many=True,
-        )
+        serializer = AmenityValuesSerializer(room.amenities.all()[start:end])
         return Response(serializer.data)
 
 
@@ -220,7 +269,10 @@ class RoomPhotos(APIView):
         room = self.get_object(pk)
         if request.user != room.owner:
             raise PermissionDenied
-        serializer = PhotoSerializer(data=request.data)
+        if "file" in request.FILES:
+            serializer = PhotoUploadSerializer(data=request.data)
+        else:
+            serializer = PhotoSerializer(data=request.data)
         if serializer.is_valid():
             photo = serializer.save(room=room)
             serializer = PhotoSerializer(photo)
@@ -238,20 +290,29 @@ class RoomBookings(APIView):
         except:
             raise NotFound
 
+    @swagger_auto_schema(
+        operation_description="Upcoming bookings of a room",
+        manual_parameters=[stream_parameter],
+        responses={200: PublicBookingSerializer(many=True)},
+    )
     def get(self, request, pk):
         room = self.get_object(pk)
         now = timezone.localtime(timezone.now()).date()
-        bookings = Booking.objects.filter(
-            room=room,
+        bookings = Booking.objects.for_room(room).filter(
             kind=Booking.BookingKindChoices.ROOM,
             check_in__gt=now,
         )
         serializer = PublicBookingSerializer(bookings, many=True)
+        if wants_stream(request):
+            return stream_json(serialized_batches(serializer))
         return Response(serializer.data)
 
     def post(self, request, pk):
         room = self.get_object(pk)
-        serializer = CreateRoomBookinSerializer(data=request.data)
+        serializer = CreateRoomBookinSerializer(
+            data=request.data,
+            context={"room": room},
+        )
         if serializer.is_valid():
             booking = serializer.save(
                 room=room,
@@ -262,3 +323,106 @@ class RoomBookings(APIView):
             return Response(serializer.data)
         else:
             return Response(serializer.errors)
+
+
+class RoomPage(APIView):
+    """Everything the room page shows, in one response.
+
+    The parts shared by every viewer are cached per room (see rooms.cache)
+    and invalidated by rooms.signals; only the viewer's like state is read
+    on every request. A cold request makes seven queries (six for an
+    anonymous viewer), a warm one one (none).
+    """
+
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    @swagger_auto_schema(
+        operation_description="Room, amenities, first page of reviews, rating "
+        "summary, booked dates and the viewer's like state",
+        responses={200: "Room page"},
+    )
+    def get(self, request, pk):
+        parts = cached_parts(
+            pk,
+            {
+                "detail": lambda: self.detail(pk),
+                "amenities": lambda: self.amenities(pk),
+                "reviews": lambda: self.reviews(pk),
+                "rating": lambda: self.rating(pk),
+                "calendar": lambda: self.calendar(pk),
+            },
+        )
+        user = request.user
+        today = timezone.localdate().isoformat()
+        return Response(
+            {
+                "room": parts["detail"]["room"],
+                "is_owner": parts["detail"]["owner"] == user.pk,
+                "is_liked": user.is_authenticated
+                and Wishlist.objects.filter(user=user, rooms__pk=pk).exists(),
+                "amenities": parts["amenities"],
+                "reviews": parts["reviews"],
+                "rating": parts["rating"],
+                # A calendar cached yesterday may still list today's past.
+                "booked_dates": [day for day in parts["calendar"] if day >= today],
+            }
+        )
+
+    def detail(self, pk):
+        room = (
+            Room.objects.with_rating()
+            .select_related("owner", "category")
+            .prefetch_related("photos")
+            .filter(pk=pk)
+            .first()
+        )
+        if room is None:
+            raise NotFound
+        return {"owner": room.owner_id, "room": RoomPageDetailSerializer(room).data}
+
+    def amenities(self, pk):
+        return AmenityValuesSerializer(Amenity.objects.filter(rooms__pk=pk)).data
+
+    def reviews(self, pk):
+        reviews = Review.objects.filter(room_id=pk)[: settings.PAGE_SIZE]
+        return ReviewValuesSerializer(reviews).data
+
+    def rating(self, pk):
+        counts = dict(
+            Review.objects.filter(room_id=pk)
+            .order_by()
+            .values_list("rating")
+            .annotate(count=Count("pk"))
+        )
+        total = sum(counts.values())
+        stars = sum(rating * count for rating, count in counts.items())
+        return {
+            "average": round(stars / total, 2) if total else 0,
+            "count": total,
+            "distribution": {
+                str(rating): counts.get(rating, 0)
+                for rating in sorted({1, 2, 3, 4, 5, *counts})
+            },
+        }
+
+    def calendar(self, pk):
+        """Days a new booking may not include, from today on"""
+        today = timezone.localdate()
+        end = today + timedelta(days=settings.ROOM_CALENDAR_DAYS)
+        bookings = (
+            Booking.objects.for_key(pk)
+            .filter(
+                room_id=pk,
+                kind=Booking.BookingKindChoices.ROOM,
+                check_in__lt=end,
+                check_out__gte=today,
+            )
+            .values_list("check_in", "check_out")
+        )
+        days = set()
+        for check_in, check_out in bookings:
+            day = max(check_in, today)
+            while day <= min(check_out, end - timedelta(days=1)):
+                days.add(day)
+                day += timedelta(days=1)
+        return [day.isoformat() for day in sorted(days)]
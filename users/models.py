@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.cache import cache
 from django.db import models
 from django.contrib.auth.models import AbstractUser
 
@@ -23,3 +25,28 @@ class User(AbstractUser):
     gender = models.CharField(max_length=10, choices=GenderChoices.choices)
     language = models.CharField(max_length=2, choices=LanguageChoices.choices)
     currency = models.CharField(max_length=5, choices=CurrencyChoices.choices)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        cache.delete(User.cache_key(self.pk))
+
+    def delete(self, *args, **kwargs):
+        pk = self.pk
+        result = super().delete(*args, **kwargs)
+        cache.delete(User.cache_key(pk))
+        return result
+
+    @staticmethod
+    def cache_key(pk):
+        return f"users:user:{pk}"
+
+    @staticmethod
+    def get_cached(pk):
+        """Fetch a user by pk through the cache; None if it does not exist"""
+        key = User.cache_key(pk)
+        user = cache.get(key)
+        if user is None:
+            user = User.objects.filter(pk=pk).first()
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
@@ -1,3 +1,67 @@
-from django.test import TestCase
+from django.core.cache import cache
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from users.models import User
+
+
+class TestToken(APITestCase):
+    USERNAME = "token-user"
+    PASSWORD = "token-password"
+    URL = "/api/v1/users/token"
+    ME_URL = "/api/v1/users/me"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username=self.USERNAME)
+        self.user.set_password(self.PASSWORD)
+        self.user.save()
+
+    def get_token(self):
+        response = self.client.post(
+            self.URL,
+            data={"username": self.USERNAME, "password": self.PASSWORD},
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.json()["token"]
+
+    def test_wrong_password(self):
+        response = self.client.post(
+            self.URL,
+            data={"username": self.USERNAME, "password": "nope"},
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_auth_without_queries(self):
+        token = self.get_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get(self.ME_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["username"], self.USERNAME)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.ME_URL)
+        self.assertEqual(response.status_code, 200)
+
+    def test_invalid_token(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Bearer not-a-token")
+        response = self.client.get(self.ME_URL)
+        self.assertEqual(response.status_code, 401)
+
+    def test_save_invalidates_cache(self):
+        token = self.get_token()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.client.get(self.ME_URL)
+
+        self.user.name = "Renamed"
+        self.user.save()
+        response = self.client.get(self.ME_URL)
+        self.assertEqual(response.json()["name"], "Renamed")
+
+    def test_password_change_revokes_token(self):
+        token = self.get_token()
+        self.user.set_password("another-password")
+        self.user.save()
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        response = self.client.get(self.ME_URL)
+        self.assertEqual(response.status_code, 401)
@@ -7,6 +7,7 @@ urlpatterns = [
     path("change-password", views.ChangePassword.as_view()),
     path("log-in", views.LogIn.as_view()),
     path("log-out", views.LogOut.as_view()),
+    path("token", views.Token.as_view()),
     path("@<str:username>", views.PublicUser.as_view()),
 ]
 
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 from rest_framework import status
 from rest_framework.views import APIView
@@ -6,6 +7,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import ParseError, NotFound
 
 from . import serializers
+from users.authentication import make_token
 from users.models import User
 
 
@@ -95,6 +97,30 @@ class LogIn(APIView):
             )
 
 
+class Token(APIView):
+    def post(self, request):
+        username = request.data.get("username")
+        password = request.data.get("password")
+        if not username or not password:
+            raise ParseError
+        user = authenticate(
+            request,
+            username=username,
+            password=password,
+        )
+        if user:
+            return Response(
+                {
+                    "token": make_token(user),
+                    "expires_in": settings.AUTH_TOKEN_MAX_AGE,
+                }
+            )
+        else:
+            return Response(
+                {"error": "wrong password"}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+
 class LogOut(APIView):
     permission_classes = [IsAuthenticated]
 
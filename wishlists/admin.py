@@ -5,3 +5,5 @@ from wishlists.models import Wishlist
 @admin.register(Wishlist)
 class WishlistAdmin(admin.ModelAdmin):
     list_display = ("name", "user", "created_at", "updated_at")
+    list_select_related = ("user",)
+    autocomplete_fields = ("user", "rooms", "experiences")
@@ -1,5 +1,6 @@
 from rest_framework.serializers import ModelSerializer
-from rooms.serializers import RoomListSerializer
+from common.serializers import ValuesSerializer
+from rooms.serializers import RoomListSerializer, RoomListValuesSerializer
 from wishlists.models import Wishlist
 
 
@@ -15,4 +16,9 @@ class WishlistSerializer(ModelSerializer):
             "pk",
             "name",
             "rooms",
-        )
\ No newline at end of file
+        )
+
+
+class WishlistValuesSerializer(ValuesSerializer):
+    serializer_class = WishlistSerializer
+    nested = {"rooms": RoomListValuesSerializer}
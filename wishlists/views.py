@@ -1,15 +1,24 @@
+from django.db.models import Prefetch
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound
 from rest_framework.permissions import IsAuthenticated
-from drf_yasg import openapi
-from drf_yasg.utils import swagger_auto_schema
+from common.docs import openapi, swagger_auto_schema
 from wishlists.models import Wishlist
-from wishlists.serializers import WishlistSerializer
+from wishlists.serializers import WishlistSerializer, WishlistValuesSerializer
 from rooms.models import Room
 
 
+def with_rooms(wishlists):
+    return wishlists.prefetch_related(
+        Prefetch(
+            "rooms",
+            queryset=Room.objects.with_rating().prefetch_related("photos"),
+        )
+    )
+
+
 class Wishlists(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -18,10 +27,8 @@ class Wishlists(APIView):
         responses={200: WishlistSerializer(many=True)},
     )
     def get(self, request):
-        all_wishlists = Wishlist.objects.filter(user=request.user)
-        serializer = WishlistSerializer(
-            all_wishlists,
-            many=True,
+        serializer = WishlistValuesSerializer(
+            Wishlist.objects.filter(user=request.user),
             context={"request": request},
         )
         return Response(serializer.data)
@@ -46,7 +53,7 @@ class WishlistDetail(APIView):
 
     def get_object(self, pk, user):
         try:
-            return Wishlist.objects.get(pk=pk, user=user)
+            return with_rooms(Wishlist.objects.all()).get(pk=pk, user=user)
         except Wishlist.DoesNotExist:
             raise NotFound
 